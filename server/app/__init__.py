@@ -6,9 +6,11 @@ Packages:
     - api: Contains the API routes and logic.
     - models: Contains the database models.
     - schemas: Contains the data validation schemas.
+    - services: Contains domain logic shared by the API and maintenance jobs.
     - utils: Contains utility functions and classes.
 
 Modules:
+    - commands: CLI commands for maintenance jobs.
     - config: Configuration settings for the application.
 """
 
@@ -21,20 +23,44 @@ def create_app() -> Flask:
 
     Configures the application with settings from the Config class,
     initializes extensions like database, JWT, bcrypt, and mail, and sets up
-    CORS for the application.
+    CORS for the application. The database engine is built from the `DB_*`
+    pool settings, see `app.utils.pool`, and requests are measured for the
+    `/metrics` endpoint and the `Server-Timing` header, see `app.utils.metrics`
+    and `app.utils.timing`. SQL statements are observed for slow and N+1
+    queries, see `app.utils.query_observer`. The tables of an in-memory SQLite
+    database are created right away, see `app.utils.types`. Requests are shed
+    with `503 Service Unavailable` when the worker is overloaded, see
+    `app.utils.admission`.
 
     Returns:
         Flask: The configured Flask application instance.
     """
     from app.api import api
+    from app.api.metrics_api import metrics
+    from app.commands import register_commands
     from app.config import Config
 
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    from app.utils.admission import init_admission
     from app.utils.extensions import db, jwt, bcrypt, mail
+    from app.utils.metrics import init_metrics
+    from app.utils.pool import configure_engine, engine_options, is_memory_database
+    from app.utils.query_observer import init_query_observer
+    from app.utils.timing import init_timings
 
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config, app.config['SQLALCHEMY_DATABASE_URI'], app.config['DB_POOL_SIZE'], app.config['DB_MAX_OVERFLOW']
+    )
     db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config)
+        if is_memory_database(db.engine.url):
+            from app.utils.warmup import import_all_modules
+
+            import_all_modules()
+            db.create_all()
     jwt.init_app(app)
     bcrypt.init_app(app)
     mail.init_app(app)
@@ -47,5 +73,15 @@ def create_app() -> Flask:
     })
 
     app.register_blueprint(api)
+    if app.config['METRICS_ENABLED'] or app.config['SERVER_TIMING_ENABLED'] or app.config['QUERY_OBSERVER_ENABLED']:
+        init_timings(app)
+    if app.config['QUERY_OBSERVER_ENABLED']:
+        init_query_observer(app)
+    if app.config['ADMISSION_CONTROL_ENABLED']:
+        init_admission(app)
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app)
+        app.register_blueprint(metrics)
+    register_commands(app)
 
     return app
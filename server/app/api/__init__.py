@@ -10,6 +10,12 @@ from app.api.transactions_api import transactions
 from app.api.users_api import users
 from app.api.calculators_api import calculators
 from app.api.categories_api import categories
+from app.api.sync_api import sync
+from app.api.batch_api import batch
+from app.api.recurring_api import recurring
+from app.api.deletions_api import deletions
+from app.api.alerts_api import alerts
+from app.api.system_api import system
 from .feedback import feedback
 
 api = Blueprint('api', __name__, url_prefix='/api')
@@ -21,4 +27,10 @@ api.register_blueprint(budgets, url_prefix='/budgets')
 api.register_blueprint(calculators, url_prefix='/calculators')
 api.register_blueprint(categories, url_prefix='/categories')
 api.register_blueprint(transactions, url_prefix='/transactions')
+api.register_blueprint(sync, url_prefix='/sync')
+api.register_blueprint(batch, url_prefix='/batch')
+api.register_blueprint(recurring, url_prefix='/recurring')
+api.register_blueprint(deletions, url_prefix='/deletions')
+api.register_blueprint(alerts, url_prefix='/alerts')
+api.register_blueprint(system, url_prefix='/system')
 api.register_blueprint(feedback)
\ No newline at end of file
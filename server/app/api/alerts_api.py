@@ -0,0 +1,67 @@
+"""API for spending anomaly and budget alerts."""
+
+from flask import Blueprint, request, Response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.alert_model import Alert
+from app.utils.async_database import event_loop_view
+from app.utils.decorators import logged_in_required
+from app.utils.extensions import db
+from app.utils.query_observer import query_budget
+from app.utils.responses import create_response
+
+alerts = Blueprint('alerts', __name__)
+"""Blueprint for alert API endpoints."""
+
+
+@alerts.route('/', methods=['GET'])
+@logged_in_required
+@query_budget(2)
+@event_loop_view
+def get_alerts() -> tuple[Response, int]:
+    """Retrieve the latest alerts of the authenticated user, newest first.
+
+    Query parameters:
+        - kind (str, optional): Only alerts of this kind, either 'anomaly' or 'budget_off_track'.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and a list of up to 100 alerts.
+    """
+    user_id = get_jwt_identity()
+    query = Alert.query.filter_by(user_id=user_id)
+    kind = request.args.get('kind')
+    if kind is not None:
+        if kind not in ('anomaly', 'budget_off_track'):
+            return create_response(400, 'Неправильний тип сповіщення')
+        query = query.filter_by(kind=kind)
+
+    user_alerts = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(100).all()
+    return create_response(200, 'Сповіщення успішно отримані', [alert.to_dict() for alert in user_alerts])
+
+
+@alerts.route('/<int:alert_id>', methods=['DELETE'])
+@logged_in_required
+def dismiss_alert(alert_id: int) -> tuple[Response, int]:
+    """Dismiss an alert of the authenticated user.
+
+    A dismissed budget alert is created again by the next budget check if the budget is still off track.
+
+    Args:
+        alert_id (int): The ID of the alert to dismiss.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and message indicating the result.
+    """
+    user_id = get_jwt_identity()
+    alert = Alert.query.filter_by(id=alert_id, user_id=user_id).first()
+    if not alert:
+        return create_response(404, 'Сповіщення не знайдено або доступ заборонено')
+
+    try:
+        db.session.delete(alert)
+        db.session.commit()
+        return create_response(200, 'Сповіщення успішно видалено')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
@@ -9,6 +9,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.models.category_model import Category
 from app.models.user_model import User
 from app.schemas.user_schemas import UserRegisterSchema, UserLoginSchema, UserChangePasswordSchema
+from app.utils.admission import admission_priority
 from app.utils.decorators import logged_in_required
 from app.utils.extensions import db, jwt
 from app.utils.responses import create_response
@@ -78,6 +79,7 @@ def add_claims_to_jwt(identity: str) -> dict[str, Any] | dict:
 
 
 @auth.route('/register', methods=('POST',))
+@admission_priority('critical')
 def register() -> tuple[Response, int] | Response:
     """Endpoint for user registration.
 
@@ -116,7 +118,8 @@ def register() -> tuple[Response, int] | Response:
         )
 
     existing_user = User.query.filter(
-        (User.email == validated_data.email) | (User.username == validated_data.username)).first()
+        (User.email == validated_data.email) | (User.username == validated_data.username)
+    ).execution_options(include_deleted=True).first()
     if existing_user:
         if existing_user.email == validated_data.email:
             return create_response(
@@ -168,6 +171,7 @@ def register() -> tuple[Response, int] | Response:
 
 
 @auth.route('/login', methods=('POST',))
+@admission_priority('critical')
 def login() -> tuple[Response, int] | Response:
     """Endpoint for user login.
 
@@ -222,6 +226,7 @@ def login() -> tuple[Response, int] | Response:
 
 @auth.route('/logout', methods=('POST',))
 @logged_in_required
+@admission_priority('critical')
 def logout():
     """Endpoint for user logout.
 
@@ -240,6 +245,7 @@ def logout():
 
 @auth.route('/change_password', methods=('POST',))
 @logged_in_required
+@admission_priority('critical')
 def change_password() -> tuple[Response, int] | Response:
     """Endpoint for changing user password.
 
@@ -0,0 +1,147 @@
+"""API for executing several API operations in one round trip and one database transaction."""
+
+from urllib.parse import unquote
+
+from flask import Blueprint, request, Response, current_app
+from pydantic import ValidationError
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from app.schemas.batch_schemas import BatchSchema, BatchOperationSchema
+from app.services.deletion import HIDDEN_PARENTS
+from app.utils.admission import admission_priority
+from app.utils.decorators import AUTHENTICATED_REQUEST, logged_in_required
+from app.utils.extensions import db
+from app.utils.responses import create_response
+from app.utils.sessions import NESTED_REQUEST, outer_transaction
+
+batch = Blueprint('batch', __name__)
+"""Blueprint for batch API endpoints."""
+
+EXCLUDED_HEADERS = ('Content-Type', 'Content-Length', 'Host', 'Idempotency-Key')
+"""Headers of the batch request that are not passed to its operations.
+
+An `Idempotency-Key` identifies a single request, so passing it on would make every operation after the first one
+replay or conflict with the response of the first."""
+
+EXCLUDED_BLUEPRINTS = ('api.batch', 'api.auth')
+"""Blueprints whose endpoints cannot be batched."""
+
+
+def dispatch_operation(operation: BatchOperationSchema) -> Response:
+    """Dispatches a single operation of a batch request to the endpoint it points to.
+
+    The endpoint is resolved from the URL map and its view is called directly in a nested request context, without
+    the request hooks of the application, as the batch request is admitted, measured and observed as a whole. The
+    operation shares the JWT of the batch request, which is authenticated once, so it runs as the same user.
+
+    Args:
+        operation (BatchOperationSchema): The operation to dispatch.
+
+    Returns:
+        Response: The response of the endpoint, 400 Bad Request for endpoints that cannot be batched.
+    """
+    path, _, query_string = operation.path.partition('?')
+    adapter = current_app.url_map.bind(request.host, script_name=request.script_root, url_scheme=request.scheme,
+                                       query_args=query_string)
+    try:
+        endpoint, view_args = adapter.match(unquote(path), method=operation.method)
+    except HTTPException as e:
+        return current_app.make_response(current_app.handle_http_exception(e))
+    if endpoint.rpartition('.')[0] in EXCLUDED_BLUEPRINTS:
+        return current_app.make_response(create_response(400, 'Цю операцію неможливо виконати в пакеті'))
+
+    headers = [(key, value) for key, value in request.headers if key not in EXCLUDED_HEADERS]
+    builder = EnvironBuilder(
+        path=path,
+        method=operation.method,
+        base_url=request.host_url,
+        query_string=query_string,
+        headers=headers,
+        json=operation.body
+    )
+    environ = builder.get_environ()
+    environ[NESTED_REQUEST] = True
+    environ[AUTHENTICATED_REQUEST] = True
+    environ[HIDDEN_PARENTS] = request.environ.get(HIDDEN_PARENTS, {})
+    try:
+        with current_app.request_context(environ):
+            try:
+                response = current_app.ensure_sync(current_app.view_functions[endpoint])(**view_args)
+            except Exception as e:
+                response = current_app.handle_user_exception(e)
+            return current_app.make_response(response)
+    finally:
+        builder.close()
+
+
+@batch.route('/', methods=('POST',))
+@logged_in_required
+@admission_priority('heavy')
+def execute_batch() -> tuple[Response, int]:
+    """Execute an ordered list of API operations in one database transaction.
+
+    Provided data should be in JSON format with the following fields:
+        - operations (list): From 1 to 100 operations, each with the following fields:
+            - method (str): The HTTP method, one of 'GET', 'POST', 'PUT' or 'DELETE'.
+            - path (str): The path of the endpoint, e.g. '/api/transactions/'. Batch and authentication
+              endpoints are not allowed.
+            - body (Any, optional): The JSON body of the operation.
+        - atomic (bool, optional): If true (default), the first failed operation rolls back the whole batch and
+          the remaining operations are skipped. If false, every operation is committed or rolled back on its own.
+
+    Returns:
+        tuple[Response, int]: A tuple containing the response object with the status and body of every operation.
+    """
+    data = request.get_json()
+    if not data:
+        return create_response(
+            status_code=400,
+            message='Не надано даних для виконання пакету'
+        )
+
+    try:
+        validated_data = BatchSchema(**data)
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
+
+    results = []
+    failed = False
+    with outer_transaction() as transaction:
+        for operation in validated_data.operations:
+            if failed and validated_data.atomic:
+                results.append({'status': None, 'skipped': True})
+                continue
+
+            try:
+                response = dispatch_operation(operation)
+                status, body = response.status_code, response.get_json(silent=True)
+            except Exception as e:
+                status, body = 500, {'status': 'error', 'message': 'Помилка сервера', 'details': str(e)}
+
+            if status < 400:
+                db.session.commit()
+            else:
+                db.session.rollback()
+                failed = True
+                if validated_data.atomic:
+                    transaction.rollback()
+
+            results.append({'status': status, 'body': body})
+
+    if failed and validated_data.atomic:
+        return create_response(
+            status_code=400,
+            message='Пакет скасовано через помилку в одній з операцій',
+            data=results
+        )
+
+    return create_response(
+        status_code=200,
+        message='Пакет успішно виконано',
+        data=results
+    )
@@ -8,9 +8,18 @@ from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.budget_model import Budget
-from app.schemas.budget_schemas import BudgetSchema
-from app.utils.decorators import logged_in_required
+from app.schemas.budget_schemas import (BudgetSchema, BudgetHistorySchema, BudgetTransferSchema,
+                                        BudgetTransferBatchSchema)
+from app.services.anomalies import daily_plan
+from app.services.balance_history import get_balance_history, invalidate_balance_history, downsample_weekly
+from app.services.changelog import record_change, record_changes
+from app.services.deletion import schedule_deletion
+from app.services.transfers import net_deltas, lock_budgets, invalid_balances, apply_transfers
+from app.utils.admission import admission_priority
+from app.utils.async_database import event_loop_view
+from app.utils.decorators import logged_in_required, idempotent
 from app.utils.extensions import db
+from app.utils.query_observer import query_budget
 from app.utils.responses import create_response
 
 budgets = Blueprint('budgets', __name__)
@@ -19,6 +28,8 @@ budgets = Blueprint('budgets', __name__)
 
 @budgets.route('/', methods=('GET',))
 @logged_in_required
+@query_budget(2)
+@event_loop_view
 def get_budgets() -> tuple[Response, int] | Response:
     """Retrieve all budgets for the logged-in user.
 
@@ -53,6 +64,7 @@ def get_budgets() -> tuple[Response, int] | Response:
 
 @budgets.route('/<int:budget_id>', methods=('GET',))
 @logged_in_required
+@admission_priority('critical')
 def get_budget(budget_id: int) -> tuple[Response, int] | Response:
     """Retrieve a specific budget by its ID for the logged-in user.
 
@@ -151,6 +163,8 @@ def create_budget() -> tuple[Response, int] | Response:
             end_at=validated_data.end_at
         )
         db.session.add(budget)
+        db.session.flush()
+        record_change(user_id, 'budget', budget.id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -233,8 +247,11 @@ def update_budget(budget_id: int) -> tuple[Response, int] | Response:
     update_data = validated_data.model_dump(exclude_unset=True)
 
     try:
+        if 'initial' in update_data and update_data['initial'] != float(budget.initial):
+            invalidate_balance_history(budget.id)
         for key, value in update_data.items():
             setattr(budget, key, value)
+        record_change(user_id, 'budget', budget.id)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -256,7 +273,8 @@ def update_budget(budget_id: int) -> tuple[Response, int] | Response:
 def delete_budget(budget_id: int) -> tuple[Response, int] | Response:
     """Delete a budget for the logged-in user.
 
-    This endpoint allows the user to delete a budget by providing the budget ID in the URL path.
+    This endpoint allows the user to delete a budget by providing the budget ID in the URL path. The budget is
+    hidden at once, while its transactions are deleted in the background, see `GET /api/deletions/<job_id>`.
 
     Args:
         budget_id (int): The ID of the budget to delete. It must be provided in the URL path.
@@ -287,7 +305,8 @@ def delete_budget(budget_id: int) -> tuple[Response, int] | Response:
         )
 
     try:
-        db.session.delete(budget)
+        job = schedule_deletion('budget', budget)
+        record_change(user_id, 'budget', budget.id, 'delete')
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -298,13 +317,102 @@ def delete_budget(budget_id: int) -> tuple[Response, int] | Response:
         )
 
     return make_response(create_response(
-        status_code=200,
-        message='Бюджет видалено успішно'
+        status_code=202,
+        message='Бюджет видалено успішно',
+        data=job.to_dict()
+    ))
+
+
+@budgets.route('/transfer', methods=('POST',))
+@logged_in_required
+@idempotent
+def transfer_between_budgets() -> tuple[Response, int] | Response:
+    """Move money between budgets of the logged-in user.
+
+    The debit and credit of every transfer are applied atomically in one database transaction, so the total
+    balance of the user never changes. Either all transfers of a request are applied or none of them.
+
+    Provided data should be in JSON format with either the fields of a single transfer or a list of transfers
+    for rebalancing many budgets at once:
+        - from_budget_id (int): The ID of the budget to take the money from.
+        - to_budget_id (int): The ID of the budget to put the money to.
+        - amount (float): The amount of the transfer in the range of 0 to 1,000,000.
+        - description (str, optional): A description of the transfer (3-200 characters).
+    or:
+        - transfers (list): From 1 to 1000 transfers with the fields above.
+
+    Returns:
+        tuple[Response, int] | Response: A response object containing the recorded transfers and the new current
+        amounts of the affected budgets.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(
+            status_code=400,
+            message='Не надано даних для переказу'
+        )
+
+    try:
+        if 'transfers' in data:
+            transfers = BudgetTransferBatchSchema(**data).transfers
+        else:
+            transfers = [BudgetTransferSchema(**data)]
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
+
+    deltas = net_deltas(transfers)
+    try:
+        locked = lock_budgets(user_id, deltas)
+        missing = sorted(set(deltas) - set(locked))
+        if missing:
+            db.session.rollback()
+            return create_response(
+                status_code=404,
+                message='Бюджет не знайдено',
+                details={'budget_ids': missing}
+            )
+
+        invalid = invalid_balances(locked, deltas)
+        if invalid:
+            db.session.rollback()
+            return create_response(
+                status_code=400,
+                message='Недостатньо коштів або перевищено ціль бюджету',
+                details={'budget_ids': invalid}
+            )
+
+        records, balances = apply_transfers(user_id, transfers, deltas)
+        record_changes(user_id, 'budget', sorted(balances))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    return make_response(create_response(
+        status_code=201,
+        message='Переказ виконано успішно',
+        data={
+            'transfers': [record.to_dict() for record in records],
+            'budgets': [
+                {'id': budget_id, 'current': float(current)} for budget_id, current in sorted(balances.items())
+            ]
+        }
     ))
 
 
 @budgets.route('/balance', methods=('GET',))
 @logged_in_required
+@query_budget(2)
+@event_loop_view
 def get_budget_balance() -> tuple[Response, int] | Response:
     """Retrieve the total balance of all budgets for the logged-in user.
 
@@ -333,6 +441,7 @@ def get_budget_balance() -> tuple[Response, int] | Response:
 
 @budgets.route('/<int:budget_id>/plan', methods=('GET',))
 @logged_in_required
+@admission_priority('heavy')
 def get_budget_plan(budget_id: int) -> tuple[Response, int] | Response:
     """Retrieve the daily budget plan for a specific budget.
 
@@ -390,8 +499,8 @@ def get_budget_plan(budget_id: int) -> tuple[Response, int] | Response:
             message='Не залишилося днів до закінчення бюджету'
         )
 
-    daily_plan = (goal - current) / days_remaining
-    if daily_plan < 0:
+    plan = daily_plan(goal, current, days_remaining)
+    if plan < 0:
         return create_response(
             status_code=400,
             message='Бюджет вже перевищено, неможливо створити план'
@@ -401,10 +510,89 @@ def get_budget_plan(budget_id: int) -> tuple[Response, int] | Response:
         status_code=200,
         message='План бюджету отримано успішно',
         data={
-            'daily_plan': daily_plan,
+            'daily_plan': plan,
             'days_remaining': days_remaining,
             'end_at': end_at.isoformat(),
             'goal': goal,
             'current': current
         }
     ))
+
+
+@budgets.route('/<int:budget_id>/history', methods=('GET',))
+@logged_in_required
+@admission_priority('heavy')
+def get_budget_history(budget_id: int) -> tuple[Response, int] | Response:
+    """Retrieve the daily balance history of a specific budget.
+
+    This endpoint returns the end-of-day balance of the budget for every day (or the last day of every week)
+    in the requested range, including days without any transactions.
+
+    Query parameters:
+        - from (date, optional): The first day of the range, defaults to the creation date of the budget.
+        - to (date, optional): The last day of the range, defaults to today. The range, with the defaults applied,
+          must not be longer than ten years.
+        - step (str, optional): Either 'day' or 'week', defaults to 'day'.
+
+    Args:
+        budget_id (int): The ID of the budget for which to retrieve the history. It must be provided in the URL path.
+
+    Returns:
+        tuple[Response, int] | Response: A response object containing the status code, message, and balance history if successful.
+    """
+    user_id = get_jwt_identity()
+
+    try:
+        budget = Budget.query.filter_by(id=budget_id, user_id=user_id).first()
+    except SQLAlchemyError as e:
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    if not budget:
+        return create_response(
+            status_code=404,
+            message='Бюджет не знайдено'
+        )
+
+    try:
+        validated_data = BudgetHistorySchema(**{
+            'from': budget.created_at,
+            'to': datetime.date.today(),
+            **request.args.to_dict()
+        })
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильний формат вхідних даних',
+            details=str(e.errors())
+        )
+
+    start, end = validated_data.start, validated_data.end
+
+    try:
+        history = get_balance_history(budget, start, end)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    if validated_data.step == 'week':
+        history = downsample_weekly(history)
+
+    return make_response(create_response(
+        status_code=200,
+        message='Історію балансу бюджету отримано успішно',
+        data={
+            'budget_id': budget.id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'step': validated_data.step,
+            'history': [{'date': day.isoformat(), 'balance': float(balance)} for day, balance in history]
+        }
+    ))
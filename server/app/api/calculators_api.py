@@ -1,16 +1,17 @@
 """API endpoints for managing calculators such as savings, credit, pension, tax for FOP, and balance forecast."""
 
-from flask import Blueprint, request
+import datetime
+
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import get_jwt_identity
 from pydantic import ValidationError
-from sqlalchemy import func, extract
 from werkzeug.wrappers import Response
-from app.models.transaction_model import Transaction
-from app.models.budget_model import Budget
 from app.schemas.calculator_schemas import SavingsSchema, CreditSchema, PensionSchema, TaxFopSchema, \
-    BalanceForecastSchema
+    TaxFopIncomeSchema, BalanceForecastSchema
+from app.services.fop_tax import fop_tax, quarterly_income
+from app.services.forecast import forecast_balance
+from app.utils.admission import admission_priority
 from app.utils.decorators import logged_in_required
-from app.utils.extensions import db
 from app.utils.responses import create_response
 
 calculators = Blueprint('calculators', __name__)
@@ -194,19 +195,73 @@ def calculate_tax_fop() -> tuple[Response, int]:
     )
 
 
+@calculators.route('/tax-fop/income', methods=['POST'])
+@logged_in_required
+def calculate_tax_fop_from_income() -> tuple[Response, int]:
+    """Calculate the tax for FOP from the income transactions of the authenticated user.
+
+    The income is summed per quarter of the year up to the current quarter. Every quarter is taxed at the rate
+    of the group, income above the yearly limit of `FOP_INCOME_LIMIT_WAGES` minimum wages at
+    `FOP_OVER_LIMIT_RATE` percent, and the minimal unified social contribution is added for each quarter.
+
+    Provided data should be in JSON format with the following fields:
+        - year (int, optional): The tax year. Defaults to the current year.
+        - tax_group (int): Tax group for FOP (3 or 5).
+        - period (str, optional): 'quarter' (default) for the breakdown by quarter and the year totals, or 'year'
+          for the year totals only.
+
+    Returns:
+        tuple[Response, int]: A tuple containing the response object and the HTTP status code.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(status_code=400, message='Не надано вхідних даних')
+
+    try:
+        validated_data = TaxFopIncomeSchema(**data)
+    except ValidationError as e:
+        return create_response(status_code=400, message='Неправильні вхідні дані', details=e.errors())
+
+    year = validated_data.year or datetime.date.today().year
+    if year > datetime.date.today().year:
+        return create_response(status_code=400, message='Рік не може бути в майбутньому')
+
+    result = fop_tax(
+        quarterly_income(user_id, year),
+        rate=validated_data.tax_group,
+        esc_rate=current_app.config['FOP_ESC_RATE'],
+        min_wage=current_app.config['FOP_MIN_WAGE'],
+        limit_wages=current_app.config['FOP_INCOME_LIMIT_WAGES'],
+        over_limit_rate=current_app.config['FOP_OVER_LIMIT_RATE']
+    )
+    if validated_data.period == 'year':
+        del result['quarters']
+
+    return create_response(
+        status_code=200,
+        message='Податок для ФОП розраховано успішно',
+        data={'tax_year': year, **result}
+    )
+
+
 @calculators.route('/balance-forecast', methods=['POST'])
 @logged_in_required
+@admission_priority('heavy')
 def calculate_balance_forecast() -> tuple[Response, int]:
-    """Calculates the future balance based on average monthly income and expenses.
+    """Forecasts the balance of the user at the end of every coming month.
 
-    This endpoint uses the user's transaction history to determine the average
-    monthly surplus or deficit and projects the future balance based on that.
+    The net change of every category is projected from the trend and the seasonality of its history, fitted
+    from up to `FORECAST_HISTORY_MONTHS` closed months. The fitted model is cached until a new month starts or a
+    transaction in a closed month changes.
 
     The request body should be a JSON object with the following fields:
-        - forecast_months (int): The number of months to forecast into the future (1-120).
+        - forecast_months (int): The number of months to forecast into the future (1-120), the current month
+          included.
 
     Returns:
-        tuple[Response, int]: A tuple containing the response object with the forecast details.
+        tuple[Response, int]: A tuple containing the response object with the forecast details, including the
+        projected balance with its 95% confidence interval for every month.
     """
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -215,44 +270,10 @@ def calculate_balance_forecast() -> tuple[Response, int]:
 
     try:
         validated_data = BalanceForecastSchema(**data)
-        forecast_months = validated_data.forecast_months
     except ValidationError as e:
         return create_response(400, 'Неправильні вхідні дані', details=e.errors())
 
-    income_subquery = db.session.query(
-        func.sum(Transaction.amount).label('total')
-    ).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == 'income'
-    ).group_by(
-        extract('year', Transaction.created_at),
-        extract('month', Transaction.created_at)
-    ).subquery()
-    avg_income_result = db.session.query(func.avg(income_subquery.c.total)).scalar()
-    avg_monthly_income = float(avg_income_result or 0)
-
-    expense_subquery = db.session.query(
-        func.sum(Transaction.amount).label('total')
-    ).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == 'expense'
-    ).group_by(
-        extract('year', Transaction.created_at),
-        extract('month', Transaction.created_at)
-    ).subquery()
-    avg_expense_result = db.session.query(func.avg(expense_subquery.c.total)).scalar()
-    avg_monthly_expense = float(avg_expense_result or 0)
-
-    current_balance_result = db.session.query(func.sum(Budget.current)).filter(Budget.user_id == user_id).scalar()
-    current_balance = float(current_balance_result or 0)
-
-    monthly_surplus = avg_monthly_income - avg_monthly_expense
-    forecasted_balance = current_balance + (monthly_surplus * forecast_months)
-
-    return create_response(200, "Прогноз балансу успішно розраховано", {
-        'current_balance': round(current_balance, 2),
-        'avg_monthly_income': round(avg_monthly_income, 2),
-        'avg_monthly_expense': round(avg_monthly_expense, 2),
-        'monthly_surplus': round(monthly_surplus, 2),
-        'forecasted_balance': round(forecasted_balance, 2)
-    })
+    forecast = forecast_balance(
+        user_id, validated_data.forecast_months, current_app.config['FORECAST_HISTORY_MONTHS']
+    )
+    return create_response(200, "Прогноз балансу успішно розраховано", forecast)
@@ -5,10 +5,18 @@ from flask_jwt_extended import get_jwt_identity
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.category_model import Category
-from app.models.transaction_model import Transaction
-from app.schemas.category_schemas import CategoryCreateSchema, CategoryUpdateSchema
+from app.models.recurring_rule_model import RecurringRule
+from app.schemas.category_schemas import (CategoryCreateSchema, CategoryUpdateSchema, CategoryListSchema,
+                                          CategorySuggestSchema, CategoryMergeSchema, CategoryReassignSchema)
+from app.services.categorizer import suggest_categories
+from app.services.changelog import record_change
+from app.services.deletion import schedule_deletion
+from app.services.reassignment import category_in_use, category_stats, merge_categories, reassign_transactions
+from app.utils.admission import admission_priority
+from app.utils.async_database import event_loop_view
 from app.utils.decorators import logged_in_required
 from app.utils.extensions import db
+from app.utils.query_observer import query_budget
 from app.utils.responses import create_response
 
 categories = Blueprint('categories', __name__)
@@ -45,6 +53,8 @@ def create_category() -> tuple[Response, int]:
             type=validated_data.type
         )
         db.session.add(new_category)
+        db.session.flush()
+        record_change(user_id, 'category', new_category.id)
         db.session.commit()
 
         return create_response(201, 'Категорію успішно створено', new_category.to_dict())
@@ -57,22 +67,48 @@ def create_category() -> tuple[Response, int]:
 
 @categories.route('/', methods=['GET'])
 @logged_in_required
+@query_budget(2)
+@event_loop_view
 def get_categories() -> tuple[Response, int]:
     """Retrieve all categories for the authenticated user.
 
     This endpoint returns a list of all categories created by the authenticated user.
 
+    Query parameters:
+        - with_stats (bool, optional): If true, every category also has the number of its transactions
+          (`transactions_count`), their total amount (`total_amount`) and the date of the latest one (`last_used_at`),
+          and the most used categories come first.
+
     Returns:
         tuple[Response, int]: A response object with a status code and a list of categories.
     """
     user_id = get_jwt_identity()
-    user_categories = Category.query.filter_by(user_id=user_id).all()
-    return create_response(200, 'Категорії успішно отримані',
-                           [category.to_dict() for category in user_categories])
+    try:
+        validated_data = CategoryListSchema(**request.args.to_dict())
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+
+    if not validated_data.with_stats:
+        user_categories = Category.query.filter_by(user_id=user_id).all()
+        return create_response(200, 'Категорії успішно отримані',
+                               [category.to_dict() for category in user_categories])
+
+    try:
+        rows = category_stats(user_id)
+    except SQLAlchemyError as e:
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+    return create_response(200, 'Категорії успішно отримані', [{
+        **category.to_dict(),
+        'transactions_count': count,
+        'total_amount': float(total),
+        'last_used_at': last_used_at.isoformat() if last_used_at else None
+    } for category, count, total, last_used_at in rows])
 
 
 @categories.route('/<int:category_id>', methods=['GET'])
 @logged_in_required
+@admission_priority('critical')
 def get_category(category_id: int) -> tuple[Response, int]:
     """Retrieve a specific category by its ID for the authenticated user.
 
@@ -126,6 +162,7 @@ def update_category(category_id: int) -> tuple[Response, int]:
         for key, value in validated_data.items():
             setattr(category, key, value)
 
+        record_change(user_id, 'category', category.id)
         db.session.commit()
         return create_response(200, 'Категорія успішно оновлена', category.to_dict())
     except ValidationError as e:
@@ -141,6 +178,7 @@ def delete_category(category_id: int) -> tuple[Response, int]:
     """Delete a specific category by its ID for the authenticated user.
 
     This endpoint allows users to delete a specific category by its ID, ensuring that the category belongs to the authenticated user.
+    The category is hidden at once and its classifier data are deleted in the background.
 
     Args:
         category_id (int): The ID of the category to delete.
@@ -153,14 +191,148 @@ def delete_category(category_id: int) -> tuple[Response, int]:
     if not category:
         return create_response(404, 'Категорію не знайдено або доступ заборонено')
 
-    transactions_exist = Transaction.query.filter_by(category_id=category_id).first()
-    if transactions_exist:
+    if category_in_use(category_id):
         return create_response(400, 'Не можливо видалити категорію, оскільки вона містить транзакції')
+    if RecurringRule.query.filter_by(category_id=category_id).first():
+        return create_response(400, 'Не можливо видалити категорію, оскільки вона використовується '
+                                    'регулярними транзакціями')
 
     try:
-        db.session.delete(category)
+        job = schedule_deletion('category', category)
+        record_change(user_id, 'category', category.id, 'delete')
         db.session.commit()
-        return create_response(200, 'Категорію успішно видалено')
+        return create_response(202, 'Категорію успішно видалено', job.to_dict())
     except SQLAlchemyError as e:
         db.session.rollback()
         return create_response(500, 'Помилка бази даних', details=str(e))
+
+
+@categories.route('/<int:category_id>/merge', methods=['POST'])
+@logged_in_required
+def merge_category(category_id: int) -> tuple[Response, int]:
+    """Merge a category into another category of the authenticated user.
+
+    All transactions and recurring transactions of the category are moved to the target category of the same
+    type with a single update, after which the category is deleted unless `delete_source` is false.
+
+    Provided data should be in JSON format with the following fields:
+        - target_category_id (int): The ID of the category to move the transactions to.
+        - delete_source (bool, optional): Whether to delete the merged category, defaults to true.
+
+    Args:
+        category_id (int): The ID of the category to merge.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code, the target category and the number of moved
+        transactions and recurring transactions.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(400, 'Не надано даних для об\'єднання категорій')
+
+    try:
+        validated_data = CategoryMergeSchema(**data)
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+
+    if validated_data.target_category_id == category_id:
+        return create_response(400, 'Не можливо об\'єднати категорію саму з собою')
+
+    source = Category.query.filter_by(id=category_id, user_id=user_id).first()
+    target = Category.query.filter_by(id=validated_data.target_category_id, user_id=user_id).first()
+    if not source or not target:
+        return create_response(404, 'Категорію не знайдено або доступ заборонено')
+    if source.type != target.type:
+        return create_response(400, 'Типи категорій не збігаються')
+
+    try:
+        moved, rules = merge_categories(user_id, source, target)
+        result = {'category': target.to_dict(), 'moved_transactions': len(moved), 'moved_recurring': rules}
+        if validated_data.delete_source:
+            result['deletion'] = schedule_deletion('category', source).to_dict()
+            record_change(user_id, 'category', source.id, 'delete')
+        db.session.commit()
+        return create_response(200, 'Категорії успішно об\'єднано', result)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+
+@categories.route('/reassign', methods=['POST'])
+@logged_in_required
+def reassign_category() -> tuple[Response, int]:
+    """Move several transactions of the authenticated user into a category with a single update.
+
+    Transactions whose type does not match the type of the category, already in the category or not found are
+    skipped.
+
+    Provided data should be in JSON format with the following fields:
+        - category_id (int): The ID of the category to move the transactions to.
+        - transaction_ids (list[int]): The IDs of the transactions to move, up to 10,000.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and the IDs of the moved and skipped
+        transactions.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(400, 'Не надано даних для зміни категорії транзакцій')
+
+    try:
+        validated_data = CategoryReassignSchema(**data)
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+
+    category = Category.query.filter_by(id=validated_data.category_id, user_id=user_id).first()
+    if not category:
+        return create_response(404, 'Категорію не знайдено або доступ заборонено')
+
+    try:
+        moved = reassign_transactions(user_id, validated_data.transaction_ids, category)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+    skipped = sorted(set(validated_data.transaction_ids) - set(moved))
+    return create_response(200, 'Категорію транзакцій успішно змінено', {'moved': sorted(moved), 'skipped': skipped})
+
+
+@categories.route('/suggest', methods=['POST'])
+@logged_in_required
+def suggest_category() -> tuple[Response, int]:
+    """Suggest categories for transaction descriptions of the authenticated user.
+
+    This endpoint returns the most probable categories for each description, learned from the descriptions and
+    categories of the user's transactions. It accepts up to 10,000 descriptions at once for bulk imports.
+
+    Provided data should be in JSON format with the following fields:
+        - descriptions (list[str]): The descriptions of the transactions to categorize.
+        - type (str, optional): The type of the transactions, either 'income' or 'expense'. Only categories of
+          the matching type are suggested.
+        - k (int, optional): The number of suggestions per description (1-10), defaults to 3.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and, for every description, a list of
+        suggestions with the category ID and its probability.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(400, 'Не надано даних для підбору категорії')
+
+    try:
+        validated_data = CategorySuggestSchema(**data)
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+
+    category_type = {'income': 'incomes', 'expense': 'expenses'}.get(validated_data.type)
+    try:
+        suggestions = suggest_categories(user_id, validated_data.descriptions, validated_data.k, category_type)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+    return create_response(200, 'Категорії успішно підібрано', suggestions)
@@ -0,0 +1,45 @@
+"""API for the progress of background deletions of budgets, categories and users."""
+
+from flask import Blueprint, Response
+from flask_jwt_extended import get_jwt_identity
+
+from app.models.deletion_job_model import DeletionJob
+from app.utils.admission import admission_priority
+from app.utils.decorators import logged_in_required
+from app.utils.responses import create_response
+
+deletions = Blueprint('deletions', __name__)
+"""Blueprint for deletion progress API endpoints."""
+
+
+@deletions.route('/', methods=['GET'])
+@logged_in_required
+def get_deletion_jobs() -> tuple[Response, int]:
+    """Retrieve the background deletions of the authenticated user, newest first.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and a list of deletion jobs.
+    """
+    user_id = get_jwt_identity()
+    jobs = DeletionJob.query.filter_by(user_id=user_id).order_by(DeletionJob.id.desc()).limit(100).all()
+    return create_response(200, 'Видалення успішно отримані', [job.to_dict() for job in jobs])
+
+
+@deletions.route('/<int:job_id>', methods=['GET'])
+@logged_in_required
+@admission_priority('critical')
+def get_deletion_job(job_id: int) -> tuple[Response, int]:
+    """Retrieve the progress of a background deletion of the authenticated user.
+
+    Args:
+        job_id (int): The ID of the deletion job returned by the delete endpoint.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and the job with its status, the number of
+        deleted and total rows, and the progress between 0 and 1.
+    """
+    user_id = get_jwt_identity()
+    job = DeletionJob.query.filter_by(id=job_id, user_id=user_id).first()
+    if not job:
+        return create_response(404, 'Видалення не знайдено або доступ заборонено')
+    return create_response(200, 'Видалення успішно отримане', job.to_dict())
@@ -5,8 +5,10 @@ from datetime import datetime
 
 from flask import Blueprint, request, current_app
 from flask_mail import Message
-from pydantic import BaseModel, ValidationError, EmailStr, validator
+from pydantic import ValidationError, EmailStr, validator
 
+from app.schemas.base_schemas import Schema
+from app.utils.admission import admission_priority
 from app.utils.extensions import mail
 from app.utils.decorators import logged_in_required
 from app.utils.responses import create_response
@@ -15,7 +17,7 @@ feedback = Blueprint('feedback', __name__)
 """Feedback Blueprint для обробки відгуків користувачів"""
 
 
-class FeedbackSchema(BaseModel):
+class FeedbackSchema(Schema):
     """Pydantic model for validating feedback data."""
     name: str
     email: EmailStr
@@ -236,6 +238,7 @@ def submit_feedback():
 
 @feedback.route('/feedback/stats', methods=['GET'])
 @logged_in_required
+@admission_priority('heavy')
 def get_feedback_stats():
     """Retrieve feedback statistics."""
     return create_response(
@@ -0,0 +1,34 @@
+"""Prometheus endpoint exposing the request metrics of all workers, see `app.utils.metrics`."""
+
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+
+from app.utils.admission import admission_priority
+from app.utils.metrics import collect, render
+from app.utils.responses import create_response
+
+metrics = Blueprint('metrics', __name__)
+"""Blueprint for the metrics endpoint, registered outside of the `/api` prefix."""
+
+
+@metrics.route('/metrics', methods=['GET'])
+@admission_priority('critical')
+def get_metrics() -> Response | tuple[Response, int]:
+    """Retrieve the request metrics in the Prometheus text exposition format.
+
+    The scraper must send `METRICS_TOKEN` as a bearer token. The metrics are not served while it is not set,
+    as they reveal the endpoints and the load of the application.
+
+    Returns:
+        Response: The latency histograms, response sizes and SQL statement counts and times of all workers,
+            by endpoint, method and status.
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return create_response(403, 'Токен метрик не налаштовано')
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return create_response(401, 'Недійсний токен метрик')
+
+    body = render(collect(current_app.config['METRICS_DIR']))
+    return Response(body, mimetype='text/plain', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,209 @@
+"""API for recurring transaction rules management.
+
+The transactions of due occurrences are created by the `run-recurring` scheduler command, not by these endpoints.
+"""
+
+import datetime
+
+from flask import Blueprint, request, Response
+from flask_jwt_extended import get_jwt_identity
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.budget_model import Budget
+from app.models.category_model import Category
+from app.models.recurring_rule_model import RecurringRule
+from app.schemas.recurring_schemas import RecurringRuleCreateSchema, RecurringRuleUpdateSchema
+from app.services.recurring import skip_missed_occurrences
+from app.utils.admission import admission_priority
+from app.utils.decorators import logged_in_required
+from app.utils.extensions import db
+from app.utils.responses import create_response
+
+recurring = Blueprint('recurring', __name__)
+"""Blueprint for recurring transaction rules API endpoints."""
+
+
+def category_matches(category: Category, transaction_type: str) -> bool:
+    """Checks that a category of type 'incomes' or 'expenses' can hold transactions of the given type."""
+    return (category.type == 'incomes') == (transaction_type == 'income')
+
+
+@recurring.route('/', methods=['POST'])
+@logged_in_required
+def create_rule() -> tuple[Response, int]:
+    """Create a new recurring transaction rule for the authenticated user.
+
+    A transaction is created for every occurrence of the rule, i.e. at `start_at` and then every `interval_count`
+    units of `interval_unit`, until `end_at`. Occurrences that are already due, e.g. of a rule starting in the
+    past, are created by the next scheduler run.
+
+    Provided data should be in JSON format with the following fields:
+        - budget_id (int): The ID of the budget of the transactions.
+        - category_id (int): The ID of the category of the transactions.
+        - amount (float): The amount of the transactions in the range of 0 to 1,000,000.
+        - description (str, optional): A description of the transactions (3-200 characters).
+        - type (str): The type of the transactions, either 'income' or 'expense'.
+        - interval_unit (str): The unit of the interval, one of 'day', 'week', 'month' or 'year'.
+        - interval_count (int, optional): The number of units between occurrences (1-365), defaults to 1.
+        - start_at (datetime, optional): The date and time of the first occurrence. Defaults to the current time.
+        - end_at (datetime, optional): No occurrences are created after this date and time.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and message indicating the result of the creation attempt.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    if not data:
+        return create_response(400, 'Не надано даних для створення регулярної транзакції')
+
+    try:
+        validated_data = RecurringRuleCreateSchema(**data)
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+
+    category = Category.query.filter_by(id=validated_data.category_id, user_id=user_id).first()
+    if not category:
+        return create_response(404, 'Не існує наданої категорії')
+    if not category_matches(category, validated_data.type):
+        return create_response(400, 'Тип категорії не відповідає типу транзакції')
+
+    budget = Budget.query.filter_by(id=validated_data.budget_id, user_id=user_id).first()
+    if not budget:
+        return create_response(404, 'Не існує наданого бюджету')
+
+    try:
+        rule = RecurringRule(
+            user_id=user_id,
+            next_run_at=validated_data.start_at,
+            occurrences=0,
+            active=True,
+            **validated_data.model_dump()
+        )
+        db.session.add(rule)
+        db.session.commit()
+        return create_response(201, 'Регулярну транзакцію успішно створено', rule.to_dict())
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+
+@recurring.route('/', methods=['GET'])
+@logged_in_required
+def get_rules() -> tuple[Response, int]:
+    """Retrieve all recurring transaction rules of the authenticated user.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and a list of rules.
+    """
+    user_id = get_jwt_identity()
+    rules = RecurringRule.query.filter_by(user_id=user_id).order_by(RecurringRule.id).all()
+    return create_response(200, 'Регулярні транзакції успішно отримані', [rule.to_dict() for rule in rules])
+
+
+@recurring.route('/<int:rule_id>', methods=['GET'])
+@logged_in_required
+@admission_priority('critical')
+def get_rule(rule_id: int) -> tuple[Response, int]:
+    """Retrieve a specific recurring transaction rule by its ID for the authenticated user.
+
+    Args:
+        rule_id (int): The ID of the rule to retrieve.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and the rule details if found.
+    """
+    user_id = get_jwt_identity()
+    rule = RecurringRule.query.filter_by(id=rule_id, user_id=user_id).first()
+    if not rule:
+        return create_response(404, 'Регулярну транзакцію не знайдено або доступ заборонено')
+    return create_response(200, 'Регулярна транзакція успішно отримана', rule.to_dict())
+
+
+@recurring.route('/<int:rule_id>', methods=['PUT'])
+@logged_in_required
+def update_rule(rule_id: int) -> tuple[Response, int]:
+    """Update an existing recurring transaction rule for the authenticated user.
+
+    The changes apply to occurrences created after the update, already created transactions are not changed.
+
+    Provided data should be in JSON format with the following fields:
+        - category_id (int, optional): The ID of the new category of the transactions.
+        - amount (float, optional): The new amount of the transactions in the range of 0 to 1,000,000.
+        - description (str, optional): A new description of the transactions (3-200 characters).
+        - end_at (datetime, optional): The new end of the rule.
+        - active (bool, optional): False pauses the rule, true resumes it. A resumed rule continues with its
+          first occurrence due after the update, occurrences missed while it was paused are not created.
+
+    A rule whose budget or category is being deleted can not be updated.
+
+    Args:
+        rule_id (int): The ID of the rule to update.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and message indicating the result of the update attempt.
+    """
+    user_id = get_jwt_identity()
+    rule = RecurringRule.query.filter_by(id=rule_id, user_id=user_id).first()
+    if not rule:
+        return create_response(404, 'Регулярну транзакцію не знайдено або доступ заборонено')
+
+    data = request.get_json()
+    if not data:
+        return create_response(400, 'Не надано даних для оновлення регулярної транзакції')
+
+    try:
+        validated_data = RecurringRuleUpdateSchema(**data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+    if not validated_data:
+        return create_response(400, 'Дані для оновлення регулярної транзакції не надано')
+
+    category_id = validated_data.get('category_id', rule.category_id)
+    category = Category.query.filter_by(id=category_id, user_id=user_id).first()
+    if not category:
+        return create_response(404, 'Категорію не знайдено')
+    if not category_matches(category, rule.type):
+        return create_response(400, 'Тип категорії не відповідає типу транзакції')
+    if not Budget.query.filter_by(id=rule.budget_id, user_id=user_id).first():
+        return create_response(404, 'Не існує наданого бюджету')
+
+    if validated_data.get('end_at') is not None and validated_data['end_at'] <= rule.start_at:
+        return create_response(400, 'Дата завершення має бути пізнішою за дату початку')
+
+    try:
+        if validated_data.get('active') and not rule.active:
+            skip_missed_occurrences(rule, datetime.datetime.now())
+        for key, value in validated_data.items():
+            setattr(rule, key, value)
+        db.session.commit()
+        return create_response(200, 'Регулярна транзакція успішно оновлена', rule.to_dict())
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
+
+
+@recurring.route('/<int:rule_id>', methods=['DELETE'])
+@logged_in_required
+def delete_rule(rule_id: int) -> tuple[Response, int]:
+    """Delete a specific recurring transaction rule by its ID for the authenticated user.
+
+    Transactions already created by the rule are kept.
+
+    Args:
+        rule_id (int): The ID of the rule to delete.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and message indicating the result of the deletion attempt.
+    """
+    user_id = get_jwt_identity()
+    rule = RecurringRule.query.filter_by(id=rule_id, user_id=user_id).first()
+    if not rule:
+        return create_response(404, 'Регулярну транзакцію не знайдено або доступ заборонено')
+
+    try:
+        db.session.delete(rule)
+        db.session.commit()
+        return create_response(200, 'Регулярну транзакцію успішно видалено')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(500, 'Помилка бази даних', details=str(e))
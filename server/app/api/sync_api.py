@@ -0,0 +1,108 @@
+"""API for delta synchronization of transactions, budgets and categories."""
+
+from flask import Blueprint, request, Response
+from flask_jwt_extended import get_jwt_identity
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.budget_model import Budget
+from app.models.category_model import Category
+from app.models.change_log_model import ChangeLog
+from app.models.transaction_model import Transaction
+from app.schemas.sync_schemas import SyncSchema
+from app.services.changelog import current_sequence
+from app.utils.admission import admission_priority
+from app.utils.decorators import logged_in_required
+from app.utils.responses import create_response
+
+sync = Blueprint('sync', __name__)
+"""Blueprint for synchronization API endpoints."""
+
+SYNCED_MODELS = {
+    'transaction': ('transactions', Transaction),
+    'budget': ('budgets', Budget),
+    'category': ('categories', Category),
+}
+"""Synchronized entities mapped to their response keys and models."""
+
+
+def _upserted(entity: str, model, user_id: int | str, since: int | None) -> list:
+    """Returns the records of a user created or updated after a sequence number, all of them if it is None."""
+    query = model.query.filter(model.user_id == user_id)
+    if since is not None:
+        query = query.join(ChangeLog, (ChangeLog.entity == entity) & (ChangeLog.entity_id == model.id)).filter(
+            ChangeLog.user_id == user_id,
+            ChangeLog.seq > since,
+            ChangeLog.operation == 'upsert'
+        )
+    return query.all()
+
+
+@sync.route('/', methods=('GET',))
+@logged_in_required
+@admission_priority('heavy')
+def get_changes() -> tuple[Response, int]:
+    """Retrieve transactions, budgets and categories changed after a given change sequence number.
+
+    This endpoint returns the current state of the records created or updated after the sequence number and
+    the IDs of the records deleted after it (tombstones). If the sequence number is 0 or unknown to the server,
+    all records of the user are returned and the client should replace its local copy. Archived transactions are
+    included in both cases.
+
+    Query parameters:
+        - since (int, optional): The last sequence number seen by the client, defaults to 0.
+
+    Returns:
+        tuple[Response, int]: A tuple containing the response object with the changes and the new sequence number.
+    """
+    user_id = get_jwt_identity()
+
+    try:
+        validated_data = SyncSchema(**request.args.to_dict())
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
+
+    try:
+        seq = current_sequence(user_id)
+        full = validated_data.since == 0 or validated_data.since > seq
+
+        since = None if full else validated_data.since
+
+        upserts = {}
+        deletes = {key: [] for key, _ in SYNCED_MODELS.values()}
+        for entity, (key, model) in SYNCED_MODELS.items():
+            upserts[key] = [record.to_dict() for record in _upserted(entity, model, user_id, since)]
+        upserts['transactions'].extend(
+            transaction.to_dict() for transaction in _upserted('transaction', ArchivedTransaction, user_id, since)
+        )
+
+        if not full:
+            tombstones = ChangeLog.query.with_entities(ChangeLog.entity, ChangeLog.entity_id).filter(
+                ChangeLog.user_id == user_id,
+                ChangeLog.seq > validated_data.since,
+                ChangeLog.operation == 'delete'
+            ).all()
+            for entity, entity_id in tombstones:
+                deletes[SYNCED_MODELS[entity][0]].append(entity_id)
+    except SQLAlchemyError as e:
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    return create_response(
+        status_code=200,
+        message='Зміни успішно отримано',
+        data={
+            'seq': seq,
+            'full': full,
+            'upserts': upserts,
+            'deletes': deletes
+        }
+    )
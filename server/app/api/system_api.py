@@ -0,0 +1,134 @@
+"""API for the operational state of the server process."""
+
+import os
+from urllib.parse import unquote
+
+from flask import Blueprint, Response, current_app, request
+from pydantic import ValidationError
+from werkzeug.exceptions import HTTPException
+
+from app.schemas.system_schemas import ProfileSchema
+from app.utils.admission import admission_priority, controller
+from app.utils.decorators import admin_required
+from app.utils.extensions import async_db, db
+from app.utils.pool import pool_statistics
+from app.utils.profiler import SamplingProfiler, stack_depth
+from app.utils.query_observer import observer
+from app.utils.responses import create_response
+from app.utils.sessions import NESTED_REQUEST
+
+system = Blueprint('system', __name__)
+"""Blueprint for system API endpoints."""
+
+
+@system.route('/pool', methods=['GET'])
+@admin_required
+@admission_priority('critical')
+def get_pool_statistics() -> tuple[Response, int]:
+    """Retrieve the usage of the database connection pools of the worker serving the request.
+
+    Every worker has its own pools, so repeated requests are answered by different workers, told apart by `pid`.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and the statistics of the synchronous pool,
+            and of the asynchronous pool in the ASGI mode.
+    """
+    statistics = {'pid': os.getpid(), 'pool': pool_statistics(db.engine.pool)}
+    if async_db.engine is not None:
+        statistics['async_pool'] = pool_statistics(async_db.engine.pool)
+    return create_response(200, 'Статистику пулу зʼєднань отримано', statistics)
+
+
+@system.route('/admission', methods=['GET'])
+@admin_required
+@admission_priority('critical')
+def get_admission_statistics() -> tuple[Response, int]:
+    """Retrieve the state of the admission control of the worker serving the request.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code, the current wait of the pool and the requests in
+            flight, admitted and rejected by priority, see `app.utils.admission`.
+    """
+    return create_response(200, 'Статистику допуску запитів отримано', {'pid': os.getpid(), **controller.statistics()})
+
+
+@system.route('/queries', methods=['GET'])
+@admin_required
+@admission_priority('critical')
+def get_query_statistics() -> tuple[Response, int]:
+    """Retrieve the SQL statements executed by the worker serving the request, aggregated by fingerprint.
+
+    Query parameters:
+        - order (str, optional): The statistic to order by descending, 'total' (default), 'count', 'max' or 'repeats'.
+        - limit (int, optional): The number of fingerprints to return, from 1 to 500, defaults to 20.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code and the statistics of the fingerprints.
+    """
+    order = request.args.get('order', 'total')
+    limit = request.args.get('limit', 20, type=int)
+    if order not in ('total', 'count', 'max', 'repeats') or not 1 <= limit <= 500:
+        return create_response(400, 'Неправильні параметри запиту')
+
+    return create_response(200, 'Статистику запитів отримано', {
+        'pid': os.getpid(),
+        'queries': observer.statistics(order, limit)
+    })
+
+
+def matched_endpoint(path: str, method: str) -> str | None:
+    """Returns the endpoint a request of the method to the path is routed to, or None if no endpoint matches."""
+    try:
+        endpoint, _ = current_app.url_map.bind_to_environ(request.environ).match(unquote(path), method)
+    except HTTPException:
+        return None
+    return endpoint
+
+
+@system.route('/profile', methods=['POST'])
+@admin_required
+@admission_priority('heavy')
+def profile_request() -> tuple[Response, int]:
+    """Run a single request of the application under the sampling profiler and return its profile.
+
+    The request is executed for real with the credentials of the admin, so a profiled write changes the data.
+    The switch interval of the interpreter is lowered to the sampling interval only if no other request is in
+    flight in the worker, as it applies to the whole process. Otherwise the stack is sampled every 5 ms at most.
+
+    Provided data should be in JSON format with the following fields:
+        - method (str, optional): The HTTP method of the request, defaults to 'GET'.
+        - path (str): The path of the request, starting with '/api/'.
+        - query (dict, optional): The query parameters of the request.
+        - body (Any, optional): The JSON body of the request.
+        - interval_ms (float, optional): The sampling interval in milliseconds, from 0.1 to 100, defaults to 1.
+
+    Returns:
+        tuple[Response, int]: A response object with a status code, the status and `Server-Timing` header of the
+            profiled request, whether the switch interval was lowered, and the sampled stacks in the collapsed
+            format of flame graph tools (`flamegraph.pl`, speedscope), one `frame;frame;frame count` line per stack.
+    """
+    try:
+        validated_data = ProfileSchema(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return create_response(400, 'Неправильні вхідні дані', details=e.errors())
+    if matched_endpoint(validated_data.path, validated_data.method) == request.endpoint:
+        return create_response(400, 'Неможливо профілювати профілювання')
+
+    headers = {name: request.headers[name] for name in ('Authorization', 'Cookie') if name in request.headers}
+    client = current_app.test_client()
+    alone = controller.enabled and controller.in_flight() <= 1
+    skip = stack_depth()
+    with SamplingProfiler(validated_data.interval_ms / 1000, lower_switch_interval=alone) as profiler:
+        response = client.open(validated_data.path, method=validated_data.method,
+                               query_string=validated_data.query, headers=headers,
+                               json=validated_data.body, environ_overrides={NESTED_REQUEST: True})
+
+    return create_response(200, 'Профіль запиту отримано', {
+        'status': response.status_code,
+        'server_timing': response.headers.get('Server-Timing'),
+        'duration_ms': round(profiler.duration * 1000, 3),
+        'samples': profiler.samples,
+        'interval_ms': validated_data.interval_ms,
+        'switch_interval_lowered': profiler.switch_interval_lowered,
+        'folded': profiler.folded(skip)
+    })
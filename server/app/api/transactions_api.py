@@ -1,30 +1,66 @@
 """API endpoints for managing transactions."""
 
 from decimal import Decimal
+from types import SimpleNamespace
 
 from flask import Blueprint, request, Response
 from flask_jwt_extended import get_jwt_identity
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.models.archived_transaction_model import ArchivedTransaction
 from app.models.budget_model import Budget
 from app.models.category_model import Category
 from app.models.transaction_model import Transaction
-from app.schemas.transaction_schemas import TransactionSchema
-from app.utils.decorators import logged_in_required
+from app.schemas.transaction_schemas import TransactionSchema, TransactionRangeSchema, TransactionSearchSchema
+from app.services.anomalies import observe_transaction, update_category_stats
+from app.services.archive import query_transactions, restore_transaction
+from app.services.balance_history import invalidate_balance_history
+from app.services.categorizer import learn
+from app.services.changelog import record_change
+from app.services.deduplication import claim_fingerprint, release_fingerprint
+from app.services.fop_tax import invalidate_quarter_income
+from app.services.forecast import invalidate_forecast
+from app.services.search import search_transactions
+from app.utils.admission import admission_priority
+from app.utils.async_database import event_loop_view
+from app.utils.decorators import logged_in_required, idempotent
 from app.utils.extensions import db
+from app.utils.query_observer import query_budget
 from app.utils.responses import create_response
 
 transactions = Blueprint('transactions', __name__)
 """Blueprint for transaction-related API endpoints."""
 
 
+def list_transactions(**filters) -> list[Transaction | ArchivedTransaction]:
+    """Lists hot and archived transactions matching the filters in the range given by the request.
+
+    The optional `from` and `to` query parameters bound the transactions by `created_at`, which lets the
+    database scan only the monthly partitions of the range. The transactions are ordered by creation date in
+    descending order.
+
+    Args:
+        **filters: Column values the transactions must have, e.g. `user_id` or `budget_id`.
+
+    Returns:
+        list[Transaction | ArchivedTransaction]: The matching transactions.
+
+    Raises:
+        ValidationError: If the query parameters are invalid.
+    """
+    validated_data = TransactionRangeSchema(**request.args.to_dict())
+    return query_transactions(validated_data.start, validated_data.end, **filters)
+
+
 @transactions.route('/', methods=('POST',))
 @logged_in_required
+@idempotent
 def create_transaction() -> tuple[Response, int]:
     """Create a new transaction for the authenticated user.
 
     This endpoint creates a new transaction associated with a specific budget and category.
+    A retried request with the same `Idempotency-Key` header returns the response of the first one.
 
     Provided data should be in JSON format with the following fields:
         - amount (float): The amount of the transaction in the range of 0 to 1,000,000.
@@ -32,6 +68,12 @@ def create_transaction() -> tuple[Response, int]:
         - created_at (datetime, optional): The date and time of the transaction. Defaults to the current time.
         - type (str): The type of transaction, either 'income' or 'expense'.
 
+    Query parameters:
+        - on_duplicate (str, optional): What to do when the user already has a transaction with the same budget,
+          amount, day and description. 'allow' (default) creates the transaction and flags it with `duplicate_of`,
+          'skip' returns the existing transaction without creating a new one, 'reject' returns a 409 response.
+          A duplicate created with 'allow' has no fingerprint, see `claim_fingerprint`.
+
     Returns:
         tuple[Response, int]: A tuple containing the response object and the HTTP status code after processing the request.
     """
@@ -43,6 +85,13 @@ def create_transaction() -> tuple[Response, int]:
             message='Не надано даних для створення транзакції'
         )
 
+    on_duplicate = request.args.get('on_duplicate', 'allow')
+    if on_duplicate not in ('allow', 'skip', 'reject'):
+        return create_response(
+            status_code=400,
+            message='Неправильне значення параметра on_duplicate'
+        )
+
     try:
         validated_data = TransactionSchema(**data)
     except ValidationError as e:
@@ -92,10 +141,43 @@ def create_transaction() -> tuple[Response, int]:
             type=validated_data.type
         )
         db.session.add(transaction)
+        db.session.flush()
+
+        duplicate_of = claim_fingerprint(user_id, transaction)
+        if duplicate_of is not None and on_duplicate == 'reject':
+            db.session.rollback()
+            return create_response(
+                status_code=409,
+                message='Така транзакція вже існує',
+                details={'duplicate_of': duplicate_of}
+            )
+
+        if duplicate_of is not None and on_duplicate == 'skip':
+            existing = Transaction.query.filter_by(id=duplicate_of, user_id=user_id).first() or \
+                ArchivedTransaction.query.filter_by(id=duplicate_of, user_id=user_id).first()
+            if existing is not None:
+                result = {**existing.to_dict(), 'duplicate_of': duplicate_of}
+                db.session.rollback()
+                return create_response(
+                    status_code=200,
+                    message='Така транзакція вже існує, нову не створено',
+                    data=result
+                )
+            # The existing transaction was deleted meanwhile, so the new one is created in its place.
+            duplicate_of = claim_fingerprint(user_id, transaction)
+
         if validated_data.type == 'expense':
             budget.current -= Decimal(validated_data.amount)
         elif validated_data.type == 'income':
             budget.current += Decimal(validated_data.amount)
+        invalidate_balance_history(budget.id, validated_data.created_at)
+        invalidate_forecast(user_id, validated_data.created_at)
+        if validated_data.type == 'income':
+            invalidate_quarter_income(user_id, validated_data.created_at)
+        record_change(user_id, 'transaction', transaction.id)
+        record_change(user_id, 'budget', budget.id)
+        learn(user_id, category.id, transaction.description)
+        alert = observe_transaction(user_id, transaction)
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -105,10 +187,16 @@ def create_transaction() -> tuple[Response, int]:
             details=str(e)
         )
 
+    result = transaction.to_dict()
+    if duplicate_of is not None:
+        result['duplicate_of'] = duplicate_of
+    if alert is not None:
+        result['alert'] = alert.to_dict()
+
     return create_response(
         status_code=201,
         message='Транзакцію успішно створено',
-        data=transaction.to_dict()
+        data=result
     )
 
 
@@ -117,7 +205,8 @@ def create_transaction() -> tuple[Response, int]:
 def update_transaction(transaction_id: int) -> tuple[Response, int]:
     """Update an existing transaction for the authenticated user.
 
-    This endpoint updates a transaction associated with a specific budget and category.
+    This endpoint updates a transaction associated with a specific budget and category. An archived transaction is
+    moved back into the transaction table first.
 
     Provided data should be in JSON format with the following fields:
         - amount (float): The new amount of the transaction in the range of 0 to 1,000,000.
@@ -137,7 +226,8 @@ def update_transaction(transaction_id: int) -> tuple[Response, int]:
             message='Не надано даних для оновлення транзакції'
         )
 
-    transaction = Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+    transaction = (Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+                   or restore_transaction(user_id, transaction_id))
     if not transaction:
         return create_response(
             status_code=404,
@@ -163,6 +253,9 @@ def update_transaction(transaction_id: int) -> tuple[Response, int]:
 
     old_amount = transaction.amount
     old_type = transaction.type
+    old_created_at = transaction.created_at
+    old_category_id = transaction.category_id
+    old_description = transaction.description
     budget = transaction.budget
 
     try:
@@ -202,6 +295,24 @@ def update_transaction(transaction_id: int) -> tuple[Response, int]:
         if category_id:
             transaction.category_id = category_id
 
+        invalidate_balance_history(budget.id, min(old_created_at, transaction.created_at))
+        invalidate_forecast(user_id, min(old_created_at, transaction.created_at))
+        if 'income' in (old_type, transaction.type):
+            invalidate_quarter_income(user_id, min(old_created_at, transaction.created_at))
+        release_fingerprint(transaction.id)
+        db.session.flush()
+        claim_fingerprint(user_id, transaction)
+        record_change(user_id, 'transaction', transaction.id)
+        record_change(user_id, 'budget', budget.id)
+        if (old_category_id, old_description) != (transaction.category_id, transaction.description):
+            learn(user_id, old_category_id, old_description, -1)
+            learn(user_id, transaction.category_id, transaction.description)
+        if (old_category_id, old_amount, old_type, old_created_at) != (
+                transaction.category_id, transaction.amount, transaction.type, transaction.created_at):
+            old_transaction = SimpleNamespace(user_id=user_id, category_id=old_category_id, amount=old_amount,
+                                              type=old_type, created_at=old_created_at)
+            update_category_stats([old_transaction], -1)
+            update_category_stats([transaction])
         db.session.commit()
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -224,6 +335,7 @@ def delete_transaction(transaction_id: int) -> tuple[Response, int]:
     """Delete a transaction for the authenticated user.
 
     This endpoint deletes a transaction associated with a specific budget and category by its ID and updates the budget accordingly.
+    An archived transaction is moved back into the transaction table first.
 
     Args:
         transaction_id (int): The ID of the transaction to delete.
@@ -238,7 +350,8 @@ def delete_transaction(transaction_id: int) -> tuple[Response, int]:
             message='ID транзакції не надано'
         )
 
-    transaction = Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+    transaction = (Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+                   or restore_transaction(user_id, transaction_id))
     if not transaction:
         return create_response(
             status_code=404,
@@ -253,6 +366,15 @@ def delete_transaction(transaction_id: int) -> tuple[Response, int]:
         elif transaction.type == 'expense':
             budget.current += transaction.amount
 
+        invalidate_balance_history(budget.id, transaction.created_at)
+        invalidate_forecast(user_id, transaction.created_at)
+        if transaction.type == 'income':
+            invalidate_quarter_income(user_id, transaction.created_at)
+        release_fingerprint(transaction.id)
+        record_change(user_id, 'transaction', transaction.id, 'delete')
+        record_change(user_id, 'budget', budget.id)
+        learn(user_id, transaction.category_id, transaction.description, -1)
+        update_category_stats([transaction], -1)
         db.session.delete(transaction)
         db.session.commit()
     except SQLAlchemyError as e:
@@ -271,17 +393,30 @@ def delete_transaction(transaction_id: int) -> tuple[Response, int]:
 
 @transactions.route('/', methods=('GET',))
 @logged_in_required
+@query_budget(3)
+@admission_priority('heavy')
+@event_loop_view
 def get_transactions() -> tuple[Response, int]:
     """Retrieve all transactions for the authenticated user.
 
     This endpoint retrieves all transactions associated with the authenticated user, sorted by creation date in descending order.
 
+    Query parameters:
+        - from (date, optional): Only transactions created on or after this day are returned.
+        - to (date, optional): Only transactions created on or before this day are returned.
+
     Returns:
         tuple[Response, int]: A tuple containing the response object and the HTTP status code after processing the request.
     """
     user_id = get_jwt_identity()
-    transactions = Transaction.query.filter_by(user_id=user_id).all()
-    transactions.sort(key=lambda x: x.created_at, reverse=True)
+    try:
+        transactions = list_transactions(user_id=user_id)
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
 
     if not transactions:
         return create_response(
@@ -296,11 +431,64 @@ def get_transactions() -> tuple[Response, int]:
     )
 
 
+@transactions.route('/search', methods=('GET',))
+@logged_in_required
+@admission_priority('heavy')
+def search_transactions_by_description() -> tuple[Response, int]:
+    """Search transactions of the authenticated user by description.
+
+    This endpoint performs a full-text and fuzzy search over the descriptions of all transactions of the user,
+    including archived ones, and returns a page of results ranked by relevance.
+
+    Query parameters:
+        - q (str): The search text (1-100 characters).
+        - page (int, optional): The number of the page, starting from 1. Defaults to 1.
+        - per_page (int, optional): The number of results per page (1-100). Defaults to 20.
+
+    Returns:
+        tuple[Response, int]: A tuple containing the response object with the total number of matches and the
+        transactions of the page, each with its rank and the [start, end) offsets of the matching words.
+    """
+    user_id = get_jwt_identity()
+
+    try:
+        validated_data = TransactionSearchSchema(**request.args.to_dict())
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
+
+    try:
+        total, results = search_transactions(user_id, validated_data.q, validated_data.page, validated_data.per_page)
+    except SQLAlchemyError as e:
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    return create_response(
+        status_code=200,
+        message='Пошук транзакцій успішно виконано',
+        data={
+            'total': total,
+            'page': validated_data.page,
+            'per_page': validated_data.per_page,
+            'results': results
+        }
+    )
+
+
 @transactions.route('/<int:transaction_id>', methods=('GET',))
 @logged_in_required
+@admission_priority('critical')
 def get_transaction(transaction_id):  # get a specific transaction by ID of the user
     user_id = get_jwt_identity()
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+    if not transaction:
+        transaction = ArchivedTransaction.query.filter_by(id=transaction_id, user_id=user_id).first()
 
     if not transaction:
         return create_response(
@@ -317,11 +505,16 @@ def get_transaction(transaction_id):  # get a specific transaction by ID of the
 
 @transactions.route('/incomes/<int:budget_id>', methods=('GET',))
 @logged_in_required
+@admission_priority('heavy')
 def get_incomes_by_budget(budget_id: int) -> tuple[Response, int]:
     """Retrieve all income transactions for a specific budget of the authenticated user.
 
     This endpoint retrieves all income transactions associated with a specific budget, sorted by creation date in descending order.
 
+    Query parameters:
+        - from (date, optional): Only transactions created on or after this day are returned.
+        - to (date, optional): Only transactions created on or before this day are returned.
+
     Args:
         budget_id (int): The ID of the budget for which to retrieve income transactions.
 
@@ -329,8 +522,14 @@ def get_incomes_by_budget(budget_id: int) -> tuple[Response, int]:
         tuple[Response, int]: A tuple containing the response object and the HTTP status code after processing the request.
     """
     user_id = get_jwt_identity()
-    transactions = Transaction.query.filter_by(user_id=user_id, budget_id=budget_id, type='income').all()
-    transactions.sort(key=lambda x: x.created_at, reverse=True)
+    try:
+        transactions = list_transactions(user_id=user_id, budget_id=budget_id, type='income')
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
 
     if not transactions:
         return create_response(
@@ -351,11 +550,16 @@ def get_incomes_by_budget(budget_id: int) -> tuple[Response, int]:
 
 @transactions.route('/expenses/<int:budget_id>', methods=('GET',))
 @logged_in_required
+@admission_priority('heavy')
 def get_expenses_by_budget(budget_id: int) -> tuple[Response, int]:
     """Retrieve all expense transactions for a specific budget of the authenticated user.
 
     This endpoint retrieves all expense transactions associated with a specific budget, sorted by creation date in descending order.
 
+    Query parameters:
+        - from (date, optional): Only transactions created on or after this day are returned.
+        - to (date, optional): Only transactions created on or before this day are returned.
+
     Args:
         budget_id (int): The ID of the budget for which to retrieve expense transactions.
 
@@ -363,8 +567,14 @@ def get_expenses_by_budget(budget_id: int) -> tuple[Response, int]:
         tuple[Response, int]: A tuple containing the response object and the HTTP status code after processing the request.
     """
     user_id = get_jwt_identity()
-    transactions = Transaction.query.filter_by(user_id=user_id, budget_id=budget_id, type='expense').all()
-    transactions.sort(key=lambda x: x.created_at, reverse=True)
+    try:
+        transactions = list_transactions(user_id=user_id, budget_id=budget_id, type='expense')
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
 
     if not transactions:
         return create_response(
@@ -385,11 +595,16 @@ def get_expenses_by_budget(budget_id: int) -> tuple[Response, int]:
 
 @transactions.route('/category/<int:category_id>', methods=('GET',))
 @logged_in_required
+@admission_priority('heavy')
 def get_transactions_by_category(category_id: int) -> tuple[Response, int]:
     """Retrieve all transactions for a specific category of the authenticated user.
 
     This endpoint retrieves all transactions associated with a specific category, sorted by creation date in descending order.
 
+    Query parameters:
+        - from (date, optional): Only transactions created on or after this day are returned.
+        - to (date, optional): Only transactions created on or before this day are returned.
+
     Args:
         category_id (int): The ID of the category for which to retrieve transactions.
 
@@ -398,8 +613,14 @@ def get_transactions_by_category(category_id: int) -> tuple[Response, int]:
 
     """
     user_id = get_jwt_identity()
-    transactions = Transaction.query.filter_by(user_id=user_id, category_id=category_id).all()
-    transactions.sort(key=lambda x: x.created_at, reverse=True)
+    try:
+        transactions = list_transactions(user_id=user_id, category_id=category_id)
+    except ValidationError as e:
+        return create_response(
+            status_code=400,
+            message='Неправильні вхідні дані',
+            details=e.errors()
+        )
 
     if not transactions:
         return create_response(
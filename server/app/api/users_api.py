@@ -7,6 +7,8 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.user_model import User
 from app.schemas.user_schemas import UserUpdateSchema
+from app.services.deletion import schedule_deletion
+from app.utils.admission import admission_priority
 from app.utils.decorators import logged_in_required
 from app.utils.extensions import db
 from app.utils.responses import create_response
@@ -17,6 +19,7 @@ users = Blueprint('users', __name__)
 
 @users.route('/me', methods=('GET',))
 @logged_in_required
+@admission_priority('critical')
 def get_current_user() -> tuple[Response, int] | Response:
     """Retrieve the current user's information.
 
@@ -92,7 +95,7 @@ def update_current_user() -> tuple[Response, int]:
     existing_user = User.query.filter(
         ((User.email == validated_data.email) | (User.username == validated_data.username)),
         User.id != user_id
-    ).first()
+    ).execution_options(include_deleted=True).first()
     if existing_user:
         if existing_user.email == validated_data.email:
             return create_response(
@@ -135,3 +138,37 @@ def update_current_user() -> tuple[Response, int]:
         message='Користувач успішно оновлений',
         data=user.to_dict()
     )
+
+
+@users.route('/', methods=('DELETE',))
+@logged_in_required
+def delete_current_user() -> tuple[Response, int] | Response:
+    """Delete the current user's account with all of their data.
+
+    The user is hidden and logged out at once, while their budgets, categories and transactions are deleted in
+    the background.
+
+    Returns:
+        Response: A response object containing the deletion job or an error message.
+    """
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+
+    try:
+        job = schedule_deletion('user', user)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return create_response(
+            status_code=500,
+            message='Помилка бази даних',
+            details=str(e)
+        )
+
+    response = make_response(create_response(
+        status_code=202,
+        message='Користувача успішно видалено',
+        data=job.to_dict()
+    ))
+    unset_jwt_cookies(response)
+    return response
@@ -0,0 +1,185 @@
+"""ASGI application serving I/O-bound views on an event loop and all other views through Flask.
+
+Views marked with `event_loop_view` (listings and analytics) only wait for the database, so they run on the event
+loop with a session of the asynchronous engine, and a worker serves thousands of concurrent requests while they
+wait. They are the Flask views themselves, dispatched like `Flask.wsgi_app` does: in a request context of the
+Flask application, with its hooks (admission control, timings, metrics, the query observer and CORS) and error
+handlers. Only the view runs in `AsyncSession.run_sync`, with `db.session` bound to the session, so its queries
+are awaited on the event loop instead of blocking it. All other requests are passed to the Flask application,
+which runs in a thread pool of `SERVER_THREADS` threads, so the synchronous code path keeps working as under WSGI.
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from flask import Flask, Response, request, request_started
+from werkzeug.exceptions import HTTPException
+
+from app.utils.extensions import async_db, db
+
+
+async def _read_body(receive) -> bytes:
+    """Reads the whole body of an HTTP request."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+def _wsgi_environ(scope: dict, body: bytes) -> dict:
+    """Builds the WSGI environment of an ASGI HTTP request."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    # The body is read whole, so its length is known also for chunked requests without a Content-Length header.
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def _run_wsgi(application: Callable, environ: dict) -> tuple[int, list, bytes]:
+    """Runs a WSGI application, e.g. the Flask application or a response, and returns its whole response."""
+    started = {}
+
+    def start_response(status: str, headers: list, exc_info=None) -> Callable:
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+        return lambda data: None
+
+    iterable = application(environ, start_response)
+    try:
+        content = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return started['status'], started['headers'], content
+
+
+class AsgiApplication:
+    """ASGI application running the views marked with `event_loop_view` on the event loop and the rest in threads."""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=app.config['SERVER_THREADS'], thread_name_prefix='wsgi')
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        environ = _wsgi_environ(scope, await _read_body(receive))
+        if async_db.session is not None and self._on_event_loop(environ):
+            status_code, headers, content = await self._call_view(environ)
+        else:
+            status_code, headers, content = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _run_wsgi, self.app, environ
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _lifespan(self, receive, send) -> None:
+        """Creates the asynchronous engine on startup and disposes it on shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                async_db.init_app(self.app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _on_event_loop(self, environ: dict) -> bool:
+        """Returns whether the view of a request is marked with `event_loop_view`.
+
+        Requests not matching a rule, e.g. redirects to the URL with a trailing slash, are left to Flask.
+        """
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False
+        return getattr(self.app.view_functions.get(endpoint), 'event_loop', False)
+
+    async def _call_view(self, environ: dict) -> tuple[int, list, bytes]:
+        """Handles a request like `Flask.wsgi_app`, awaiting the view instead of calling it."""
+        context = self.app.request_context(environ)
+        error = None
+        try:
+            try:
+                context.push()
+                response = await self._full_dispatch_request()
+            except Exception as e:
+                error = e
+                response = self.app.handle_exception(e)
+            return _run_wsgi(response, environ)
+        finally:
+            context.pop(error)
+
+    async def _full_dispatch_request(self) -> Response:
+        """Runs the hooks and error handlers of the application around the view, see `Flask.full_dispatch_request`."""
+        try:
+            request_started.send(self.app, _async_wrapper=self.app.ensure_sync)
+            rv = self.app.preprocess_request()
+            if rv is None:
+                rv = await self._dispatch_request()
+        except Exception as e:
+            rv = self.app.handle_user_exception(e)
+        return self.app.finalize_request(rv)
+
+    async def _dispatch_request(self):
+        """Runs the view with `db.session` bound to a session of the async engine, see `Flask.dispatch_request`."""
+        if request.routing_exception is not None:
+            self.app.raise_routing_exception(request)
+        if getattr(request.url_rule, 'provide_automatic_options', False) and request.method == 'OPTIONS':
+            return self.app.make_default_options_response()
+
+        view = self.app.view_functions[request.url_rule.endpoint]
+        async with async_db.session() as session:
+            db.session.registry.set(session.sync_session)
+            try:
+                return await session.run_sync(lambda _: view(**request.view_args))
+            finally:
+                db.session.registry.clear()
+
+
+def create_asgi_app(app: Flask) -> AsgiApplication:
+    """Creates the ASGI application of a Flask application.
+
+    Args:
+        app (Flask): The application created by `create_app`.
+
+    Returns:
+        AsgiApplication: The ASGI application.
+    """
+    return AsgiApplication(app)
@@ -0,0 +1,158 @@
+"""Contains Flask CLI commands for maintenance jobs of the application.
+
+The commands are meant to be run by a scheduler (e.g. cron) with `flask --app main <command>`, `run-recurring --loop`
+can also run as a long-lived worker. `upgrade-schema` is run once on every deployment, before the new version serves
+requests.
+"""
+
+import datetime
+import time
+
+import click
+from flask import Flask, current_app
+
+from app.models.user_model import User
+from app.services.anomalies import check_budgets, rebuild_category_stats
+from app.services.archive import archive_transactions
+from app.services.categorizer import train_user
+from app.services.deduplication import backfill_fingerprints, purge_idempotency_keys
+from app.services.deletion import run_deletion_jobs
+from app.services.partitions import ensure_transaction_partitions, migrate_transaction_table, month_start, add_months
+from app.services.recurring import materialize_due_occurrences
+from app.services.schema import upgrade_schema
+from app.services.search import create_search_indexes
+
+
+@click.command('upgrade-schema')
+def upgrade_schema_command() -> None:
+    """Create the types, tables, columns and indexes of the models that are missing in the database."""
+    try:
+        changes = upgrade_schema()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    for change in changes:
+        click.echo(change.capitalize())
+    click.echo(f'Schema is up to date, made {len(changes)} change(s)')
+
+
+@click.command('ensure-partitions')
+@click.option('--months-ahead', type=int, default=None,
+              help='Number of months ahead to create partitions for, defaults to TRANSACTION_PARTITIONS_AHEAD.')
+def ensure_partitions_command(months_ahead: int | None) -> None:
+    """Create upcoming monthly partitions of the transaction table and split the default partition."""
+    if months_ahead is None:
+        months_ahead = current_app.config['TRANSACTION_PARTITIONS_AHEAD']
+    created = ensure_transaction_partitions(months_ahead)
+    click.echo(f'Created {len(created)} partition(s): {", ".join(created) or "-"}')
+
+
+@click.command('migrate-partitions')
+def migrate_partitions_command() -> None:
+    """Convert a plain transaction table into a partitioned one and create its monthly partitions."""
+    migrate_transaction_table()
+    created = ensure_transaction_partitions(current_app.config['TRANSACTION_PARTITIONS_AHEAD'])
+    click.echo(f'Transaction table is partitioned, created {len(created)} partition(s)')
+
+
+@click.command('archive-transactions')
+@click.option('--months', type=int, default=None,
+              help='Archive transactions older than this many whole months, defaults to TRANSACTION_ARCHIVE_MONTHS.')
+def archive_transactions_command(months: int | None) -> None:
+    """Move transactions older than the archive horizon into the archive table."""
+    if months is None:
+        months = current_app.config['TRANSACTION_ARCHIVE_MONTHS']
+    cutoff = add_months(month_start(datetime.date.today()), -months)
+    archived = archive_transactions(cutoff, current_app.config['TRANSACTION_ARCHIVE_BATCH_SIZE'])
+    click.echo(f'Archived {archived} transaction(s) created before {cutoff.isoformat()}')
+
+
+@click.command('create-search-indexes')
+def create_search_indexes_command() -> None:
+    """Create the pg_trgm extension and the description search indexes of the transaction table."""
+    create_search_indexes()
+    click.echo('Search indexes are created')
+
+
+@click.command('train-categorizer')
+@click.option('--user-id', type=int, default=None, help='Train only the classifier of this user.')
+def train_categorizer_command(user_id: int | None) -> None:
+    """Rebuild the category classifiers of users from their transactions."""
+    user_ids = [user_id] if user_id is not None else [user.id for user in User.query.with_entities(User.id)]
+    for current_user_id in user_ids:
+        trained = train_user(current_user_id)
+        click.echo(f'User {current_user_id}: trained on {trained} transaction(s)')
+
+
+@click.command('backfill-fingerprints')
+@click.option('--batch-size', type=int, default=5000, help='Number of transactions fingerprinted per batch.')
+def backfill_fingerprints_command(batch_size: int) -> None:
+    """Compute duplicate-detection fingerprints of transactions created before they were introduced."""
+    backfilled = backfill_fingerprints(batch_size)
+    click.echo(f'Fingerprinted {backfilled} transaction(s)')
+
+
+@click.command('purge-idempotency-keys')
+def purge_idempotency_keys_command() -> None:
+    """Delete idempotency keys older than IDEMPOTENCY_KEY_TTL."""
+    purged = purge_idempotency_keys(current_app.config['IDEMPOTENCY_KEY_TTL'])
+    click.echo(f'Purged {purged} idempotency key(s)')
+
+
+@click.command('run-recurring')
+@click.option('--loop', is_flag=True, help='Keep running, every RECURRING_SCHEDULER_INTERVAL seconds.')
+def run_recurring_command(loop: bool) -> None:
+    """Create the transactions of all due occurrences of recurring rules."""
+    while True:
+        created = materialize_due_occurrences(current_app.config['RECURRING_BATCH_SIZE'],
+                                              current_app.config['RECURRING_MAX_CATCH_UP'])
+        click.echo(f'Created {created} recurring transaction(s)')
+        if not loop:
+            return
+        time.sleep(current_app.config['RECURRING_SCHEDULER_INTERVAL'])
+
+
+@click.command('run-deletions')
+@click.option('--loop', is_flag=True, help='Keep running, polling for new jobs every DELETION_POLL_INTERVAL seconds.')
+def run_deletions_command(loop: bool) -> None:
+    """Delete hidden budgets, categories and users with their dependent rows in batches."""
+    while True:
+        finished = run_deletion_jobs(current_app.config['DELETION_BATCH_SIZE'],
+                                     current_app.config['DELETION_BATCH_PAUSE'])
+        click.echo(f'Finished {finished} deletion job(s)')
+        if not loop:
+            return
+        time.sleep(current_app.config['DELETION_POLL_INTERVAL'])
+
+
+@click.command('check-budgets')
+def check_budgets_command() -> None:
+    """Flag budgets that will miss their goal at the pace of the last BUDGET_PACE_DAYS days."""
+    flagged = check_budgets(current_app.config['BUDGET_PACE_DAYS'])
+    click.echo(f'{flagged} budget(s) are off track')
+
+
+@click.command('rebuild-category-stats')
+def rebuild_category_stats_command() -> None:
+    """Recompute the running statistics of transaction amounts of all categories."""
+    rebuilt = rebuild_category_stats()
+    click.echo(f'Rebuilt statistics of {rebuilt} category(ies)')
+
+
+def register_commands(app: Flask) -> None:
+    """Registers the CLI commands of the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.cli.add_command(upgrade_schema_command)
+    app.cli.add_command(ensure_partitions_command)
+    app.cli.add_command(migrate_partitions_command)
+    app.cli.add_command(archive_transactions_command)
+    app.cli.add_command(create_search_indexes_command)
+    app.cli.add_command(train_categorizer_command)
+    app.cli.add_command(backfill_fingerprints_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(run_recurring_command)
+    app.cli.add_command(run_deletions_command)
+    app.cli.add_command(check_budgets_command)
+    app.cli.add_command(rebuild_category_stats_command)
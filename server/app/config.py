@@ -22,12 +22,72 @@ class Config:
     FLASK_DEBUG = os.getenv('FLASK_DEBUG', '0') == '1'
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
 
+    SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+    SERVER_BIND = os.getenv('SERVER_BIND', '0.0.0.0:8000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(2 * (os.cpu_count() or 1) + 1)))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '4'))
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '30'))
+    SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '1000'))
+    SERVER_MAX_REQUESTS_JITTER = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', '100'))
+
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-    }
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '300'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'stale')
+    DB_POOL_PRE_PING_IDLE = int(os.getenv('DB_POOL_PRE_PING_IDLE', '30'))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '500'))
+    DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv('DB_PREPARED_STATEMENT_CACHE_SIZE', '100'))
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0') == '1'
+
+    ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', '1') == '1'
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '64'))
+    ADMISSION_HEAVY_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_HEAVY_MAX_IN_FLIGHT', '8'))
+    ADMISSION_POOL_WAIT_MS = float(os.getenv('ADMISSION_POOL_WAIT_MS', '500'))
+    ADMISSION_HEAVY_POOL_WAIT_MS = float(os.getenv('ADMISSION_HEAVY_POOL_WAIT_MS', '100'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
+
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', '0') == '1'
+
+    QUERY_OBSERVER_ENABLED = os.getenv('QUERY_OBSERVER_ENABLED', '1') == '1'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1'
+    SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300'))
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', '10'))
+    QUERY_FINGERPRINTS_MAX = int(os.getenv('QUERY_FINGERPRINTS_MAX', '1000'))
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASYNC_POOL_SIZE = int(os.getenv('ASYNC_POOL_SIZE', '20'))
+    ASYNC_MAX_OVERFLOW = int(os.getenv('ASYNC_MAX_OVERFLOW', '10'))
+    TRANSACTION_PARTITIONS_AHEAD = int(os.getenv('TRANSACTION_PARTITIONS_AHEAD', '3'))
+    TRANSACTION_ARCHIVE_MONTHS = int(os.getenv('TRANSACTION_ARCHIVE_MONTHS', '24'))
+    TRANSACTION_ARCHIVE_BATCH_SIZE = int(os.getenv('TRANSACTION_ARCHIVE_BATCH_SIZE', '10000'))
+
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+
+    RECURRING_BATCH_SIZE = int(os.getenv('RECURRING_BATCH_SIZE', '5000'))
+    RECURRING_MAX_CATCH_UP = int(os.getenv('RECURRING_MAX_CATCH_UP', '100'))
+    RECURRING_SCHEDULER_INTERVAL = int(os.getenv('RECURRING_SCHEDULER_INTERVAL', '60'))
+
+    DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', '5000'))
+    DELETION_BATCH_PAUSE = float(os.getenv('DELETION_BATCH_PAUSE', '0.1'))
+    DELETION_POLL_INTERVAL = int(os.getenv('DELETION_POLL_INTERVAL', '10'))
+
+    ANOMALY_Z_THRESHOLD = float(os.getenv('ANOMALY_Z_THRESHOLD', '3'))
+    ANOMALY_MIN_MONTHS = int(os.getenv('ANOMALY_MIN_MONTHS', '6'))
+    BUDGET_PACE_DAYS = int(os.getenv('BUDGET_PACE_DAYS', '30'))
+
+    FOP_MIN_WAGE = float(os.getenv('FOP_MIN_WAGE', '8000'))
+    FOP_ESC_RATE = float(os.getenv('FOP_ESC_RATE', '22'))
+    FOP_INCOME_LIMIT_WAGES = int(os.getenv('FOP_INCOME_LIMIT_WAGES', '1167'))
+    FOP_OVER_LIMIT_RATE = float(os.getenv('FOP_OVER_LIMIT_RATE', '15'))
+
+    FORECAST_HISTORY_MONTHS = int(os.getenv('FORECAST_HISTORY_MONTHS', '36'))
 
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', '3600'))
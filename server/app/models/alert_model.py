@@ -0,0 +1,54 @@
+"""Represents db.Model for the alert table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, Numeric, Index, func, text)
+
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class Alert(db.Model):
+    """Represents the alert table holding warnings shown to users.
+
+    An 'anomaly' alert marks the expense transaction that made the monthly expenses of its category unusually
+    high, `value` is the z-score of the monthly total and `expected` the mean monthly total of the category.
+    A 'budget_off_track' alert marks a budget that will miss its goal at the current pace, `value` is the
+    expected shortfall and `expected` the required daily plan.
+    Budget alerts are refreshed by the `check-budgets` job, so there is at most one per budget.
+    """
+    __tablename__ = 'alert'
+    __table_args__ = (
+        CheckConstraint("kind IN ('anomaly', 'budget_off_track')", name="alert_kind_check"),
+        Index('alert_user_id_created_at_idx', 'user_id', 'created_at'),
+        Index('alert_budget_id_kind_idx', 'budget_id', 'kind', unique=True,
+              postgresql_where=text("kind = 'budget_off_track'"),
+              sqlite_where=text("kind = 'budget_off_track'")),
+        {'schema': 'public'}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     nullable=False)
+    kind = Column(Text, nullable=False)
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       nullable=True)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE", ondelete="CASCADE"),
+                         nullable=True)
+    transaction_id = Column(BigInteger, nullable=True)
+    value = Column(Numeric(14, 2), nullable=False)
+    expected = Column(Numeric(14, 2), nullable=False)
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the Alert instance to a dictionary representation."""
+        result = {
+            'id': self.id,
+            'kind': self.kind,
+            'value': float(self.value),
+            'expected': float(self.expected),
+            'created_at': self.created_at.isoformat()
+        }
+        for key in ('budget_id', 'category_id', 'transaction_id'):
+            if getattr(self, key) is not None:
+                result[key] = getattr(self, key)
+        return result
@@ -0,0 +1,48 @@
+"""Represents db.Model for the transaction_archive table."""
+
+from sqlalchemy import (Numeric, Column, BigInteger, ForeignKey, Text, DateTime, Index)
+
+from app.models.transaction_model import transaction_type_enum
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class ArchivedTransaction(db.Model):
+    """Represents the transaction_archive table holding transactions older than the archive horizon.
+
+    The table has the same columns as the transaction table but only one index, so the indexes of the hot
+    table stay bounded to recent history. Archived transactions are moved back into the transaction table before
+    they are updated or deleted, see `app.services.archive.restore_transaction`.
+    """
+    __tablename__ = 'transaction_archive'
+    __table_args__ = (
+        Index('transaction_archive_user_id_created_at_idx', 'user_id', 'created_at'),
+        {'schema': 'public'}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     nullable=False)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE"),
+                         nullable=False)
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    description = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=False), nullable=False)
+    type = Column(transaction_type_enum, nullable=False)
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the ArchivedTransaction instance to a dictionary representation."""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'budget_id': self.budget_id,
+            'amount': float(self.amount) if self.amount is not None else None,
+            'description': self.description,
+            'created_at': self.created_at.isoformat(),
+            'type': self.type,
+            'archived': True
+        }
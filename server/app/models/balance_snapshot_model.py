@@ -0,0 +1,31 @@
+"""Represents db.Model for the balance_snapshot table."""
+
+from sqlalchemy import (Numeric, Column, BigInteger, ForeignKey, Date)
+
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class BalanceSnapshot(db.Model):
+    """Represents the balance_snapshot table that caches end-of-day balances of budgets for closed days.
+
+    Rows are only stored for days before today and are removed whenever a transaction dated on or
+    before the cached day is created, changed or deleted.
+    """
+    __tablename__ = 'balance_snapshot'
+    __table_args__ = (
+        {'schema': 'public'},
+    )
+
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       primary_key=True)
+    day = Column(Date, primary_key=True)
+    balance = Column(Numeric(14, 2), nullable=False)
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the BalanceSnapshot instance to a dictionary representation."""
+        return {
+            'date': self.day.isoformat(),
+            'balance': float(self.balance)
+        }
@@ -1,12 +1,16 @@
 """Represents db.Model for the budget table."""
 
-from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, Date, text)
+from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, Date, DateTime, text)
 from sqlalchemy.orm import relationship
 from app.utils.extensions import db
+from app.utils.timing import timed
 
 
 class Budget(db.Model):
-    """Represents the budget table in the database with all constraints and relationships."""
+    """Represents the budget table in the database with all constraints and relationships.
+
+    A budget with `deleted_at` set is being deleted in the background and is hidden from ORM queries.
+    """
     __tablename__ = 'budget'
     __table_args__ = (
         CheckConstraint("char_length(name) > 2 AND char_length(name) <= 30",
@@ -35,9 +39,11 @@ class Budget(db.Model):
     goal = Column(Numeric(12, 2), nullable=True)
     created_at = Column(Date, nullable=False, server_default=text('CURRENT_DATE'))
     end_at = Column(Date, nullable=True)
+    deleted_at = Column(DateTime(timezone=False), nullable=True)
 
     user = relationship('User', backref='budgets', )
 
+    @timed('serialize')
     def to_dict(self):
         """Converts the Budget instance to a dictionary representation."""
         result = {
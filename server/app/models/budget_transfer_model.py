@@ -0,0 +1,71 @@
+"""Represents db.Model for the budget_transfer and budget_ledger_entry tables."""
+
+from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, Index, func)
+
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class BudgetTransfer(db.Model):
+    """Represents the budget_transfer table holding transfers of money between two budgets of a user.
+
+    A transfer is not an income or an expense, so it is not stored as transactions. Its debit and credit are
+    stored as two linked entries of the budget ledger.
+    """
+    __tablename__ = 'budget_transfer'
+    __table_args__ = (
+        CheckConstraint(
+            "description IS NULL OR (char_length(description) > 2 AND char_length(description) <= 200)",
+            name="budget_transfer_description_length_check"
+        ),
+        Index('budget_transfer_user_id_created_at_idx', 'user_id', 'created_at'),
+        {'schema': 'public'}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     nullable=False)
+    description = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+
+    entries = db.relationship('BudgetLedgerEntry', backref='transfer', order_by='BudgetLedgerEntry.amount',
+                              cascade='all, delete-orphan', passive_deletes=True)
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the BudgetTransfer instance to a dictionary representation."""
+        result = {
+            'id': self.id,
+            'user_id': self.user_id,
+            'description': self.description,
+            'created_at': self.created_at.isoformat()
+        }
+        for entry in self.entries:
+            if entry.amount < 0:
+                result['from_budget_id'] = entry.budget_id
+                result['amount'] = float(-entry.amount)
+            else:
+                result['to_budget_id'] = entry.budget_id
+                result['amount'] = float(entry.amount)
+        return result
+
+
+class BudgetLedgerEntry(db.Model):
+    """Represents the budget_ledger_entry table holding the signed changes of budgets made by transfers.
+
+    Every transfer has a negative entry of the debited budget and a positive entry of the credited one.
+    """
+    __tablename__ = 'budget_ledger_entry'
+    __table_args__ = (
+        CheckConstraint("amount <> 0 AND amount >= -1000000 AND amount <= 1000000",
+                        name="budget_ledger_entry_amount_check"),
+        Index('budget_ledger_entry_budget_id_created_at_idx', 'budget_id', 'created_at'),
+        {'schema': 'public'}
+    )
+
+    transfer_id = Column(BigInteger, ForeignKey('public.budget_transfer.id', onupdate="CASCADE", ondelete="CASCADE"),
+                         primary_key=True)
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       primary_key=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
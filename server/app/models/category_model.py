@@ -1,15 +1,19 @@
 """Represents db.Model for the category table."""
 
-from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Text)
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime)
 from sqlalchemy.orm import relationship
 from app.utils.extensions import db
+from app.utils.timing import timed
+from app.utils.types import enum_type
 
-category_type_enum = ENUM('incomes', 'expenses', name='category_type', create_type=False)
+category_type_enum = enum_type('incomes', 'expenses', name='category_type')
 """Category type enum for categorizing categories as incomes or expenses."""
 
 class Category(db.Model):
-    """Represents the category table in the database with all constraints and relationships."""
+    """Represents the category table in the database with all constraints and relationships.
+
+    A category with `deleted_at` set is being deleted in the background and is hidden from ORM queries.
+    """
     __tablename__ = 'category'
     __table_args__ = (
         CheckConstraint("char_length(name) > 2 AND char_length(name) <= 20",
@@ -25,9 +29,11 @@ class Category(db.Model):
     name = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
     type = Column(category_type_enum, nullable=False)
+    deleted_at = Column(DateTime(timezone=False), nullable=True)
 
     user = relationship('User', backref='categories')
 
+    @timed('serialize')
     def to_dict(self):
         """Converts the Category instance to a dictionary representation."""
         return {
@@ -0,0 +1,24 @@
+"""Represents db.Model for the category_month table."""
+
+from sqlalchemy import (Numeric, Column, BigInteger, ForeignKey, Date)
+
+from app.utils.extensions import db
+
+
+class CategoryMonth(db.Model):
+    """Represents the category_month table holding the total expenses of every category per month.
+
+    `month` is the first day of the month. The totals are the samples of the running statistics of
+    `category_stats`, a month with a zero total is not a sample.
+    """
+    __tablename__ = 'category_month'
+    __table_args__ = (
+        {'schema': 'public'},
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE", ondelete="CASCADE"),
+                         primary_key=True)
+    month = Column(Date, primary_key=True)
+    total = Column(Numeric(14, 2), nullable=False)
@@ -0,0 +1,24 @@
+"""Represents db.Model for the category_stats table."""
+
+from sqlalchemy import (Column, BigInteger, ForeignKey, Float)
+
+from app.utils.extensions import db
+
+
+class CategoryStats(db.Model):
+    """Represents the category_stats table holding running statistics of the monthly expenses per category.
+
+    The statistics are maintained incrementally with Welford's algorithm over the monthly totals of
+    `category_month`: `count` is the number of months, `mean` their mean total and `m2` the sum of squared
+    deviations from the mean, so the variance is `m2 / count`.
+    """
+    __tablename__ = 'category_stats'
+    __table_args__ = {'schema': 'public'}
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE", ondelete="CASCADE"),
+                         primary_key=True)
+    count = Column(BigInteger, nullable=False)
+    mean = Column(Float, nullable=False)
+    m2 = Column(Float, nullable=False)
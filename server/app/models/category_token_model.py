@@ -0,0 +1,27 @@
+"""Represents db.Model for the category_token table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Integer, Text)
+
+from app.utils.extensions import db
+
+
+class CategoryToken(db.Model):
+    """Represents the category_token table counting words of transaction descriptions per category of a user.
+
+    The counts are the training data of the per-user naive Bayes classifier suggesting categories for new
+    transactions. They are updated on every transaction write. `version` is incremented by every update of a row,
+    so the sum of the versions of a user changes with every write and tells whether a cached model is current.
+    """
+    __tablename__ = 'category_token'
+    __table_args__ = (
+        CheckConstraint('count >= 0', name='category_token_count_check'),
+        {'schema': 'public'}
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE", ondelete="CASCADE"),
+                         primary_key=True)
+    token = Column(Text, primary_key=True)
+    count = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False, server_default='1')
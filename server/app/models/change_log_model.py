@@ -0,0 +1,40 @@
+"""Represents db.Model for the change_log table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, Index, func)
+
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class ChangeLog(db.Model):
+    """Represents the change_log table that keeps the latest change of every synchronized record of a user.
+
+    Each row is overwritten on every change of its record, so the table holds one row per record and the
+    deleted records are kept as tombstones.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        CheckConstraint("entity IN ('transaction', 'budget', 'category')", name="change_log_entity_check"),
+        CheckConstraint("operation IN ('upsert', 'delete')", name="change_log_operation_check"),
+        Index('change_log_user_id_seq_idx', 'user_id', 'seq'),
+        {'schema': 'public'}
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    entity = Column(Text, primary_key=True)
+    entity_id = Column(BigInteger, primary_key=True)
+    seq = Column(BigInteger, nullable=False)
+    operation = Column(Text, nullable=False)
+    changed_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the ChangeLog instance to a dictionary representation."""
+        return {
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'seq': self.seq,
+            'operation': self.operation,
+            'changed_at': self.changed_at.isoformat()
+        }
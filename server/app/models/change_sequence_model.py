@@ -0,0 +1,22 @@
+"""Represents db.Model for the change_sequence table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey)
+
+from app.utils.extensions import db
+
+
+class ChangeSequence(db.Model):
+    """Represents the change_sequence table that holds the last change sequence number of every user.
+
+    The row of a user is locked by the statement that increments it, so changes of one user are committed
+    in the order of their sequence numbers.
+    """
+    __tablename__ = 'change_sequence'
+    __table_args__ = (
+        CheckConstraint('last_seq > 0', name='change_sequence_last_seq_check'),
+        {'schema': 'public'}
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    last_seq = Column(BigInteger, nullable=False)
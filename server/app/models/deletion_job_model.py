@@ -0,0 +1,53 @@
+"""Represents db.Model for the deletion_job table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, Text, DateTime, Index, func, text)
+
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class DeletionJob(db.Model):
+    """Represents the deletion_job table holding background deletions of budgets, categories and users.
+
+    The deleted record is hidden at once, while its dependent rows are deleted by the `run-deletions` worker in
+    bounded batches. `total_rows` is the number of dependent rows counted when the job starts and
+    `deleted_rows` the number deleted so far. The user ID is not a foreign key, so jobs deleting a user are kept.
+    """
+    __tablename__ = 'deletion_job'
+    __table_args__ = (
+        CheckConstraint("entity IN ('budget', 'category', 'user')", name="deletion_job_entity_check"),
+        CheckConstraint("status IN ('pending', 'running', 'done')", name="deletion_job_status_check"),
+        Index('deletion_job_entity_entity_id_idx', 'entity', 'entity_id', unique=True),
+        Index('deletion_job_user_id_idx', 'user_id'),
+        Index('deletion_job_status_idx', 'status', postgresql_where=text("status <> 'done'"),
+              sqlite_where=text("status <> 'done'")),
+        {'schema': 'public'}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, nullable=False)
+    entity = Column(Text, nullable=False)
+    entity_id = Column(BigInteger, nullable=False)
+    status = Column(Text, nullable=False, server_default=text("'pending'"))
+    total_rows = Column(BigInteger, nullable=True)
+    deleted_rows = Column(BigInteger, nullable=False, server_default=text('0'))
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=False), nullable=True)
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the DeletionJob instance to a dictionary representation."""
+        result = {
+            'id': self.id,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'deleted_rows': self.deleted_rows,
+            'progress': min(self.deleted_rows / self.total_rows, 1.0) if self.total_rows else None,
+            'created_at': self.created_at.isoformat()
+        }
+        if self.finished_at is not None:
+            result['finished_at'] = self.finished_at.isoformat()
+        return result
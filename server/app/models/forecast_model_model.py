@@ -0,0 +1,23 @@
+"""Represents db.Model for the forecast_model table."""
+
+from sqlalchemy import (Column, BigInteger, ForeignKey, Date, DateTime, JSON, func)
+
+from app.utils.extensions import db
+
+
+class ForecastModel(db.Model):
+    """Represents the forecast_model table that caches the fitted balance forecasting model of every user.
+
+    A model is fitted from the closed months before `month` and is refitted once a new month starts. The row is
+    removed whenever a transaction dated in a closed month is created, changed, moved or deleted.
+    """
+    __tablename__ = 'forecast_model'
+    __table_args__ = (
+        {'schema': 'public'},
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    month = Column(Date, nullable=False)
+    params = Column(JSON, nullable=False)
+    fitted_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
@@ -0,0 +1,25 @@
+"""Represents db.Model for the idempotency_key table."""
+
+from sqlalchemy import (CheckConstraint, Column, BigInteger, ForeignKey, Integer, Text, DateTime, func)
+
+from app.utils.extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """Represents the idempotency_key table storing responses of requests sent with an `Idempotency-Key` header.
+
+    A row without a status code marks a request that is still being processed.
+    """
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        CheckConstraint("char_length(key) > 0 AND char_length(key) <= 255", name="idempotency_key_key_length_check"),
+        {'schema': 'public'}
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    key = Column(Text, primary_key=True)
+    request_hash = Column(Text, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
@@ -0,0 +1,22 @@
+"""Represents db.Model for the quarter_income table."""
+
+from sqlalchemy import (Numeric, Column, BigInteger, ForeignKey, Date)
+
+from app.utils.extensions import db
+
+
+class QuarterIncome(db.Model):
+    """Represents the quarter_income table that caches total income of users for closed quarters.
+
+    Rows are only stored for quarters before the current one and are removed whenever an income transaction
+    dated in or before the cached quarter is created, changed or deleted.
+    """
+    __tablename__ = 'quarter_income'
+    __table_args__ = (
+        {'schema': 'public'},
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    quarter = Column(Date, primary_key=True)
+    income = Column(Numeric(14, 2), nullable=False)
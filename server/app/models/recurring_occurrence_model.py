@@ -0,0 +1,21 @@
+"""Represents db.Model for the recurring_occurrence table."""
+
+from sqlalchemy import (Column, BigInteger, ForeignKey, Integer, DateTime)
+
+from app.utils.extensions import db
+
+
+class RecurringOccurrence(db.Model):
+    """Represents the recurring_occurrence table recording every materialized occurrence of a recurring rule.
+
+    The primary key makes every occurrence of a rule materialize at most once, even when the scheduler catches up
+    after downtime or several schedulers run at the same time.
+    """
+    __tablename__ = 'recurring_occurrence'
+    __table_args__ = {'schema': 'public'}
+
+    rule_id = Column(BigInteger, ForeignKey('public.recurring_rule.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    occurrence = Column(Integer, primary_key=True, autoincrement=False)
+    transaction_id = Column(BigInteger, nullable=False)
+    due_at = Column(DateTime(timezone=False), nullable=False)
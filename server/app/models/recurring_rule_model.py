@@ -0,0 +1,73 @@
+"""Represents db.Model for the recurring_rule table."""
+
+from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, Integer, Boolean,
+                        Index, func, text)
+
+from app.models.transaction_model import transaction_type_enum
+from app.utils.extensions import db
+from app.utils.timing import timed
+
+
+class RecurringRule(db.Model):
+    """Represents the recurring_rule table holding the rules of recurring transactions (rent, salary, etc.).
+
+    The n-th occurrence of a rule is due at `start_at + n * interval_count * interval_unit`, so occurrences of
+    monthly rules keep their day of month. `occurrences` is the number of occurrences already materialized and
+    `next_run_at` is the due date of the next one.
+    """
+    __tablename__ = 'recurring_rule'
+    __table_args__ = (
+        CheckConstraint("amount >= 0 AND amount <= 1000000", name="recurring_rule_amount_check"),
+        CheckConstraint(
+            "description IS NULL OR (char_length(description) > 2 AND char_length(description) <= 200)",
+            name="recurring_rule_description_length_check"
+        ),
+        CheckConstraint("interval_unit IN ('day', 'week', 'month', 'year')", name="recurring_rule_interval_unit_check"),
+        CheckConstraint("interval_count >= 1 AND interval_count <= 365", name="recurring_rule_interval_count_check"),
+        CheckConstraint("end_at IS NULL OR end_at > start_at", name="recurring_rule_end_at_check"),
+        Index('recurring_rule_user_id_idx', 'user_id'),
+        Index('recurring_rule_next_run_at_idx', 'next_run_at', postgresql_where=text('active'),
+              sqlite_where=text('active')),
+        {'schema': 'public'}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     nullable=False)
+    category_id = Column(BigInteger, ForeignKey('public.category.id', onupdate="CASCADE"),
+                         nullable=False)
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    description = Column(Text, nullable=True)
+    type = Column(transaction_type_enum, nullable=False)
+    interval_unit = Column(Text, nullable=False)
+    interval_count = Column(Integer, nullable=False, server_default=text('1'))
+    start_at = Column(DateTime(timezone=False), nullable=False)
+    end_at = Column(DateTime(timezone=False), nullable=True)
+    occurrences = Column(Integer, nullable=False, server_default=text('0'))
+    next_run_at = Column(DateTime(timezone=False), nullable=False)
+    active = Column(Boolean, nullable=False, server_default=text('true'))
+    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+
+    @timed('serialize')
+    def to_dict(self):
+        """Converts the RecurringRule instance to a dictionary representation."""
+        result = {
+            'id': self.id,
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'budget_id': self.budget_id,
+            'amount': float(self.amount) if self.amount is not None else None,
+            'description': self.description,
+            'type': self.type,
+            'interval_unit': self.interval_unit,
+            'interval_count': self.interval_count,
+            'start_at': self.start_at.isoformat(),
+            'occurrences': self.occurrences,
+            'next_run_at': self.next_run_at.isoformat(),
+            'active': self.active
+        }
+        if self.end_at is not None:
+            result['end_at'] = self.end_at.isoformat()
+        return result
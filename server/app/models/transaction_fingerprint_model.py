@@ -0,0 +1,26 @@
+"""Represents db.Model for the transaction_fingerprint table."""
+
+from sqlalchemy import (Column, BigInteger, ForeignKey, Index)
+
+from app.utils.extensions import db
+
+
+class TransactionFingerprint(db.Model):
+    """Represents the transaction_fingerprint table holding the normalized fingerprint of every transaction.
+
+    The fingerprint is a hash of the budget, amount, day and normalized description of a transaction. The primary
+    key makes it unique per user, so a duplicate is detected with a single index probe. Unique indexes of the
+    partitioned transaction table would have to include `created_at`, therefore fingerprints are kept here.
+    """
+    __tablename__ = 'transaction_fingerprint'
+    __table_args__ = (
+        Index('transaction_fingerprint_transaction_id_idx', 'transaction_id'),
+        {'schema': 'public'}
+    )
+
+    user_id = Column(BigInteger, ForeignKey('public.user.id', onupdate="CASCADE", ondelete="CASCADE"),
+                     primary_key=True)
+    fingerprint = Column(BigInteger, primary_key=True, autoincrement=False)
+    transaction_id = Column(BigInteger, nullable=False)
+    budget_id = Column(BigInteger, ForeignKey('public.budget.id', onupdate="CASCADE", ondelete="CASCADE"),
+                       nullable=False)
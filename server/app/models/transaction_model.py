@@ -1,16 +1,22 @@
 """Represents db.Model for the transaction table."""
 
-from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, func)
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy import (Numeric, CheckConstraint, Column, BigInteger, ForeignKey, Text, DateTime, Index, DDL, event,
+                        func, text)
 
 from app.utils.extensions import db
+from app.utils.timing import timed
+from app.utils.types import enum_type
 
-transaction_type_enum = ENUM('income', 'expense', name='transaction_type', create_type=False)
+transaction_type_enum = enum_type('income', 'expense', name='transaction_type')
 """Transaction type enum for categorizing transactions as income or expense."""
 
 
 class Transaction(db.Model):
-    """Represents the transaction table in the database with all constraints and relationships."""
+    """Represents the transaction table in the database with all constraints and relationships.
+
+    The table is range partitioned by `created_at` into monthly partitions, so its primary key includes
+    `created_at`. The ORM still identifies transactions by `id` alone.
+    """
     __tablename__ = 'transaction'
     __table_args__ = (
         CheckConstraint("amount >= 0 AND amount <= 1000000", name="transaction_amount_check"),
@@ -18,7 +24,14 @@ class Transaction(db.Model):
             "description IS NULL OR (char_length(description) > 2 AND char_length(description) <= 200)",
             name="transaction_description_length_check"
         ),
-        {'schema': 'public'}
+        Index('transaction_user_id_created_at_idx', 'user_id', 'created_at'),
+        Index('transaction_budget_id_created_at_idx', 'budget_id', 'created_at'),
+        Index('transaction_category_id_idx', 'category_id'),
+        Index('transaction_description_tsv_idx', text("to_tsvector('simple', coalesce(description, ''))"),
+              postgresql_using='gin').ddl_if(dialect='postgresql'),
+        Index('transaction_description_trgm_idx', 'description', postgresql_using='gin',
+              postgresql_ops={'description': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        {'schema': 'public', 'postgresql_partition_by': 'RANGE (created_at)'}
     )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -30,13 +43,16 @@ class Transaction(db.Model):
                        nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=False), primary_key=True, server_default=func.now())
     type = Column(transaction_type_enum, nullable=False)
 
+    __mapper_args__ = {'primary_key': [id]}
+
     user = db.relationship('User', backref='transactions')
     category = db.relationship('Category', backref='transactions')
     budget = db.relationship('Budget', backref='transactions')
 
+    @timed('serialize')
     def to_dict(self):
         """Converts the Transaction instance to a dictionary representation."""
         return {
@@ -49,3 +65,9 @@ class Transaction(db.Model):
             'created_at': self.created_at.isoformat(),
             'type': self.type
         }
+
+
+event.listen(
+    Transaction.__table__, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
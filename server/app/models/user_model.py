@@ -1,16 +1,22 @@
 """Represent db.Model for User table."""
 
-from sqlalchemy import CheckConstraint, BigInteger, Column, Text, text
+from sqlalchemy import CheckConstraint, BigInteger, Column, Integer, Text, DateTime, text
 
 from app.utils.extensions import db, bcrypt
-from sqlalchemy.dialects.postgresql import ENUM
+from app.utils.timing import timed
+from app.utils.types import enum_type
 
-user_type_enum = ENUM('default', 'premium', 'admin', name='user_type', create_type=False)
+user_type_enum = enum_type('default', 'premium', 'admin', name='user_type')
 """User type enum for categorizing users as default, premium, or admin."""
 
 
 class User(db.Model):
-    """Represents the User table in the database with all constraints and relationships."""
+    """Represents the User table in the database with all constraints and relationships.
+
+    A user with `deleted_at` set is being deleted in the background and is hidden from ORM queries.
+    `pending_deletions` counts the budgets and categories of the user being deleted in the background, see
+    `app.services.deletion`.
+    """
     __tablename__ = 'user'
     __table_args__ = (
         CheckConstraint("char_length(username) > 2 AND char_length(username) <= 50",
@@ -26,7 +32,9 @@ class User(db.Model):
     username = Column(Text, nullable=False, unique=True)
     email = Column(Text, nullable=False, unique=True)
     password_hash = Column(Text, nullable=False)
-    type = Column(user_type_enum, nullable=False, server_default=text('default'))
+    type = Column(user_type_enum, nullable=False, server_default=text("'default'"))
+    deleted_at = Column(DateTime(timezone=False), nullable=True)
+    pending_deletions = Column(Integer, nullable=False, server_default=text('0'))
 
     def __init__(self, username, email, password, user_type='default'):
         """Initializes a User instance with username, email, password, and user type."""
@@ -43,6 +51,7 @@ class User(db.Model):
         """Checks if the provided password matches the stored password hash."""
         return bcrypt.check_password_hash(self.password_hash, password)
 
+    @timed('serialize')
     def to_dict(self):
         """Converts the User instance to a dictionary representation."""
         return {
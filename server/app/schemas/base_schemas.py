@@ -0,0 +1,22 @@
+"""Base class of the Pydantic schemas of the application."""
+
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.utils.timing import current_timings
+
+
+class Schema(BaseModel):
+    """Pydantic model whose validation is measured as the `validation` stage of the current request."""
+
+    def __init__(self, /, **data: Any) -> None:
+        timings = current_timings()
+        if timings is None:
+            super().__init__(**data)
+            return
+        timings.enter('validation')
+        try:
+            super().__init__(**data)
+        finally:
+            timings.exit()
@@ -0,0 +1,40 @@
+"""Represents the schema for batch requests combining several API operations."""
+
+from typing import Any, Literal, Optional
+
+from pydantic import Field, field_validator
+
+from app.schemas.base_schemas import Schema
+
+
+class BatchOperationSchema(Schema):
+    """Schema for a single operation of a batch request."""
+    method: Literal['GET', 'POST', 'PUT', 'DELETE']
+    path: str
+    body: Optional[Any] = None
+
+    @field_validator('method', mode='before')
+    @classmethod
+    def upper_method(cls, v):
+        """Accept the HTTP method in any case."""
+        return v.upper() if isinstance(v, str) else v
+
+    @field_validator('path')
+    @classmethod
+    def validate_path(cls, v):
+        """Validate that the path points to an API endpoint that can be batched.
+
+        Paths are checked as written, e.g. percent-encoded paths pass, so `dispatch_operation` rejects the batch
+        and authentication endpoints again by the endpoint the path is routed to.
+        """
+        if not v.startswith('/api/'):
+            raise ValueError("Path must start with '/api/'")
+        if v.startswith(('/api/batch', '/api/auth/')):
+            raise ValueError("Batch and authentication endpoints cannot be batched")
+        return v
+
+
+class BatchSchema(Schema):
+    """Schema for a batch request with validation rules."""
+    operations: list[BatchOperationSchema] = Field(..., min_length=1, max_length=100)
+    atomic: bool = True
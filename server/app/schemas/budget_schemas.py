@@ -1,11 +1,13 @@
 """Represents the schema for budget management, including validation rules."""
 
 from datetime import date, datetime
-from typing import Optional
-from pydantic import BaseModel, Field, model_validator, field_validator, constr
+from typing import Literal, Optional
+from pydantic import Field, model_validator, field_validator, constr, conlist
 
+from app.schemas.base_schemas import Schema
 
-class BudgetSchema(BaseModel):
+
+class BudgetSchema(Schema):
     """Schema for budget management with validation rules."""
     name: constr(min_length=3, max_length=30)
     initial: float = Field(..., ge=0, le=100_000_000)
@@ -53,3 +55,46 @@ class BudgetSchema(BaseModel):
         if isinstance(v, str):
             return datetime.fromisoformat(v).date()
         return v
+
+
+class BudgetHistorySchema(Schema):
+    """Schema for the query parameters of the budget balance history.
+
+    The view fills in the defaults of missing bounds before validating, so the range is always checked in full.
+    """
+    start: Optional[date] = Field(None, alias='from')
+    end: Optional[date] = Field(None, alias='to')
+    step: Literal['day', 'week'] = 'day'
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        """Validate that the range is ordered and not longer than ten years."""
+        if self.start is not None and self.end is not None:
+            if self.start > self.end:
+                raise ValueError("'from' date must be less than or equal to 'to' date")
+            if (self.end - self.start).days > 3660:
+                raise ValueError("The range must not be longer than ten years")
+        return self
+
+
+class BudgetTransferSchema(Schema):
+    """Schema for a transfer of money between two budgets.
+
+    The amount is rounded to cents, so it must be at least one cent.
+    """
+    from_budget_id: int
+    to_budget_id: int
+    amount: float = Field(..., ge=0.01, le=1_000_000)
+    description: Optional[constr(min_length=3, max_length=200)] = None
+
+    @model_validator(mode='after')
+    def validate_budgets(self):
+        """Validate that the money is moved between two different budgets."""
+        if self.from_budget_id == self.to_budget_id:
+            raise ValueError("'from_budget_id' and 'to_budget_id' must be different")
+        return self
+
+
+class BudgetTransferBatchSchema(Schema):
+    """Schema for several transfers executed together, e.g. to rebalance budgets."""
+    transfers: conlist(BudgetTransferSchema, min_length=1, max_length=1000)
@@ -1,33 +1,41 @@
 """Represents schemas for various financial calculations, including savings, credit, pension, FOP tax, and balance forecasting."""
 
-from pydantic import BaseModel, Field
+from pydantic import Field
 from typing import Literal, Optional
 
-class SavingsSchema(BaseModel):
+from app.schemas.base_schemas import Schema
+
+class SavingsSchema(Schema):
     """Schema for savings calculation with validation rules."""
     initial_sum: float = Field(..., ge=0, description="Initial savings amount")
     term_months: int = Field(..., ge=1, le=120, description="Term in months")
     annual_rate: float = Field(..., ge=0, le=100, description="Annual interest rate")
 
-class CreditSchema(BaseModel):
+class CreditSchema(Schema):
     """Schema for credit calculation with validation rules."""
     principal: float = Field(..., ge=1, description="The total amount of the credit")
     annual_rate: float = Field(..., ge=0, le=100, description="Annual interest rate")
     term_months: int = Field(..., ge=1, description="Credit term in months")
 
-class PensionSchema(BaseModel):
+class PensionSchema(Schema):
     """Schema for pension calculation with validation rules."""
     initial_sum: float = Field(default=0, ge=0, description="Initial savings amount")
     monthly_contribution: float = Field(..., ge=0, description="Regular monthly contribution")
     annual_rate: float = Field(..., ge=0, le=100, description="Average annual rate of return")
     term_years: int = Field(..., ge=1, le=60, description="Term of accumulation in years")
 
-class TaxFopSchema(BaseModel):
+class TaxFopSchema(Schema):
     """Schema for FOP tax calculation with validation rules."""
     income: float = Field(..., ge=0, description="Total income amount")
     tax_group: Literal[3, 5] = Field(..., description="Tax group for FOP (3 or 5)")
     unified_social_contribution: Optional[float] = Field(None, ge=0, description="Unified Social Contribution amount (optional)")
 
-class BalanceForecastSchema(BaseModel):
+class TaxFopIncomeSchema(Schema):
+    """Schema for FOP tax calculation from recorded income with validation rules."""
+    year: Optional[int] = Field(None, ge=2000, le=2100, description="Tax year, defaults to the current year")
+    tax_group: Literal[3, 5] = Field(..., description="Tax group for FOP (3 or 5)")
+    period: Literal['quarter', 'year'] = Field('quarter', description="Breakdown by quarter or the year total only")
+
+class BalanceForecastSchema(Schema):
     """Schema for balance forecasting with validation rules."""
     forecast_months: int = Field(..., ge=1, le=120, description="Number of months for the forecast")
\ No newline at end of file
@@ -1,17 +1,43 @@
 """Represents the schema for category management, including validation rules."""
 
-from pydantic import BaseModel, constr
+from pydantic import Field, conlist, constr
 from typing import Optional, Literal
 
+from app.schemas.base_schemas import Schema
 
-class CategoryCreateSchema(BaseModel):
+
+class CategoryCreateSchema(Schema):
     """Schema for creating a new category."""
     name: constr(min_length=3, max_length=20)
     description: Optional[constr(min_length=3, max_length=200)] = None
     type: Literal['incomes', 'expenses']
 
 
-class CategoryUpdateSchema(BaseModel):
+class CategoryUpdateSchema(Schema):
     """Schema for updating an existing category."""
     name: Optional[constr(min_length=3, max_length=20)] = None
     description: Optional[constr(min_length=3, max_length=200)] = None
+
+
+class CategoryListSchema(Schema):
+    """Schema for the query parameters of the category list."""
+    with_stats: bool = False
+
+
+class CategorySuggestSchema(Schema):
+    """Schema for requesting category suggestions for transaction descriptions."""
+    descriptions: conlist(Optional[constr(max_length=200)], min_length=1, max_length=10_000)
+    type: Optional[Literal['income', 'expense']] = None
+    k: int = Field(3, ge=1, le=10)
+
+
+class CategoryMergeSchema(Schema):
+    """Schema for merging a category into another one."""
+    target_category_id: int
+    delete_source: bool = True
+
+
+class CategoryReassignSchema(Schema):
+    """Schema for moving several transactions into a category."""
+    category_id: int
+    transaction_ids: conlist(int, min_length=1, max_length=10_000)
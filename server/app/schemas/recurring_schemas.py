@@ -0,0 +1,50 @@
+"""Represents the schema for recurring transaction rules, including validation rules."""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import Field, constr, field_validator, model_validator
+from pydantic_core import PydanticCustomError
+
+from app.schemas.base_schemas import Schema
+
+
+class RecurringRuleCreateSchema(Schema):
+    """Schema for creating a new recurring transaction rule."""
+    budget_id: int
+    category_id: int
+    amount: float = Field(..., ge=0, le=1_000_000)
+    description: Optional[constr(min_length=3, max_length=200)] = None
+    type: Literal['income', 'expense']
+    interval_unit: Literal['day', 'week', 'month', 'year']
+    interval_count: int = Field(1, ge=1, le=365)
+    start_at: datetime = Field(default_factory=datetime.now)
+    end_at: Optional[datetime] = None
+
+    @model_validator(mode='after')
+    def validate_end_at(self):
+        """Validate that the rule ends after it starts."""
+        if self.end_at is not None and self.end_at <= self.start_at:
+            raise ValueError('end_at must be greater than start_at')
+        return self
+
+
+class RecurringRuleUpdateSchema(Schema):
+    """Schema for updating an existing recurring transaction rule.
+
+    The schedule itself cannot be changed, because already materialized occurrences are numbered by it. Only the
+    description and the end can be removed with null, the other fields are required columns of the rule.
+    """
+    category_id: Optional[int] = None
+    amount: Optional[float] = Field(None, ge=0, le=1_000_000)
+    description: Optional[constr(min_length=3, max_length=200)] = None
+    end_at: Optional[datetime] = None
+    active: Optional[bool] = None
+
+    @field_validator('category_id', 'amount', 'active', mode='before')
+    @classmethod
+    def validate_not_null(cls, value):
+        """Validate that a required field of the rule is not set to null."""
+        if value is None:
+            raise PydanticCustomError('null_not_allowed', 'Field cannot be null')
+        return value
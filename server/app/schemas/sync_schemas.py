@@ -0,0 +1,10 @@
+"""Represents the schema for delta synchronization requests."""
+
+from pydantic import Field
+
+from app.schemas.base_schemas import Schema
+
+
+class SyncSchema(Schema):
+    """Schema for the query parameters of the synchronization endpoint."""
+    since: int = Field(0, ge=0, description="Last change sequence number seen by the client")
@@ -0,0 +1,16 @@
+"""Schemas for the system API."""
+
+from typing import Any, Literal, Optional
+
+from pydantic import Field, constr
+
+from app.schemas.base_schemas import Schema
+
+
+class ProfileSchema(Schema):
+    """Schema for a request to run under the sampling profiler."""
+    method: Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE'] = 'GET'
+    path: constr(pattern=r'^/api/')
+    query: dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+    interval_ms: float = Field(1, ge=0.1, le=100)
@@ -1,14 +1,36 @@
 """Represents the schema for transactions in the application."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, constr
+from pydantic import Field, constr, model_validator
 
+from app.schemas.base_schemas import Schema
 
-class TransactionSchema(BaseModel):
+
+class TransactionSchema(Schema):
     """Schema for a financial transaction."""
     amount: float = Field(..., ge=0, le=1_000_000)
     description: Optional[constr(min_length=3, max_length=200)] = None
     created_at: datetime = Field(default_factory=datetime.now)
     type: Literal['income', 'expense']
+
+
+class TransactionRangeSchema(Schema):
+    """Schema for the optional date range of transaction listings."""
+    start: Optional[date] = Field(None, alias='from')
+    end: Optional[date] = Field(None, alias='to')
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        """Validate that the range is ordered."""
+        if self.start is not None and self.end is not None and self.start > self.end:
+            raise ValueError("'from' date must be less than or equal to 'to' date")
+        return self
+
+
+class TransactionSearchSchema(Schema):
+    """Schema for the query parameters of the transaction search."""
+    q: constr(strip_whitespace=True, min_length=1, max_length=100)
+    page: int = Field(1, ge=1)
+    per_page: int = Field(20, ge=1, le=100)
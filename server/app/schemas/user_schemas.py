@@ -1,10 +1,12 @@
 """Represents schemas for user registration, login, and updates."""
 
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import EmailStr, constr
 from typing import Literal, Optional
 
+from app.schemas.base_schemas import Schema
 
-class UserRegisterSchema(BaseModel):
+
+class UserRegisterSchema(Schema):
     """Schema for user registration."""
     username: constr(min_length=3, max_length=50)
     email: EmailStr
@@ -12,18 +14,18 @@ class UserRegisterSchema(BaseModel):
     user_type: Literal['default', 'premium', 'admin'] = 'default'
 
 
-class UserLoginSchema(BaseModel):
+class UserLoginSchema(Schema):
     """Schema for user login."""
     email: EmailStr
     password: str
 
 
-class UserChangePasswordSchema(BaseModel):
+class UserChangePasswordSchema(Schema):
     """Schema for changing user password."""
     new_password: constr(min_length=8)
 
 
-class UserUpdateSchema(BaseModel):
+class UserUpdateSchema(Schema):
     """Schema for updating user information."""
     username: Optional[constr(min_length=3, max_length=50)] = None
     email: Optional[EmailStr] = None
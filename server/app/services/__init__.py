@@ -0,0 +1 @@
+"""Contains domain services shared by the API endpoints and background jobs."""
@@ -0,0 +1,315 @@
+"""Detects unusually high monthly expenses of categories and budgets that will miss their goals.
+
+The expenses of every category are summed per month in the `category_month` table. Running statistics of the
+monthly totals (count, mean and sum of squared deviations) are kept in the `category_stats` table and updated with
+Welford's algorithm on every write of an expense, which replaces the previous total of its month, so checking the
+month of a new expense costs a single primary key lookup. Batches of transactions are combined with the parallel
+variant of the algorithm in one statement per step. Incomes are not observed. Budgets are checked by a periodic
+set-based job that compares the daily plan of every budget with its recent pace.
+"""
+
+import datetime
+import math
+from collections import defaultdict
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import BigInteger, Date, Float, cast, column, delete, func, literal, select, text, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.alert_model import Alert
+from app.models.budget_model import Budget
+from app.models.category_month_model import CategoryMonth
+from app.models.category_stats_model import CategoryStats
+from app.services.archive import combined_transactions
+from app.services.balance_history import budget_movements
+from app.utils.extensions import db
+
+
+def daily_plan(goal, current, days_remaining):
+    """Returns the amount a budget has to grow by every day to reach its goal by its end date.
+
+    Works both with numbers and with SQL expressions, so the API and the budget check job share the same math.
+    """
+    return (goal - current) / days_remaining
+
+
+def _month(moment: datetime.date) -> datetime.date:
+    """Returns the first day of the month of a date or date and time."""
+    return datetime.date(moment.year, moment.month, 1)
+
+
+def _month_deltas(transactions, sign: int) -> dict[tuple[int, int, datetime.date], Decimal]:
+    """Returns the non-zero changes of the monthly expense totals per user, category and month."""
+    deltas = defaultdict(Decimal)
+    for transaction in transactions:
+        if transaction.type == 'expense':
+            key = (int(transaction.user_id), transaction.category_id, _month(transaction.created_at))
+            deltas[key] += sign * Decimal(str(transaction.amount))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def _batch_stats(samples) -> dict[tuple[int, int], tuple[int, float, float]]:
+    """Returns the count, mean and sum of squared deviations of `(user_id, category_id, value)` samples."""
+    stats = defaultdict(lambda: (0, 0.0, 0.0))
+    for user_id, category_id, value in samples:
+        key = (user_id, category_id)
+        count, mean, m2 = stats[key]
+        value = float(value)
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+        stats[key] = (count, mean, m2)
+    return stats
+
+
+def _without(count: int, mean: float, m2: float, value: float) -> tuple[int, float, float]:
+    """Removes a sample from running statistics."""
+    if count <= 1:
+        return 0, 0.0, 0.0
+    remaining = (count * mean - value) / (count - 1)
+    return count - 1, remaining, max(m2 - (value - remaining) * (value - mean), 0.0)
+
+
+def _add_samples(stats: dict[tuple[int, int], tuple[int, float, float]]) -> None:
+    """Combines batches of samples into the statistics of their categories with the parallel Welford algorithm."""
+    if not stats:
+        return
+    stmt = insert(CategoryStats).values([
+        {'user_id': user_id, 'category_id': category_id, 'count': count, 'mean': mean, 'm2': m2}
+        for (user_id, category_id), (count, mean, m2) in sorted(stats.items())
+    ])
+    added = stmt.excluded
+    count = CategoryStats.count + added.count
+    delta = added.mean - CategoryStats.mean
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[CategoryStats.user_id, CategoryStats.category_id],
+        set_={
+            'count': count,
+            'mean': CategoryStats.mean + delta * added.count / count,
+            'm2': CategoryStats.m2 + added.m2 + delta * delta * CategoryStats.count * added.count / count
+        }
+    ))
+
+
+def _remove_samples(stats: dict[tuple[int, int], tuple[int, float, float]]) -> None:
+    """Removes batches of samples from the statistics of their categories."""
+    if not stats:
+        return
+    removed = values(
+        column('user_id', BigInteger), column('category_id', BigInteger), column('count', BigInteger),
+        column('mean', Float), column('m2', Float), name='removed'
+    ).data([(user_id, category_id, *batch) for (user_id, category_id), batch in sorted(stats.items())])
+    count = CategoryStats.count - removed.c.count
+    mean = (CategoryStats.count * CategoryStats.mean - removed.c.count * removed.c.mean) / func.nullif(count, 0)
+    delta = removed.c.mean - mean
+    m2 = CategoryStats.m2 - removed.c.m2 - delta * delta * count * removed.c.count / CategoryStats.count
+    db.session.execute(
+        CategoryStats.__table__.update().where(
+            CategoryStats.user_id == removed.c.user_id,
+            CategoryStats.category_id == removed.c.category_id
+        ).values(
+            count=func.greatest(count, 0),
+            mean=func.coalesce(mean, 0),
+            m2=func.greatest(func.coalesce(m2, 0), 0)
+        )
+    )
+
+
+def _change_months(deltas: dict[tuple[int, int, datetime.date], Decimal]) -> dict:
+    """Adds changes to the monthly totals of categories and replaces the changed totals in their statistics.
+
+    Returns:
+        dict: The previous and the new total by user, category and month.
+    """
+    if not deltas:
+        return {}
+    stmt = insert(CategoryMonth).values([
+        {'user_id': user_id, 'category_id': category_id, 'month': month, 'total': delta}
+        for (user_id, category_id, month), delta in sorted(deltas.items())
+    ])
+    rows = db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[CategoryMonth.user_id, CategoryMonth.category_id, CategoryMonth.month],
+        set_={'total': CategoryMonth.total + stmt.excluded.total}
+    ).returning(CategoryMonth.user_id, CategoryMonth.category_id, CategoryMonth.month, CategoryMonth.total)).all()
+
+    totals = {}
+    for row in rows:
+        key = (row.user_id, row.category_id, row.month)
+        totals[key] = (row.total - deltas[key], row.total)
+    _remove_samples(_batch_stats((user_id, category_id, previous)
+                                 for (user_id, category_id, _), (previous, _) in totals.items() if previous))
+    _add_samples(_batch_stats((user_id, category_id, total)
+                              for (user_id, category_id, _), (_, total) in totals.items() if total))
+    return totals
+
+
+def update_category_stats(transactions, sign: int = 1) -> dict:
+    """Adds expense transactions to the monthly totals of their categories, or removes them with a negative sign.
+
+    The statistics of every category are kept over its monthly totals, so a changed month replaces its previous
+    total in them. Income transactions are ignored. Every call executes at most three statements, whatever the
+    number of transactions. The changes are added to the current session and are committed together with the
+    transactions.
+
+    Args:
+        transactions: Rows or objects with the `user_id`, `category_id`, `amount`, `type` and `created_at` of
+            the transactions.
+        sign (int): 1 to add the transactions, -1 to remove them.
+
+    Returns:
+        dict: The previous and the new total by user, category and month of the changed months.
+    """
+    return _change_months(_month_deltas(transactions, sign))
+
+
+def merge_category_stats(user_id: int | str, source_category_id: int, target_category_id: int) -> None:
+    """Adds the monthly totals of a category to another one, e.g. when the categories are merged."""
+    user_id = int(user_id)
+    months = db.session.execute(delete(CategoryMonth).where(
+        CategoryMonth.user_id == user_id,
+        CategoryMonth.category_id == source_category_id
+    ).returning(CategoryMonth.month, CategoryMonth.total)).all()
+    db.session.execute(delete(CategoryStats).where(
+        CategoryStats.user_id == user_id,
+        CategoryStats.category_id == source_category_id
+    ))
+    _change_months({(user_id, target_category_id, month): total for month, total in months if total})
+
+
+def anomaly_score(stats: tuple[int, float, float], total, previous=0) -> tuple[float, float] | None:
+    """Returns the z-score of a monthly expense total among the other months of its category and their mean.
+
+    Args:
+        stats (tuple[int, float, float]): The count, mean and sum of squared deviations of the category.
+        total: The monthly total to score.
+        previous: The total of the same month included in `stats`, which is left out.
+
+    Returns:
+        tuple[float, float] | None: The z-score and the mean monthly total, None if the category has fewer than
+        `ANOMALY_MIN_MONTHS` other months or no variance.
+    """
+    count, mean, m2 = _without(*stats, float(previous)) if previous else stats
+    if count < current_app.config['ANOMALY_MIN_MONTHS'] or m2 <= 0:
+        return None
+    return (float(total) - mean) / math.sqrt(m2 / count), mean
+
+
+def observe_transaction(user_id: int | str, transaction) -> Alert | None:
+    """Adds a new transaction to the monthly total of its category and checks the total for unusually high expenses.
+
+    Only expenses are observed. An alert is created for the transaction that takes the z-score of the monthly
+    total to `ANOMALY_Z_THRESHOLD`, so a month is flagged once. The changes are added to the current session
+    and are committed together with the transaction.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        transaction: The flushed transaction.
+
+    Returns:
+        Alert | None: The created anomaly alert, None if the monthly total is usual.
+    """
+    if transaction.type != 'expense':
+        return None
+    key = (int(user_id), transaction.category_id)
+    stats = db.session.get(CategoryStats, key)
+    stats = (stats.count, stats.mean, stats.m2) if stats is not None else (0, 0.0, 0.0)
+    totals = update_category_stats([transaction])
+    if not totals:
+        return None
+    previous, total = totals[(*key, _month(transaction.created_at))]
+
+    threshold = current_app.config['ANOMALY_Z_THRESHOLD']
+    score = anomaly_score(stats, total, previous)
+    if score is None or score[0] < threshold or anomaly_score(stats, previous, previous)[0] >= threshold:
+        return None
+    alert = Alert(
+        user_id=int(user_id),
+        kind='anomaly',
+        category_id=transaction.category_id,
+        budget_id=transaction.budget_id,
+        transaction_id=transaction.id,
+        value=round(score[0], 2),
+        expected=round(score[1], 2)
+    )
+    db.session.add(alert)
+    return alert
+
+
+def rebuild_category_stats() -> int:
+    """Recomputes the monthly expenses and statistics of all categories from all transactions.
+
+    Returns:
+        int: The number of categories with statistics.
+    """
+    transactions = combined_transactions()
+    month = cast(func.date_trunc('month', transactions.c.created_at), Date)
+    db.session.execute(delete(CategoryStats))
+    db.session.execute(delete(CategoryMonth))
+    db.session.execute(insert(CategoryMonth).from_select(
+        ['user_id', 'category_id', 'month', 'total'],
+        select(
+            transactions.c.user_id, transactions.c.category_id, month, func.sum(transactions.c.amount)
+        ).where(transactions.c.type == 'expense').group_by(transactions.c.user_id, transactions.c.category_id, month)
+    ))
+    total = cast(CategoryMonth.total, Float)
+    inserted = db.session.execute(insert(CategoryStats).from_select(
+        ['user_id', 'category_id', 'count', 'mean', 'm2'],
+        select(
+            CategoryMonth.user_id, CategoryMonth.category_id, func.count(), func.avg(total),
+            func.coalesce(func.var_pop(total), 0) * func.count()
+        ).where(CategoryMonth.total != 0).group_by(CategoryMonth.user_id, CategoryMonth.category_id)
+    )).rowcount
+    db.session.commit()
+    return inserted
+
+
+def check_budgets(trend_days: int, today: datetime.date | None = None) -> int:
+    """Flags budgets that will miss their goal at their current pace and clears the flags of the others.
+
+    The pace of a budget is its net change per day over the last `trend_days` days. A budget is off track when
+    the pace is below the daily plan returned by `daily_plan`, the same math as of the budget plan endpoint.
+    All budgets are checked with one INSERT ... SELECT and one DELETE.
+
+    Args:
+        trend_days (int): The number of past days the pace is computed from.
+        today (datetime.date, optional): The day of the check, defaults to today.
+
+    Returns:
+        int: The number of off-track budgets.
+    """
+    today = today or datetime.date.today()
+    movements = budget_movements()
+    pace = select(
+        movements.c.budget_id, (func.sum(movements.c.delta) / trend_days).label('pace')
+    ).where(movements.c.created_at >= today - datetime.timedelta(days=trend_days)).group_by(
+        movements.c.budget_id
+    ).subquery('pace')
+
+    days_remaining = Budget.end_at - literal(today)
+    plan = daily_plan(Budget.goal, Budget.current, days_remaining)
+    rate = func.coalesce(pace.c.pace, 0)
+    off_track = select(
+        Budget.user_id, literal('budget_off_track'), Budget.id,
+        Budget.goal - (Budget.current + rate * days_remaining), plan
+    ).outerjoin(pace, pace.c.budget_id == Budget.id).where(
+        Budget.goal.is_not(None),
+        Budget.end_at > today,
+        Budget.deleted_at.is_(None),
+        rate < plan
+    )
+
+    stmt = insert(Alert).from_select(['user_id', 'kind', 'budget_id', 'value', 'expected'], off_track)
+    flagged = db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[Alert.budget_id, Alert.kind],
+        index_where=text("kind = 'budget_off_track'"),
+        set_={'value': stmt.excluded.value, 'expected': stmt.excluded.expected}
+    ).returning(Alert.budget_id)).scalars().all()
+
+    db.session.execute(delete(Alert).where(
+        Alert.kind == 'budget_off_track',
+        Alert.budget_id.not_in(off_track.with_only_columns(Budget.id))
+    ))
+    db.session.commit()
+    return len(flagged)
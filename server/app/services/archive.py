@@ -0,0 +1,136 @@
+"""Moves old transactions into the archive table and merges hot and archived transactions for reads.
+
+Transactions created before the archive horizon are moved from the transaction table into the compact
+`transaction_archive` table in bounded batches, and the emptied monthly partitions are dropped. Reads that may
+span both tables go through `query_transactions` or `combined_transactions`, and an archived transaction is moved
+back by `restore_transaction` before it is changed, so archiving is invisible to the API.
+"""
+
+import datetime
+import heapq
+from operator import attrgetter
+
+from sqlalchemy import Select, select, text, union_all, Subquery
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.transaction_model import Transaction
+from app.services.partitions import drop_empty_partitions
+from app.utils.extensions import db
+
+ARCHIVED_COLUMNS = ('id', 'user_id', 'category_id', 'budget_id', 'amount', 'description', 'created_at', 'type')
+"""Columns copied from the transaction table into the archive table."""
+
+
+def combined_transactions() -> Subquery:
+    """Returns a subquery of all hot and archived transactions.
+
+    The subquery has the columns listed in `ARCHIVED_COLUMNS`, filters applied to it are pushed down into both
+    tables by the database.
+
+    Returns:
+        Subquery: The `UNION ALL` of both tables.
+    """
+    return union_all(
+        select(*(getattr(Transaction, name) for name in ARCHIVED_COLUMNS)),
+        select(*(getattr(ArchivedTransaction, name) for name in ARCHIVED_COLUMNS))
+    ).subquery('all_transactions')
+
+
+def transaction_queries(start: datetime.date | None = None, end: datetime.date | None = None,
+                        **filters) -> list[Select]:
+    """Returns the queries of hot and archived transactions matching the filters, see `query_transactions`.
+
+    The queries can be executed by a synchronous or an asynchronous session, the results are merged with
+    `merge_transactions`.
+    """
+    queries = []
+    for model in (Transaction, ArchivedTransaction):
+        query = select(model).filter_by(**filters)
+        if start is not None:
+            query = query.where(model.created_at >= datetime.datetime.combine(start, datetime.time()))
+        if end is not None:
+            query = query.where(model.created_at < datetime.datetime.combine(end + datetime.timedelta(days=1),
+                                                                             datetime.time()))
+        queries.append(query.order_by(model.created_at.desc()))
+    return queries
+
+
+def merge_transactions(results: list[list]) -> list[Transaction | ArchivedTransaction]:
+    """Merges the results of `transaction_queries`, ordered by creation date in descending order."""
+    return list(heapq.merge(*results, key=attrgetter('created_at'), reverse=True))
+
+
+def query_transactions(start: datetime.date | None = None, end: datetime.date | None = None,
+                       **filters) -> list[Transaction | ArchivedTransaction]:
+    """Returns hot and archived transactions matching the filters, ordered by creation date in descending order.
+
+    Args:
+        start (datetime.date, optional): Only transactions created on or after this day are returned.
+        end (datetime.date, optional): Only transactions created on or before this day are returned.
+        **filters: Column values the transactions must have, e.g. `user_id` or `budget_id`.
+
+    Returns:
+        list[Transaction | ArchivedTransaction]: The matching transactions of both tables.
+    """
+    return merge_transactions([
+        db.session.execute(query).scalars().all() for query in transaction_queries(start, end, **filters)
+    ])
+
+
+def restore_transaction(user_id: int | str, transaction_id: int) -> Transaction | None:
+    """Moves an archived transaction of a user back into the transaction table, so it can be updated or deleted.
+
+    The transaction keeps its ID, so clients do not notice the move, and is archived again by the next
+    `archive_transactions` run if it is still older than the horizon. The move is added to the current session
+    and is committed together with the change of the transaction.
+
+    Args:
+        user_id (int | str): The ID of the user owning the transaction.
+        transaction_id (int): The ID of the archived transaction.
+
+    Returns:
+        Transaction | None: The restored transaction, or None if the user has no such archived transaction.
+    """
+    archived = ArchivedTransaction.query.filter_by(id=transaction_id, user_id=user_id).first()
+    if archived is None:
+        return None
+
+    transaction = Transaction(**{name: getattr(archived, name) for name in ARCHIVED_COLUMNS})
+    db.session.delete(archived)
+    db.session.add(transaction)
+    db.session.flush()
+    return transaction
+
+
+def archive_transactions(cutoff: datetime.date, batch_size: int) -> int:
+    """Moves transactions created before the cutoff into the archive table.
+
+    Every batch is moved with a single statement in its own transaction, so locks are held only briefly.
+    Monthly partitions left empty before the cutoff are dropped afterwards.
+
+    Args:
+        cutoff (datetime.date): Transactions created before this day are archived.
+        batch_size (int): The maximum number of transactions moved per transaction.
+
+    Returns:
+        int: The number of archived transactions.
+    """
+    columns = ', '.join(ARCHIVED_COLUMNS)
+    statement = text(
+        'WITH moved AS ('
+        'DELETE FROM public.transaction WHERE created_at < :cutoff AND id IN ('
+        'SELECT id FROM public.transaction WHERE created_at < :cutoff LIMIT :limit) '
+        f'RETURNING {columns}) '
+        f'INSERT INTO public.transaction_archive ({columns}) SELECT {columns} FROM moved'
+    )
+
+    archived = 0
+    while True:
+        moved = db.session.execute(statement, {'cutoff': cutoff, 'limit': batch_size}).rowcount
+        db.session.commit()
+        archived += moved
+        if moved < batch_size:
+            break
+
+    drop_empty_partitions(cutoff)
+    return archived
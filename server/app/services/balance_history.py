@@ -0,0 +1,204 @@
+"""Computes the daily balance history of budgets.
+
+The running balance is computed in the database with a window function over per-day deltas of transactions and
+transfers joined to `generate_series`, so days without any transactions are filled in. End-of-day balances of
+closed days (before today) are cached in the `balance_snapshot` table, so only the open tail is recomputed.
+"""
+
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, case, cast, column, delete, func, select, values, ColumnElement
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.balance_snapshot_model import BalanceSnapshot
+from app.models.budget_model import Budget
+from app.models.budget_transfer_model import BudgetLedgerEntry
+from app.services.archive import combined_transactions
+from app.utils.extensions import db
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def signed_amount(transactions) -> ColumnElement:
+    """Returns the SQL expression of a transaction amount signed by its type (income is positive).
+
+    Args:
+        transactions: The selectable of transactions, e.g. the result of `combined_transactions`.
+    """
+    return case((transactions.c.type == 'income', transactions.c.amount), else_=-transactions.c.amount)
+
+
+def budget_movements():
+    """Returns a subquery of all signed changes of budgets, i.e. transactions and ledger entries of transfers.
+
+    The subquery has the `budget_id`, `created_at` and `delta` columns.
+    """
+    transactions = combined_transactions()
+    return select(
+        transactions.c.budget_id, transactions.c.created_at, signed_amount(transactions).label('delta')
+    ).union_all(
+        select(BudgetLedgerEntry.budget_id, BudgetLedgerEntry.created_at, BudgetLedgerEntry.amount)
+    ).subquery('movements')
+
+
+def _compute_series(budget: Budget, start: datetime.date, end: datetime.date,
+                    opening: Decimal | None = None) -> list[tuple[datetime.date, Decimal]]:
+    """Computes end-of-day balances of a budget for every day in the given range.
+
+    Args:
+        budget (Budget): The budget to compute the balances for.
+        start (datetime.date): The first day of the range.
+        end (datetime.date): The last day of the range.
+        opening (Decimal, optional): The balance at the end of the day before `start`. It is computed from
+            the budget's initial amount and all earlier transactions and transfers if not provided.
+
+    Returns:
+        list[tuple[datetime.date, Decimal]]: Pairs of day and balance ordered by day.
+    """
+    movements = budget_movements()
+    day_column = cast(movements.c.created_at, Date)
+
+    if opening is None:
+        opening = budget.initial + db.session.execute(
+            select(func.coalesce(func.sum(movements.c.delta), 0)).where(
+                movements.c.budget_id == budget.id,
+                movements.c.created_at < start
+            )
+        ).scalar()
+
+    deltas = select(
+        day_column.label('day'),
+        func.sum(movements.c.delta).label('delta')
+    ).where(
+        movements.c.budget_id == budget.id,
+        movements.c.created_at >= start,
+        movements.c.created_at < end + ONE_DAY
+    ).group_by(day_column).subquery()
+
+    days = func.generate_series(start, end, ONE_DAY).table_valued('day').render_derived()
+    day = cast(days.c.day, Date)
+
+    rows = db.session.execute(
+        select(
+            day.label('day'),
+            func.sum(func.coalesce(deltas.c.delta, 0)).over(order_by=day).label('running')
+        ).select_from(
+            days.outerjoin(deltas, deltas.c.day == day)
+        ).order_by(day)
+    ).all()
+
+    return [(row.day, opening + row.running) for row in rows]
+
+
+def _cache_series(budget_id: int, series: list[tuple[datetime.date, Decimal]]) -> None:
+    """Stores computed end-of-day balances of closed days in the snapshot table."""
+    if not series:
+        return
+
+    db.session.execute(
+        insert(BalanceSnapshot).values([
+            {'budget_id': budget_id, 'day': day, 'balance': balance} for day, balance in series
+        ]).on_conflict_do_nothing()
+    )
+    db.session.commit()
+
+
+def get_balance_history(budget: Budget, start: datetime.date,
+                        end: datetime.date) -> list[tuple[datetime.date, Decimal]]:
+    """Returns end-of-day balances of a budget for every day in the given range.
+
+    Cached balances are used for closed days, missing closed days are computed once and cached, while
+    today and future days are always recomputed.
+
+    Args:
+        budget (Budget): The budget to compute the history for.
+        start (datetime.date): The first day of the range.
+        end (datetime.date): The last day of the range.
+
+    Returns:
+        list[tuple[datetime.date, Decimal]]: Pairs of day and balance ordered by day.
+    """
+    today = datetime.date.today()
+    closed_end = min(end, today - ONE_DAY)
+    history = []
+
+    if start <= closed_end:
+        cached = BalanceSnapshot.query.filter(
+            BalanceSnapshot.budget_id == budget.id,
+            BalanceSnapshot.day >= start,
+            BalanceSnapshot.day <= closed_end
+        ).order_by(BalanceSnapshot.day).all()
+
+        for snapshot in cached:
+            if snapshot.day != start + len(history) * ONE_DAY:
+                break
+            history.append((snapshot.day, snapshot.balance))
+
+        missing_start = start + len(history) * ONE_DAY
+        if missing_start <= closed_end:
+            opening = history[-1][1] if history else None
+            computed = _compute_series(budget, missing_start, closed_end, opening)
+            _cache_series(budget.id, computed)
+            history.extend(computed)
+
+    tail_start = max(start, today)
+    if tail_start <= end:
+        opening = history[-1][1] if history else None
+        history.extend(_compute_series(budget, tail_start, end, opening))
+
+    return history
+
+
+def invalidate_balance_history(budget_id: int, since: datetime.date | datetime.datetime | None = None) -> None:
+    """Removes cached balances of a budget that are affected by a change dated on or after `since`.
+
+    The deletion is added to the current session and is committed together with the change itself.
+
+    Args:
+        budget_id (int): The ID of the budget whose cache should be invalidated.
+        since (datetime.date | datetime.datetime, optional): The date of the change. All cached days of the
+            budget are removed if not provided.
+    """
+    query = BalanceSnapshot.query.filter(BalanceSnapshot.budget_id == budget_id)
+    if since is not None:
+        if isinstance(since, datetime.datetime):
+            since = since.date()
+        if since >= datetime.date.today():
+            return
+        query = query.filter(BalanceSnapshot.day >= since)
+
+    query.delete(synchronize_session=False)
+
+
+def invalidate_balance_histories(since: dict[int, datetime.date | datetime.datetime]) -> None:
+    """Removes cached balances of many budgets with a single statement, see `invalidate_balance_history`.
+
+    Args:
+        since (dict[int, datetime.date | datetime.datetime]): The date of the earliest change by budget ID.
+    """
+    today = datetime.date.today()
+    rows = []
+    for budget_id, day in since.items():
+        if isinstance(day, datetime.datetime):
+            day = day.date()
+        if day < today:
+            rows.append((budget_id, day))
+    if not rows:
+        return
+
+    changes = values(column('budget_id', BigInteger), column('since', Date), name='changes').data(rows)
+    db.session.execute(
+        delete(BalanceSnapshot).where(
+            BalanceSnapshot.budget_id == changes.c.budget_id,
+            BalanceSnapshot.day >= changes.c.since
+        )
+    )
+
+
+def downsample_weekly(history: list[tuple[datetime.date, Decimal]]) -> list[tuple[datetime.date, Decimal]]:
+    """Keeps the balance of the last day of every ISO week (and of the last day of the range)."""
+    return [
+        (day, balance) for index, (day, balance) in enumerate(history)
+        if index == len(history) - 1 or day.isoweekday() == 7
+    ]
@@ -0,0 +1,294 @@
+"""Suggests categories for transactions with a per-user multinomial naive Bayes classifier.
+
+The classifier is trained from the descriptions and categories of the user's transactions. Its training data are
+word counts per category stored in the `category_token` table, where the empty token counts the transactions of
+the category. The counts are updated online on every transaction write, and the in-process models built from
+them are reloaded when the counts change. Scoring is vectorized with NumPy, so large imports are categorized in
+a single pass.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import BigInteger, Text, column, delete, func, literal, select, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.category_model import Category
+from app.models.category_token_model import CategoryToken
+from app.services.archive import combined_transactions
+from app.services.search import tokenize
+from app.utils.extensions import db
+
+DOCUMENT_TOKEN = ''
+"""Token counting the training transactions of a category."""
+SMOOTHING = 1.0
+"""Additive (Laplace) smoothing of the word counts."""
+
+
+def description_tokens(description: str | None) -> Counter:
+    """Returns the counts of the words of a description used by the classifier, ignoring pure numbers."""
+    return Counter(token for token in tokenize(description) if not token.isdigit())
+
+
+def _upsert_counts(rows: list[dict]) -> None:
+    """Adds the given counts to the stored ones, creating missing rows."""
+    if not rows:
+        return
+    stmt = insert(CategoryToken).values(rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[CategoryToken.user_id, CategoryToken.category_id, CategoryToken.token],
+        set_={'count': CategoryToken.count + stmt.excluded.count, 'version': CategoryToken.version + 1}
+    ))
+
+
+def learn(user_id: int | str, category_id: int, description: str | None, weight: int = 1) -> None:
+    """Adds a transaction to the training data of the user's classifier, or removes it with a negative weight.
+
+    The change is added to the current session and is committed together with the transaction itself.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        category_id (int): The ID of the category of the transaction.
+        description (str, optional): The description of the transaction.
+        weight (int): 1 to learn the transaction, -1 to forget it.
+    """
+    user_id = int(user_id)
+    counts = description_tokens(description)
+    counts[DOCUMENT_TOKEN] = 1
+
+    if weight > 0:
+        _upsert_counts([
+            {'user_id': user_id, 'category_id': category_id, 'token': token, 'count': count * weight}
+            for token, count in counts.items()
+        ])
+        return
+
+    for token, count in counts.items():
+        db.session.execute(
+            CategoryToken.__table__.update().where(
+                CategoryToken.user_id == user_id,
+                CategoryToken.category_id == category_id,
+                CategoryToken.token == token
+            ).values(count=func.greatest(CategoryToken.count + count * weight, 0), version=CategoryToken.version + 1)
+        )
+
+
+def learn_transactions(transactions, weight: int = 1) -> None:
+    """Adds many transactions of possibly many users to the training data, or removes them with a negative weight.
+
+    Used by bulk operations, e.g. the recurring transactions scheduler or category reassignment, so the number
+    of statements does not depend on the number of transactions.
+
+    Args:
+        transactions: Rows or objects with the `user_id`, `category_id` and `description` of the transactions.
+        weight (int): 1 to learn the transactions, -1 to forget them.
+    """
+    counts = Counter()
+    for transaction in transactions:
+        key = (int(transaction.user_id), transaction.category_id)
+        for token, count in description_tokens(transaction.description).items():
+            counts[(*key, token)] += count
+        counts[(*key, DOCUMENT_TOKEN)] += 1
+
+    rows = sorted(counts.items())
+    for offset in range(0, len(rows), 5000):
+        chunk = rows[offset:offset + 5000]
+        if weight > 0:
+            _upsert_counts([
+                {'user_id': user_id, 'category_id': category_id, 'token': token, 'count': count * weight}
+                for (user_id, category_id, token), count in chunk
+            ])
+            continue
+
+        forgotten = values(
+            column('user_id', BigInteger), column('category_id', BigInteger), column('token', Text),
+            column('count', BigInteger), name='forgotten'
+        ).data([(user_id, category_id, token, count * -weight) for (user_id, category_id, token), count in chunk])
+        db.session.execute(
+            CategoryToken.__table__.update().where(
+                CategoryToken.user_id == forgotten.c.user_id,
+                CategoryToken.category_id == forgotten.c.category_id,
+                CategoryToken.token == forgotten.c.token
+            ).values(count=func.greatest(CategoryToken.count - forgotten.c.count, 0),
+                     version=CategoryToken.version + 1)
+        )
+
+
+def move_counts(user_id: int | str, source_category_id: int, target_category_id: int) -> None:
+    """Moves the training data of a category into another one, e.g. when the categories are merged.
+
+    The change is added to the current session and is committed together with the merge itself.
+    """
+    user_id = int(user_id)
+    source = select(
+        CategoryToken.user_id, literal(target_category_id, BigInteger), CategoryToken.token, CategoryToken.count
+    ).where(CategoryToken.user_id == user_id, CategoryToken.category_id == source_category_id)
+    stmt = insert(CategoryToken).from_select(['user_id', 'category_id', 'token', 'count'], source)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[CategoryToken.user_id, CategoryToken.category_id, CategoryToken.token],
+        set_={'count': CategoryToken.count + stmt.excluded.count, 'version': CategoryToken.version + 1}
+    ))
+    db.session.execute(delete(CategoryToken).where(
+        CategoryToken.user_id == user_id,
+        CategoryToken.category_id == source_category_id
+    ))
+
+
+def train_user(user_id: int | str) -> int:
+    """Rebuilds the training data of a user's classifier from all of the user's transactions.
+
+    Args:
+        user_id (int | str): The ID of the user.
+
+    Returns:
+        int: The number of transactions the classifier was trained on.
+    """
+    user_id = int(user_id)
+    transactions = combined_transactions()
+    counts = Counter()
+    trained = 0
+    for category_id, description in db.session.execute(
+            select(transactions.c.category_id, transactions.c.description).where(
+                transactions.c.user_id == user_id)):
+        for token, count in description_tokens(description).items():
+            counts[(category_id, token)] += count
+        counts[(category_id, DOCUMENT_TOKEN)] += 1
+        trained += 1
+
+    db.session.execute(delete(CategoryToken).where(CategoryToken.user_id == user_id))
+    rows = [{'user_id': user_id, 'category_id': category_id, 'token': token, 'count': count}
+            for (category_id, token), count in counts.items()]
+    for offset in range(0, len(rows), 5000):
+        _upsert_counts(rows[offset:offset + 5000])
+    db.session.commit()
+    return trained
+
+
+@dataclass
+class CategoryModel:
+    """Naive Bayes model of the categories of one user."""
+    signature: tuple
+    category_ids: np.ndarray
+    vocabulary: dict[str, int]
+    log_priors: np.ndarray
+    log_likelihoods: np.ndarray
+    """Matrix of shape (vocabulary, categories) with the log probability of every word in every category."""
+
+    def score(self, descriptions: list[str | None]) -> np.ndarray:
+        """Returns the matrix of log posterior scores of shape (descriptions, categories)."""
+        rows, columns, counts = [], [], []
+        for row, description in enumerate(descriptions):
+            for token, count in description_tokens(description).items():
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    counts.append(count)
+
+        scores = np.tile(self.log_priors, (len(descriptions), 1))
+        if rows:
+            np.add.at(scores, np.array(rows), self.log_likelihoods[np.array(columns)] * np.array(counts)[:, None])
+        return scores
+
+
+_models: dict[int, CategoryModel] = {}
+"""In-process classifier models by user ID."""
+_models_lock = threading.Lock()
+"""Lock guarding `_models`."""
+
+
+def _load_model(user_id: int) -> CategoryModel | None:
+    """Returns the classifier model of a user, rebuilding it from the stored counts when they changed.
+
+    The model is current while the number of rows, the total count and the sum of the versions of the user's
+    counts are unchanged. Counts moved between categories or words keep the first two, but not the versions.
+    """
+    signature = tuple(db.session.execute(
+        select(func.count(), func.sum(CategoryToken.count), func.sum(CategoryToken.version))
+        .where(CategoryToken.user_id == user_id)
+    ).one())
+    if not signature[0]:
+        return None
+
+    with _models_lock:
+        model = _models.get(user_id)
+    if model is not None and model.signature == signature:
+        return model
+
+    rows = db.session.execute(
+        select(CategoryToken.category_id, CategoryToken.token, CategoryToken.count).where(
+            CategoryToken.user_id == user_id)
+    ).all()
+    category_ids = sorted({row.category_id for row in rows})
+    category_index = {category_id: index for index, category_id in enumerate(category_ids)}
+    vocabulary = {}
+    for row in rows:
+        if row.token != DOCUMENT_TOKEN and row.token not in vocabulary:
+            vocabulary[row.token] = len(vocabulary)
+
+    documents = np.zeros(len(category_ids))
+    word_counts = np.zeros((len(vocabulary), len(category_ids)))
+    for row in rows:
+        if row.token == DOCUMENT_TOKEN:
+            documents[category_index[row.category_id]] = row.count
+        else:
+            word_counts[vocabulary[row.token], category_index[row.category_id]] = row.count
+
+    totals = word_counts.sum(axis=0) + SMOOTHING * max(len(vocabulary), 1)
+    model = CategoryModel(
+        signature=signature,
+        category_ids=np.array(category_ids),
+        vocabulary=vocabulary,
+        log_priors=np.log((documents + 1) / (documents.sum() + len(category_ids))),
+        log_likelihoods=np.log((word_counts + SMOOTHING) / totals)
+    )
+    with _models_lock:
+        _models[user_id] = model
+    return model
+
+
+def suggest_categories(user_id: int | str, descriptions: list[str | None], k: int,
+                       category_type: str | None = None) -> list[list[dict]]:
+    """Returns the top-k category guesses for each description.
+
+    The user's classifier is trained on first use if it has no training data yet. Categories without any
+    training transactions are not suggested.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        descriptions (list[str | None]): The descriptions to categorize.
+        k (int): The maximum number of guesses per description.
+        category_type (str, optional): Only categories of this type ('incomes' or 'expenses') are suggested.
+
+    Returns:
+        list[list[dict]]: For every description, up to k guesses with `category_id` and `probability`, ordered
+        from the most probable.
+    """
+    user_id = int(user_id)
+    model = _load_model(user_id)
+    if model is None and train_user(user_id):
+        model = _load_model(user_id)
+    if model is None:
+        return [[] for _ in descriptions]
+
+    allowed = select(Category.id).where(Category.user_id == user_id)
+    if category_type is not None:
+        allowed = allowed.where(Category.type == category_type)
+    mask = np.isin(model.category_ids, db.session.execute(allowed).scalars().all())
+    if not mask.any():
+        return [[] for _ in descriptions]
+
+    scores = model.score(descriptions)[:, mask]
+    category_ids = model.category_ids[mask]
+    scores -= scores.max(axis=1, keepdims=True)
+    probabilities = np.exp(scores)
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+    top = np.argsort(-probabilities, axis=1)[:, :k]
+    return [
+        [{'category_id': int(category_ids[column]), 'probability': round(float(probabilities[row, column]), 4)}
+         for column in top[row]]
+        for row in range(len(descriptions))
+    ]
@@ -0,0 +1,115 @@
+"""Records changes of synchronized records in the per-user change log.
+
+Every change gets the next number of the per-user change sequence, so a client that remembers the last
+sequence number it has seen can download only the records changed after it.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import Select, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.change_log_model import ChangeLog
+from app.models.change_sequence_model import ChangeSequence
+from app.utils.extensions import db
+
+ENTITIES = ('transaction', 'budget', 'category')
+"""Names of the synchronized entities."""
+
+
+def next_sequence(user_id: int) -> int:
+    """Increments and returns the change sequence number of a user.
+
+    The sequence row stays locked until the current transaction ends.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        int: The new sequence number.
+    """
+    stmt = insert(ChangeSequence).values(user_id=user_id, last_seq=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChangeSequence.user_id],
+        set_={'last_seq': ChangeSequence.last_seq + 1}
+    ).returning(ChangeSequence.last_seq)
+    return db.session.execute(stmt).scalar_one()
+
+
+def current_sequence(user_id: int) -> int:
+    """Returns the last change sequence number of a user, 0 if nothing was recorded yet."""
+    sequence = db.session.get(ChangeSequence, user_id)
+    return sequence.last_seq if sequence else 0
+
+
+def record_changes(user_id: int | str, entity: str, entity_ids: Iterable[int] | Select,
+                   operation: str = 'upsert') -> None:
+    """Records a change of several records of one entity under a single sequence number.
+
+    The change is added to the current session and is committed together with the change itself.
+
+    Args:
+        user_id (int | str): The ID of the user owning the records.
+        entity (str): The name of the entity, one of `ENTITIES`.
+        entity_ids (Iterable[int] | Select): The IDs of the changed records or a select statement returning them.
+        operation (str): Either 'upsert' or 'delete'.
+    """
+    user_id = int(user_id)
+
+    if isinstance(entity_ids, Select):
+        ids = entity_ids.subquery()
+        stmt = insert(ChangeLog).from_select(
+            ['user_id', 'entity', 'entity_id', 'seq', 'operation'],
+            select(literal(user_id), literal(entity), ids.c[0], literal(next_sequence(user_id)), literal(operation))
+        )
+    else:
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return
+        seq = next_sequence(user_id)
+        stmt = insert(ChangeLog).values([
+            {'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'seq': seq, 'operation': operation}
+            for entity_id in entity_ids
+        ])
+
+    _upsert_log(stmt)
+
+
+def record_changes_of_users(entity: str, entity_ids: dict[int, Iterable[int]], operation: str = 'upsert') -> None:
+    """Records changes of records of many users, e.g. of a background job, with a constant number of statements.
+
+    The records of every user get a single new sequence number of that user.
+
+    Args:
+        entity (str): The name of the entity, one of `ENTITIES`.
+        entity_ids (dict[int, Iterable[int]]): The IDs of the changed records by the ID of the user owning them.
+        operation (str): Either 'upsert' or 'delete'.
+    """
+    entity_ids = {int(user_id): list(ids) for user_id, ids in entity_ids.items() if ids}
+    if not entity_ids:
+        return
+
+    stmt = insert(ChangeSequence).values([{'user_id': user_id, 'last_seq': 1} for user_id in sorted(entity_ids)])
+    sequences = dict(db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[ChangeSequence.user_id],
+        set_={'last_seq': ChangeSequence.last_seq + 1}
+    ).returning(ChangeSequence.user_id, ChangeSequence.last_seq)).all())
+
+    _upsert_log(insert(ChangeLog).values([
+        {'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'seq': sequences[user_id],
+         'operation': operation}
+        for user_id, ids in entity_ids.items() for entity_id in ids
+    ]))
+
+
+def _upsert_log(stmt) -> None:
+    """Executes an insert into the change log replacing the earlier changes of the same records."""
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[ChangeLog.user_id, ChangeLog.entity, ChangeLog.entity_id],
+        set_={'seq': stmt.excluded.seq, 'operation': stmt.excluded.operation, 'changed_at': stmt.excluded.changed_at}
+    ))
+
+
+def record_change(user_id: int | str, entity: str, entity_id: int, operation: str = 'upsert') -> None:
+    """Records a change of a single record, see `record_changes`."""
+    record_changes(user_id, entity, [entity_id], operation)
@@ -0,0 +1,205 @@
+"""Detects duplicate transactions and replays responses of retried requests.
+
+Every transaction has a normalized fingerprint (budget, amount, day and description) stored in the
+`transaction_fingerprint` table, whose primary key makes it unique per user, so checking a new transaction is a
+single index probe. Requests sent with an `Idempotency-Key` header are recorded in the `idempotency_key` table,
+so a retried request returns the stored response instead of being executed again.
+"""
+
+import datetime
+import hashlib
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.idempotency_key_model import IdempotencyKey
+from app.models.transaction_fingerprint_model import TransactionFingerprint
+from app.models.transaction_model import Transaction
+from app.services.search import tokenize
+from app.utils.extensions import db
+
+CLAIM_ATTEMPTS = 3
+"""Attempts of `claim_fingerprint` to store a fingerprint released concurrently by the transaction having it."""
+
+
+def transaction_fingerprint(budget_id: int, amount, created_at: datetime.datetime, description: str | None) -> int:
+    """Returns the fingerprint of a transaction as a signed 64-bit integer.
+
+    The description is compared by its lowercase words, so differences in case, spacing and punctuation do not
+    change the fingerprint.
+
+    Args:
+        budget_id (int): The ID of the budget of the transaction.
+        amount: The amount of the transaction.
+        created_at (datetime.datetime): The date and time of the transaction, only the day is used.
+        description (str, optional): The description of the transaction.
+
+    Returns:
+        int: The first 8 bytes of the SHA-256 hash of the normalized fields.
+    """
+    normalized = '|'.join((
+        str(int(budget_id)),
+        str(Decimal(str(amount)).quantize(Decimal('0.01'))),
+        created_at.date().isoformat(),
+        ' '.join(tokenize(description))
+    ))
+    return int.from_bytes(hashlib.sha256(normalized.encode()).digest()[:8], 'big', signed=True)
+
+
+def claim_fingerprint(user_id: int | str, transaction: Transaction) -> int | None:
+    """Stores the fingerprint of a flushed transaction unless another transaction of the user already has it.
+
+    A fingerprint belongs to a single transaction, so a duplicate kept with `on_duplicate=allow` has none. It is
+    not detected as the original of later duplicates, and keeps no fingerprint when the original is changed or
+    deleted, until `flask backfill-fingerprints` stores one for it.
+
+    If the transaction having the fingerprint releases it concurrently, between the insert and the lookup of its
+    owner, the insert is retried up to `CLAIM_ATTEMPTS` times. A transaction still without an owner found then is
+    kept without a fingerprint, like an allowed duplicate.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        transaction (Transaction): The transaction, it must already have an ID.
+
+    Returns:
+        int | None: The ID of the transaction already having the fingerprint, None if the fingerprint was stored
+        or its owner was not found.
+    """
+    user_id = int(user_id)
+    fingerprint = transaction_fingerprint(transaction.budget_id, transaction.amount, transaction.created_at,
+                                          transaction.description)
+    for _ in range(CLAIM_ATTEMPTS):
+        inserted = db.session.execute(
+            insert(TransactionFingerprint).values(
+                user_id=user_id,
+                fingerprint=fingerprint,
+                transaction_id=transaction.id,
+                budget_id=transaction.budget_id
+            ).on_conflict_do_nothing().returning(TransactionFingerprint.transaction_id)
+        ).first()
+        if inserted is not None:
+            return None
+
+        owner = db.session.execute(
+            select(TransactionFingerprint.transaction_id).where(
+                TransactionFingerprint.user_id == user_id,
+                TransactionFingerprint.fingerprint == fingerprint
+            )
+        ).scalar()
+        if owner is not None:
+            return owner
+    return None
+
+
+def release_fingerprint(transaction_id: int) -> None:
+    """Removes the fingerprint of a transaction, e.g. before it is changed or deleted."""
+    db.session.execute(delete(TransactionFingerprint).where(TransactionFingerprint.transaction_id == transaction_id))
+
+
+def store_fingerprints(transactions) -> None:
+    """Stores fingerprints of many transactions with a single statement, keeping the existing ones.
+
+    Args:
+        transactions: Rows or objects with the `id`, `user_id`, `budget_id`, `amount`, `created_at` and
+            `description` of the transactions.
+    """
+    if not transactions:
+        return
+
+    db.session.execute(insert(TransactionFingerprint).values([{
+        'user_id': transaction.user_id,
+        'fingerprint': transaction_fingerprint(transaction.budget_id, transaction.amount, transaction.created_at,
+                                               transaction.description),
+        'transaction_id': transaction.id,
+        'budget_id': transaction.budget_id
+    } for transaction in transactions]).on_conflict_do_nothing())
+
+
+def backfill_fingerprints(batch_size: int) -> int:
+    """Stores fingerprints of all transactions that do not have one yet, e.g. created before fingerprinting.
+
+    Transactions are processed in batches ordered by ID, each batch in its own transaction.
+
+    Args:
+        batch_size (int): The number of transactions processed per batch.
+
+    Returns:
+        int: The number of processed transactions.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(
+                Transaction.id, Transaction.user_id, Transaction.budget_id, Transaction.amount,
+                Transaction.created_at, Transaction.description
+            ).where(Transaction.id > last_id).order_by(Transaction.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return processed
+
+        store_fingerprints(rows)
+        db.session.commit()
+
+        processed += len(rows)
+        last_id = rows[-1].id
+
+
+def claim_idempotency_key(user_id: int | str, key: str, request_hash: str, ttl: int) -> IdempotencyKey | None:
+    """Marks a request with the given idempotency key as being processed.
+
+    A key older than the TTL is treated as unused and is claimed again.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        key (str): The value of the `Idempotency-Key` header.
+        request_hash (str): The hash of the request method, path and body.
+        ttl (int): The number of seconds after which a key can be reused.
+
+    Returns:
+        IdempotencyKey | None: None if the key was claimed, otherwise the stored row of the earlier request.
+    """
+    user_id = int(user_id)
+    stmt = insert(IdempotencyKey).values(user_id=user_id, key=key, request_hash=request_hash)
+    claimed = db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+        set_={'request_hash': stmt.excluded.request_hash, 'status_code': None, 'response': None,
+              'created_at': func.now()},
+        where=IdempotencyKey.created_at < func.now() - datetime.timedelta(seconds=ttl)
+    ).returning(IdempotencyKey.key)).first() is not None
+    db.session.commit()
+
+    if claimed:
+        return None
+    return db.session.get(IdempotencyKey, (user_id, key))
+
+
+def store_idempotent_response(user_id: int | str, key: str, status_code: int, response: str) -> None:
+    """Stores the response of a request claimed with `claim_idempotency_key`."""
+    db.session.execute(
+        IdempotencyKey.__table__.update().where(
+            IdempotencyKey.user_id == int(user_id),
+            IdempotencyKey.key == key
+        ).values(status_code=status_code, response=response)
+    )
+    db.session.commit()
+
+
+def release_idempotency_key(user_id: int | str, key: str) -> None:
+    """Removes a claimed idempotency key, so the request can be retried, e.g. after a server error."""
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.user_id == int(user_id),
+        IdempotencyKey.key == key
+    ))
+    db.session.commit()
+
+
+def purge_idempotency_keys(ttl: int) -> int:
+    """Removes idempotency keys older than the TTL and returns their number."""
+    deleted = db.session.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.created_at < func.now() - datetime.timedelta(seconds=ttl)
+    )).rowcount
+    db.session.commit()
+    return deleted
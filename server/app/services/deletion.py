@@ -0,0 +1,278 @@
+"""Deletes budgets, categories and users in the background.
+
+A deleted record is hidden at once by setting its `deleted_at` column, which excludes it and the transactions
+referencing it from all ORM queries of the application. Its dependent rows are then deleted by the `run-deletions`
+worker in bounded batches, each in its own short transaction with a pause between batches, so a large deletion never
+holds locks for long or slows down requests of other users. The progress is stored in the `deletion_job` table.
+
+Transactions are hidden by the IDs of the records being deleted, which `logged_in_required` loads once per request
+only for a user with `User.pending_deletions`, so reads of transactions of all other users stay unchanged. Outside
+of requests, e.g. in the workers, the IDs are loaded from the unfinished jobs for every query.
+"""
+
+import datetime
+import time
+
+from flask import has_request_context, request
+from sqlalchemy import and_, delete, event, func, or_, select, tuple_, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.balance_snapshot_model import BalanceSnapshot
+from app.models.budget_model import Budget
+from app.models.budget_transfer_model import BudgetLedgerEntry, BudgetTransfer
+from app.models.category_model import Category
+from app.models.category_token_model import CategoryToken
+from app.models.change_log_model import ChangeLog
+from app.models.deletion_job_model import DeletionJob
+from app.models.idempotency_key_model import IdempotencyKey
+from app.models.recurring_rule_model import RecurringRule
+from app.models.transaction_fingerprint_model import TransactionFingerprint
+from app.models.transaction_model import Transaction
+from app.models.user_model import User
+from app.services.anomalies import update_category_stats
+from app.services.categorizer import learn_transactions
+from app.services.changelog import record_changes
+from app.services.fop_tax import invalidate_quarter_income
+from app.services.forecast import invalidate_forecast
+from app.utils.extensions import db
+from app.utils.query_observer import EXTRA_QUERIES
+
+ENTITIES = {'budget': Budget, 'category': Category, 'user': User}
+"""Models that are deleted in the background by entity name."""
+
+DEPENDENTS = {
+    'budget': (
+        (TransactionFingerprint, TransactionFingerprint.budget_id),
+        (Transaction, Transaction.budget_id),
+        (ArchivedTransaction, ArchivedTransaction.budget_id),
+        (BalanceSnapshot, BalanceSnapshot.budget_id),
+        (BudgetLedgerEntry, BudgetLedgerEntry.budget_id),
+        (RecurringRule, RecurringRule.budget_id),
+    ),
+    'category': (
+        (CategoryToken, CategoryToken.category_id),
+    ),
+    'user': (
+        (TransactionFingerprint, TransactionFingerprint.user_id),
+        (Transaction, Transaction.user_id),
+        (ArchivedTransaction, ArchivedTransaction.user_id),
+        (ChangeLog, ChangeLog.user_id),
+        (CategoryToken, CategoryToken.user_id),
+        (IdempotencyKey, IdempotencyKey.user_id),
+        (BudgetTransfer, BudgetTransfer.user_id),
+        (RecurringRule, RecurringRule.user_id),
+    ),
+}
+"""Large dependent tables deleted in batches before the record itself, whose deletion cascades to the rest."""
+
+TRANSACTION_COLUMNS = ('user_id', 'category_id', 'amount', 'description', 'type', 'created_at')
+"""Columns of the deleted transactions of a budget needed to remove them from the monthly category expenses and the
+training data of the category suggestions."""
+
+HIDDEN_PARENTS = 'app.hidden_parents'
+"""WSGI environ key of the IDs of the budgets and categories of the user being deleted, by entity name.
+
+Set for every request authenticated by `logged_in_required` and shared with its nested requests."""
+
+PARENT_COLUMNS = {
+    Transaction: {'budget': Transaction.budget_id, 'category': Transaction.category_id, 'user': Transaction.user_id},
+    ArchivedTransaction: {'budget': ArchivedTransaction.budget_id, 'category': ArchivedTransaction.category_id,
+                          'user': ArchivedTransaction.user_id},
+}
+"""Columns of the transaction models referencing the records of each entity."""
+
+
+def load_hidden_parents(session: Session, user_id: int | None = None) -> dict[str, list[int]]:
+    """Returns the IDs of the records of the unfinished deletion jobs by entity name, of one user or of all users."""
+    query = select(DeletionJob.entity, DeletionJob.entity_id).where(DeletionJob.status != 'done')
+    if user_id is not None:
+        query = query.where(DeletionJob.user_id == user_id, DeletionJob.entity != 'user')
+    hidden = {}
+    for entity, entity_id in session.execute(query.execution_options(include_deleted=True)):
+        hidden.setdefault(entity, []).append(entity_id)
+    return hidden
+
+
+def hide_pending_deletions(user: User) -> None:
+    """Stores the records of the user being deleted in the current request, for `_hide_deleted`.
+
+    The deletion jobs are only queried for a user with `pending_deletions`, every other user gets no IDs. The query
+    is counted in `EXTRA_QUERIES`, as the query budgets of the views are meant for users without deletions.
+    """
+    if not user.pending_deletions:
+        request.environ[HIDDEN_PARENTS] = {}
+        return
+    request.environ[HIDDEN_PARENTS] = load_hidden_parents(db.session, user.id)
+    request.environ[EXTRA_QUERIES] = request.environ.get(EXTRA_QUERIES, 0) + 1
+
+
+def _hidden_parents(session: Session) -> dict[str, list[int]]:
+    """Returns the IDs of the records being deleted that transactions are hidden by, see the module documentation."""
+    if has_request_context():
+        return request.environ.get(HIDDEN_PARENTS, {})
+    return load_hidden_parents(session)
+
+
+def _has_no_hidden_parent(model, hidden: dict[str, list[int]]):
+    """Criteria of transactions whose budget, category and user are not among the hidden records."""
+    return and_(*(column.not_in(hidden[entity]) for entity, column in PARENT_COLUMNS[model].items()
+                  if hidden.get(entity)))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_deleted(state) -> None:
+    """Excludes records being deleted from ORM queries unless the `include_deleted` execution option is set.
+
+    Hot and archived transactions of a record being deleted are excluded as well, so every read of them, including
+    the aggregates over `combined_transactions`, agrees with the hidden record. They are filtered by the IDs of
+    `_hidden_parents`, so no criteria are added for users without deletions in progress.
+    """
+    if not state.is_select or state.is_relationship_load or state.is_column_load:
+        return
+    if state.execution_options.get('include_deleted', False):
+        return
+
+    options = [with_loader_criteria(model, model.deleted_at.is_(None), include_aliases=True)
+               for model in ENTITIES.values()]
+    hidden = _hidden_parents(state.session)
+    if any(hidden.values()):
+        options += [with_loader_criteria(model, _has_no_hidden_parent(model, hidden), include_aliases=True)
+                    for model in PARENT_COLUMNS]
+    state.statement = state.statement.options(*options)
+
+
+def schedule_deletion(entity: str, record: Budget | Category | User) -> DeletionJob:
+    """Hides a record and creates the job deleting it in the background.
+
+    Recurring rules of the record are deactivated, so no new transactions are created for it. The transactions
+    of a budget or user are hidden together with it, so the cached quarter incomes and forecasting model of the
+    user are removed. A budget or category is counted in `User.pending_deletions` until its job is done, and
+    hidden for the rest of the current request. The changes are added to the current session and are committed
+    by the caller.
+
+    Args:
+        entity (str): The name of the entity, one of `ENTITIES`.
+        record (Budget | Category | User): The record to delete.
+
+    Returns:
+        DeletionJob: The created job.
+    """
+    record.deleted_at = datetime.datetime.now()
+    if entity != 'user':
+        db.session.execute(update(User).where(User.id == record.user_id).values(
+            pending_deletions=User.pending_deletions + 1
+        ))
+    if has_request_context() and HIDDEN_PARENTS in request.environ:
+        request.environ[HIDDEN_PARENTS].setdefault(entity, []).append(record.id)
+    if entity in ('budget', 'user'):
+        rule_column = RecurringRule.budget_id if entity == 'budget' else RecurringRule.user_id
+        db.session.execute(update(RecurringRule).where(rule_column == record.id).values(active=False))
+        invalidate_quarter_income(record.user_id if entity == 'budget' else record.id)
+        invalidate_forecast(record.user_id if entity == 'budget' else record.id)
+
+    job = DeletionJob(
+        user_id=record.id if entity == 'user' else record.user_id,
+        entity=entity,
+        entity_id=record.id,
+        status='pending',
+        deleted_rows=0
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def _delete_batch(model, column, entity_id: int, batch_size: int, returning: tuple = ()) -> list:
+    """Deletes up to `batch_size` rows of a dependent table and returns their primary keys and `returning` columns."""
+    table = model.__table__
+    primary_key = list(table.primary_key.columns)
+    return db.session.execute(
+        delete(table).where(
+            tuple_(*primary_key).in_(select(*primary_key).where(column == entity_id).limit(batch_size))
+        ).returning(*primary_key, *(table.c[name] for name in returning))
+    ).all()
+
+
+def _claim_job(stale_after: int) -> DeletionJob | None:
+    """Marks the oldest pending job, or a running job abandoned by a stopped worker, as running."""
+    now = datetime.datetime.now()
+    job = DeletionJob.query.filter(or_(
+        DeletionJob.status == 'pending',
+        (DeletionJob.status == 'running') & (DeletionJob.updated_at < now - datetime.timedelta(seconds=stale_after))
+    )).order_by(DeletionJob.id).with_for_update(skip_locked=True).first()
+    if job is not None:
+        job.status = 'running'
+        job.updated_at = now
+    db.session.commit()
+    return job
+
+
+def process_deletion_job(job: DeletionJob, batch_size: int, pause: float) -> None:
+    """Deletes the dependent rows of a job in batches and then the record itself.
+
+    Every batch is committed separately together with the progress of the job, so a stopped job is resumed
+    by the next worker. Deleted transactions of a budget are removed from the statistics of their categories and
+    from the training data of the category suggestions, and their tombstones are recorded in the change log, in
+    the transaction of their batch. The statistics and training data of a deleted user go with their categories.
+
+    Args:
+        job (DeletionJob): The claimed job.
+        batch_size (int): The maximum number of rows deleted per batch.
+        pause (float): The number of seconds to sleep between batches.
+    """
+    dependents = DEPENDENTS[job.entity]
+    if job.total_rows is None:
+        job.total_rows = 1 + sum(
+            db.session.execute(
+                select(func.count()).select_from(model).where(column == job.entity_id)
+                .execution_options(include_deleted=True)
+            ).scalar()
+            for model, column in dependents
+        )
+        db.session.commit()
+
+    for model, column in dependents:
+        transactions = job.entity == 'budget' and model in (Transaction, ArchivedTransaction)
+        while True:
+            rows = _delete_batch(model, column, job.entity_id, batch_size,
+                                 TRANSACTION_COLUMNS if transactions else ())
+            if transactions and rows:
+                update_category_stats(rows, -1)
+                learn_transactions(rows, -1)
+                record_changes(job.user_id, 'transaction', [row.id for row in rows], 'delete')
+            job.deleted_rows += len(rows)
+            job.updated_at = datetime.datetime.now()
+            db.session.commit()
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause)
+
+    model = ENTITIES[job.entity]
+    db.session.execute(delete(model.__table__).where(model.__table__.c.id == job.entity_id))
+    if job.entity != 'user':
+        db.session.execute(update(User).where(User.id == job.user_id).values(
+            pending_deletions=User.pending_deletions - 1
+        ))
+    job.deleted_rows += 1
+    job.status = 'done'
+    job.updated_at = job.finished_at = datetime.datetime.now()
+    db.session.commit()
+
+
+def run_deletion_jobs(batch_size: int, pause: float, stale_after: int = 300) -> int:
+    """Processes all pending deletion jobs.
+
+    Args:
+        batch_size (int): The maximum number of rows deleted per batch.
+        pause (float): The number of seconds to sleep between batches.
+        stale_after (int): The number of seconds without progress after which a running job is taken over.
+
+    Returns:
+        int: The number of finished jobs.
+    """
+    finished = 0
+    while (job := _claim_job(stale_after)) is not None:
+        process_deletion_job(job, batch_size, pause)
+        finished += 1
+    return finished
@@ -0,0 +1,189 @@
+"""Computes the single tax of a FOP (individual entrepreneur) from the recorded income of the user.
+
+Income transactions are summed per quarter in the database with one grouped query. Totals of closed quarters
+(before the current one) are cached in the `quarter_income` table, so only the current quarter is recomputed on
+every request. The tax of every quarter is computed from the cumulative income of the year, so income above the
+yearly limit of the group is taxed at the increased rate in the quarter the limit is exceeded.
+"""
+
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, cast, column, delete, func, select, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.quarter_income_model import QuarterIncome
+from app.services.archive import combined_transactions
+from app.utils.extensions import db
+
+
+def quarter_start(day: datetime.date | datetime.datetime) -> datetime.date:
+    """Returns the first day of the quarter of a day."""
+    return datetime.date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+
+def next_quarter(start: datetime.date) -> datetime.date:
+    """Returns the first day of the quarter following the quarter starting on `start`."""
+    return datetime.date(start.year + 1, 1, 1) if start.month == 10 else start.replace(month=start.month + 3)
+
+
+def _compute_quarters(user_id: int, start: datetime.date, end: datetime.date) -> dict[datetime.date, Decimal]:
+    """Sums income transactions of a user per quarter, for quarters starting in `[start, end)`."""
+    transactions = combined_transactions()
+    quarter = cast(func.date_trunc('quarter', transactions.c.created_at), Date)
+    rows = db.session.execute(
+        select(quarter.label('quarter'), func.sum(transactions.c.amount).label('income')).where(
+            transactions.c.user_id == user_id,
+            transactions.c.type == 'income',
+            transactions.c.created_at >= start,
+            transactions.c.created_at < end
+        ).group_by(quarter)
+    ).all()
+    return {row.quarter: row.income for row in rows}
+
+
+def quarterly_income(user_id: int | str, year: int,
+                     today: datetime.date | None = None) -> list[tuple[datetime.date, Decimal]]:
+    """Returns the total income of a user for every quarter of a year up to the current quarter.
+
+    Cached totals are used for closed quarters, missing closed quarters are computed with a single query and
+    cached, while the current quarter is always recomputed.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        year (int): The year to return the quarters of.
+        today (datetime.date, optional): The current day, defaults to today.
+
+    Returns:
+        list[tuple[datetime.date, Decimal]]: Pairs of the first day of a quarter and its income, ordered by quarter.
+    """
+    user_id = int(user_id)
+    today = today or datetime.date.today()
+    current = quarter_start(today)
+    quarters = []
+    start = datetime.date(year, 1, 1)
+    while start.year == year and start <= current:
+        quarters.append(start)
+        start = next_quarter(start)
+    if not quarters:
+        return []
+
+    closed = [quarter for quarter in quarters if quarter < current]
+    incomes = {}
+    if closed:
+        incomes = {
+            row.quarter: row.income for row in QuarterIncome.query.filter(
+                QuarterIncome.user_id == user_id,
+                QuarterIncome.quarter >= closed[0],
+                QuarterIncome.quarter <= closed[-1]
+            )
+        }
+        missing = [quarter for quarter in closed if quarter not in incomes]
+        if missing:
+            computed = _compute_quarters(user_id, missing[0], next_quarter(missing[-1]))
+            computed = {quarter: computed.get(quarter, Decimal(0)) for quarter in missing}
+            db.session.execute(
+                insert(QuarterIncome).values([
+                    {'user_id': user_id, 'quarter': quarter, 'income': income}
+                    for quarter, income in computed.items()
+                ]).on_conflict_do_nothing()
+            )
+            db.session.commit()
+            incomes.update(computed)
+
+    if quarters[-1] == current:
+        incomes[current] = _compute_quarters(user_id, current, next_quarter(current)).get(current, Decimal(0))
+
+    return [(quarter, incomes[quarter]) for quarter in quarters]
+
+
+def invalidate_quarter_income(user_id: int | str,
+                              since: datetime.date | datetime.datetime | None = None) -> None:
+    """Removes cached quarter incomes of a user that are affected by a change dated on or after `since`.
+
+    The deletion is added to the current session and is committed together with the change itself.
+
+    Args:
+        user_id (int | str): The ID of the user whose cache should be invalidated.
+        since (datetime.date | datetime.datetime, optional): The date of the change. All cached quarters of the
+            user are removed if not provided.
+    """
+    query = QuarterIncome.query.filter(QuarterIncome.user_id == int(user_id))
+    if since is not None:
+        since = quarter_start(since)
+        if since >= quarter_start(datetime.date.today()):
+            return
+        query = query.filter(QuarterIncome.quarter >= since)
+
+    query.delete(synchronize_session=False)
+
+
+def invalidate_quarter_incomes(since: dict[int, datetime.date | datetime.datetime]) -> None:
+    """Removes cached quarter incomes of many users with a single statement, see `invalidate_quarter_income`.
+
+    Args:
+        since (dict[int, datetime.date | datetime.datetime]): The date of the earliest change by user ID.
+    """
+    current = quarter_start(datetime.date.today())
+    rows = [(user_id, quarter_start(day)) for user_id, day in since.items() if quarter_start(day) < current]
+    if not rows:
+        return
+
+    changes = values(column('user_id', BigInteger), column('since', Date), name='changes').data(rows)
+    db.session.execute(
+        delete(QuarterIncome).where(
+            QuarterIncome.user_id == changes.c.user_id,
+            QuarterIncome.quarter >= changes.c.since
+        )
+    )
+
+
+def fop_tax(quarters: list[tuple[datetime.date, Decimal]], rate: float, esc_rate: float, min_wage: float,
+            limit_wages: int, over_limit_rate: float) -> dict:
+    """Computes the single tax and the unified social contribution (ESC) of every quarter of a year.
+
+    Income up to the yearly limit is taxed at `rate` percent, income above it at `over_limit_rate` percent. The
+    ESC of a quarter is the minimal contribution, `esc_rate` percent of the minimum wage for each of its months.
+
+    Args:
+        quarters (list[tuple[datetime.date, Decimal]]): The income of every quarter, see `quarterly_income`.
+        rate (float): The tax rate of the group in percent.
+        esc_rate (float): The ESC rate in percent.
+        min_wage (float): The monthly minimum wage as of the beginning of the year.
+        limit_wages (int): The yearly income limit of the group in minimum wages.
+        over_limit_rate (float): The tax rate in percent of income above the limit.
+
+    Returns:
+        dict: The breakdown by quarter and the totals of the year.
+    """
+    limit = Decimal(str(min_wage)) * limit_wages
+    esc = Decimal(str(min_wage)) * Decimal(str(esc_rate)) / 100 * 3
+    cumulative = Decimal(0)
+    breakdown = []
+    for start, income in quarters:
+        within_limit = max(Decimal(0), min(income, limit - cumulative))
+        excess = income - within_limit
+        tax = (within_limit * Decimal(str(rate)) + excess * Decimal(str(over_limit_rate))) / 100
+        cumulative += income
+        breakdown.append({
+            'quarter': (start.month - 1) // 3 + 1,
+            'start': start.isoformat(),
+            'end': (next_quarter(start) - datetime.timedelta(days=1)).isoformat(),
+            'income': round(float(income), 2),
+            'cumulative_income': round(float(cumulative), 2),
+            'tax_amount': round(float(tax), 2),
+            'over_limit_income': round(float(excess), 2),
+            'unified_social_contribution': round(float(esc), 2),
+            'total_tax': round(float(tax + esc), 2)
+        })
+
+    totals = {
+        key: round(sum(quarter[key] for quarter in breakdown), 2)
+        for key in ('income', 'tax_amount', 'over_limit_income', 'unified_social_contribution', 'total_tax')
+    }
+    return {
+        'income_limit': round(float(limit), 2),
+        'limit_exceeded': cumulative > limit,
+        'quarters': breakdown,
+        'year': totals
+    }
@@ -0,0 +1,292 @@
+"""Forecasts the balance of a user from the trend and seasonality of every category.
+
+The net change of every category in every closed month is loaded with one grouped query into a matrix of shape
+(categories, months). Every category is fitted from its first month with a transaction, so months before it was used do
+not count as zero spending. A linear trend is fitted to all categories at once with the closed-form least squares over
+these months, and the seasonal component is the mean residual of every calendar month once at least two years of history
+of the category exist. The trend is damped beyond the history, so a long projection does not extrapolate a short-lived
+trend indefinitely. The fitted parameters are cached in the `forecast_model` table until a new month starts or a
+transaction in a closed month changes, so requests only project the cached model.
+"""
+
+import datetime
+
+import numpy as np
+from sqlalchemy import Date, case, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.budget_model import Budget
+from app.models.forecast_model_model import ForecastModel
+from app.services.archive import combined_transactions
+from app.services.balance_history import signed_amount
+from app.utils.extensions import db
+
+SEASONAL_MONTHS = 24
+"""Minimum number of history months to fit the seasonal component."""
+TREND_MONTHS = 3
+"""Minimum number of history months to fit the trend, a flat mean is used for shorter histories."""
+TREND_DAMPING = 0.9
+"""Factor the trend of every projected month beyond the history is multiplied with, relative to the previous one.
+
+The trend adds up to `TREND_DAMPING / (1 - TREND_DAMPING)` months of the fitted slope, however far the projection
+reaches."""
+Z_SCORE = 1.96
+"""Z-score of the 95% confidence interval."""
+
+
+def month_start(day: datetime.date | datetime.datetime) -> datetime.date:
+    """Returns the first day of the month of a day."""
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(start: datetime.date, months: int) -> datetime.date:
+    """Returns the first day of the month `months` months after the month starting on `start`."""
+    index = start.year * 12 + start.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _monthly_matrix(user_id: int, start: datetime.date, end: datetime.date) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the IDs of the categories of a user and their net change per month of `[start, end)`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The category IDs and the matrix of shape (categories, months).
+    """
+    transactions = combined_transactions()
+    month = cast(func.date_trunc('month', transactions.c.created_at), Date)
+    rows = db.session.execute(
+        select(transactions.c.category_id, month.label('month'), func.sum(signed_amount(transactions))).where(
+            transactions.c.user_id == user_id,
+            transactions.c.created_at >= start,
+            transactions.c.created_at < end
+        ).group_by(transactions.c.category_id, month)
+    ).all()
+
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if not rows:
+        return np.array([], dtype=np.int64), np.zeros((0, months))
+
+    category_column, month_column, amounts = zip(*rows)
+    category_ids, category_index = np.unique(np.array(category_column, dtype=np.int64), return_inverse=True)
+    month_index = np.array([(day.year - start.year) * 12 + day.month - start.month for day in month_column])
+    matrix = np.zeros((len(category_ids), months))
+    matrix[category_index, month_index] = np.array(amounts, dtype=float)
+    return category_ids, matrix
+
+
+def fit(category_ids: np.ndarray, matrix: np.ndarray, start: datetime.date) -> dict:
+    """Fits the trend and seasonal components of every category to a monthly matrix.
+
+    Every category is fitted from its first month with transactions, the months before it was used are ignored.
+    The residual standard deviation of the total net change per month is kept for the confidence intervals.
+
+    Args:
+        category_ids (np.ndarray): The IDs of the categories, the rows of the matrix.
+        matrix (np.ndarray): The net change of every category in every month, of shape (categories, months).
+        start (datetime.date): The first day of the first month of the matrix.
+
+    Returns:
+        dict: The JSON-serializable parameters of the model.
+    """
+    active = np.flatnonzero(matrix.any(axis=0))
+    if not len(active):
+        return {'start': start.isoformat(), 'months': 0, 'category_ids': [], 'coef': [[], []],
+                'seasonal': [[] for _ in range(12)], 'sigma': 0.0, 'avg_income': 0.0, 'avg_expense': 0.0}
+
+    history = matrix[:, active[0]:].T
+    start = add_months(start, int(active[0]))
+    months = history.shape[0]
+    t = np.arange(months)
+
+    # Months since the first transaction of every category, of shape (months, categories).
+    used = np.cumsum(history != 0, axis=0) > 0
+    count = used.sum(axis=0)
+    t_sum = (used * t[:, None]).sum(axis=0)
+    t_squares = (used * t[:, None] ** 2).sum(axis=0)
+    y_sum = history.sum(axis=0)
+    ty_sum = (t[:, None] * history).sum(axis=0)
+
+    slope = np.zeros(history.shape[1])
+    trending = count >= TREND_MONTHS
+    slope[trending] = ((count * ty_sum - t_sum * y_sum)[trending]
+                       / (count * t_squares - t_sum ** 2)[trending])
+    intercept = np.divide(y_sum - slope * t_sum, count, out=np.zeros_like(y_sum), where=count > 0)
+    coef = np.vstack([intercept, slope])
+    residuals = (history - coef[0] - np.outer(t, coef[1])) * used
+
+    seasonal = np.zeros((12, history.shape[1]))
+    if months >= SEASONAL_MONTHS:
+        calendar = (start.month - 1 + t) % 12
+        seasonal_count = np.zeros((12, history.shape[1]))
+        np.add.at(seasonal, calendar, residuals)
+        np.add.at(seasonal_count, calendar, used)
+        seasonal = np.divide(seasonal, seasonal_count, out=np.zeros_like(seasonal), where=seasonal_count > 0)
+        seasonal -= seasonal.mean(axis=0)
+        seasonal[:, count < SEASONAL_MONTHS] = 0
+        residuals -= seasonal[calendar] * used
+
+    totals = residuals.sum(axis=1)
+    sigma = float(totals.std(ddof=1)) if months > 1 else 0.0
+    return {
+        'start': start.isoformat(),
+        'months': months,
+        'category_ids': category_ids.tolist(),
+        'coef': coef.tolist(),
+        'seasonal': seasonal.tolist(),
+        'sigma': sigma,
+        'avg_income': float(np.clip(history, 0, None).sum(axis=1).mean()),
+        'avg_expense': float(-np.clip(history, None, 0).sum(axis=1).mean())
+    }
+
+
+def get_model(user_id: int | str, history_months: int, today: datetime.date | None = None) -> dict:
+    """Returns the parameters of the forecasting model of a user, fitting and caching it when needed.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        history_months (int): The maximum number of closed months the model is fitted from.
+        today (datetime.date, optional): The current day, defaults to today.
+
+    Returns:
+        dict: The parameters of the model, see `fit`.
+    """
+    user_id = int(user_id)
+    current = month_start(today or datetime.date.today())
+    cached = db.session.get(ForecastModel, user_id)
+    if cached is not None and cached.month == current:
+        return cached.params
+
+    start = add_months(current, -history_months)
+    params = fit(*_monthly_matrix(user_id, start, current), start)
+    stmt = insert(ForecastModel).values(user_id=user_id, month=current, params=params)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[ForecastModel.user_id],
+        set_={'month': stmt.excluded.month, 'params': stmt.excluded.params, 'fitted_at': func.now()}
+    ))
+    db.session.commit()
+    return params
+
+
+def project(params: dict, first_month: datetime.date, months: int) -> np.ndarray:
+    """Returns the projected net change of every category for consecutive months.
+
+    Months beyond the history continue the trend damped by `TREND_DAMPING`.
+
+    Args:
+        params (dict): The parameters of the model, see `fit`.
+        first_month (datetime.date): The first day of the first projected month.
+        months (int): The number of projected months.
+
+    Returns:
+        np.ndarray: The matrix of shape (months, categories).
+    """
+    if not params['months']:
+        return np.zeros((months, 0))
+
+    start = datetime.date.fromisoformat(params['start'])
+    offset = (first_month.year - start.year) * 12 + first_month.month - start.month
+    t = np.arange(offset, offset + months)
+    last = params['months'] - 1
+    ahead = np.maximum(t - last, 0)
+    trend_t = np.where(ahead > 0, last + TREND_DAMPING * (1 - TREND_DAMPING ** ahead) / (1 - TREND_DAMPING), t)
+    coef = np.array(params['coef'])
+    seasonal = np.array(params['seasonal'])
+    return coef[0] + np.outer(trend_t, coef[1]) + seasonal[(start.month - 1 + t) % 12]
+
+
+def forecast_balance(user_id: int | str, months: int, history_months: int,
+                     today: datetime.date | None = None) -> dict:
+    """Projects the total balance of the budgets of a user at the end of every coming month.
+
+    The current month is projected from the model as well, less the income and expenses already recorded in it.
+    Each is only subtracted up to its projection, so income or expenses beyond the projection, which are part of
+    the current balance already, do not change the rest of the month. The confidence interval widens with the
+    square root of the horizon, as monthly deviations add up.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        months (int): The number of months to project, the current month included.
+        history_months (int): The maximum number of closed months the model is fitted from.
+        today (datetime.date, optional): The current day, defaults to today.
+
+    Returns:
+        dict: The current balance, the averages of the history, the projection of every month and the
+        projected net change of every category.
+    """
+    user_id = int(user_id)
+    today = today or datetime.date.today()
+    current = month_start(today)
+    params = get_model(user_id, history_months, today)
+
+    transactions = combined_transactions()
+    recorded = select(
+        func.coalesce(func.sum(case((transactions.c.type == 'income', transactions.c.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((transactions.c.type == 'expense', transactions.c.amount), else_=0)), 0)
+    ).where(
+        transactions.c.user_id == user_id,
+        transactions.c.created_at >= current
+    ).subquery()
+    recorded_income, recorded_expense, balance = db.session.execute(
+        select(
+            *recorded.c,
+            select(func.coalesce(func.sum(Budget.current), 0)).where(Budget.user_id == user_id).scalar_subquery()
+        )
+    ).one()
+
+    projected = project(params, current, months)
+    net = projected.sum(axis=1)
+    projected_income = float(np.clip(projected[0], 0, None).sum())
+    projected_expense = float(-np.clip(projected[0], None, 0).sum())
+    net[0] = (max(projected_income - float(recorded_income), 0.0)
+              - max(projected_expense - float(recorded_expense), 0.0))
+    balances = float(balance) + np.cumsum(net)
+    margins = Z_SCORE * params['sigma'] * np.sqrt(np.arange(1, months + 1))
+
+    return {
+        'current_balance': round(float(balance), 2),
+        'avg_monthly_income': round(params['avg_income'], 2),
+        'avg_monthly_expense': round(params['avg_expense'], 2),
+        'monthly_surplus': round(params['avg_income'] - params['avg_expense'], 2),
+        'forecasted_balance': round(float(balances[-1]), 2),
+        'months': [
+            {
+                'month': add_months(current, index).strftime('%Y-%m'),
+                'net': round(float(net[index]), 2),
+                'balance': round(float(balances[index]), 2),
+                'lower': round(float(balances[index] - margins[index]), 2),
+                'upper': round(float(balances[index] + margins[index]), 2)
+            }
+            for index in range(months)
+        ],
+        'categories': [
+            {'category_id': category_id, 'net': round(float(total), 2)}
+            for category_id, total in zip(params['category_ids'], projected.sum(axis=0))
+        ]
+    }
+
+
+def invalidate_forecast(user_id: int | str, since: datetime.date | datetime.datetime | None = None) -> None:
+    """Removes the cached forecasting model of a user if a change dated on or after `since` affects it.
+
+    The deletion is added to the current session and is committed together with the change itself.
+
+    Args:
+        user_id (int | str): The ID of the user whose model should be invalidated.
+        since (datetime.date | datetime.datetime, optional): The date of the change. The model is always
+            removed if not provided.
+    """
+    if since is not None and month_start(since) >= month_start(datetime.date.today()):
+        return
+    db.session.execute(delete(ForecastModel).where(ForecastModel.user_id == int(user_id)))
+
+
+def invalidate_forecasts(since: dict[int, datetime.date | datetime.datetime]) -> None:
+    """Removes the cached forecasting models of many users with a single statement, see `invalidate_forecast`.
+
+    Args:
+        since (dict[int, datetime.date | datetime.datetime]): The date of the earliest change by user ID.
+    """
+    current = month_start(datetime.date.today())
+    user_ids = [user_id for user_id, day in since.items() if month_start(day) < current]
+    if not user_ids:
+        return
+    db.session.execute(delete(ForecastModel).where(ForecastModel.user_id.in_(user_ids)))
@@ -0,0 +1,187 @@
+"""Manages the monthly range partitions of the transaction table.
+
+The transaction table is partitioned by `created_at`. Every month has its own partition named
+`transaction_yYYYYmMM`, and rows that do not fall into any of them land in the `transaction_default`
+partition. `ensure_transaction_partitions` creates partitions for upcoming months and moves rows out of the
+default partition into monthly partitions, so range queries on `created_at` only scan the months they cover.
+"""
+
+import datetime
+
+from sqlalchemy import text
+
+from app.utils.extensions import db
+
+PARENT_TABLE = 'public.transaction'
+"""Qualified name of the partitioned transaction table."""
+DEFAULT_PARTITION = 'transaction_default'
+"""Name of the partition holding rows outside of all monthly partitions."""
+PARTITIONS_LOCK_ID = 4_029_001
+"""Key of the advisory lock serializing partition maintenance between processes."""
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    """Returns the first day of the month of the given date."""
+    return day.replace(day=1)
+
+
+def add_months(day: datetime.date, months: int) -> datetime.date:
+    """Returns the first day of the month shifted by the given number of months."""
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    """Returns the name of the partition holding the given month."""
+    return f'transaction_y{month.year:04d}m{month.month:02d}'
+
+
+def _partition_exists(name: str) -> bool:
+    """Checks whether a table with the given name exists in the public schema."""
+    return db.session.execute(text('SELECT to_regclass(:name) IS NOT NULL'), {'name': f'public.{name}'}).scalar()
+
+
+def _create_partition(month: datetime.date) -> None:
+    """Creates the partition of the given month, moving its rows out of the default partition.
+
+    When the default partition holds no rows of the month, the partition is created directly. Otherwise the
+    rows are moved into a new table that is then attached as the partition, because a partition cannot be
+    created while the default partition holds rows belonging to it.
+
+    The transaction table, and with it the default partition, is locked against writes until the caller commits,
+    so no row of the month is inserted into the default partition between the check and the creation of the
+    partition. Reads are not blocked. The parent table is locked rather than the default partition, in the order
+    writes lock them, so the lock can not deadlock with a write.
+    """
+    name = partition_name(month)
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    bounds_sql = f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+
+    db.session.execute(text(f'LOCK TABLE {PARENT_TABLE} IN SHARE ROW EXCLUSIVE MODE'))
+    has_rows = db.session.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM public.{DEFAULT_PARTITION} '
+        'WHERE created_at >= :start AND created_at < :end)'
+    ), bounds).scalar()
+
+    if not has_rows:
+        db.session.execute(text(f'CREATE TABLE public.{name} PARTITION OF {PARENT_TABLE} {bounds_sql}'))
+        return
+
+    db.session.execute(text(
+        f'CREATE TABLE public.{name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    ))
+    db.session.execute(text(
+        f'WITH moved AS (DELETE FROM public.{DEFAULT_PARTITION} '
+        'WHERE created_at >= :start AND created_at < :end RETURNING *) '
+        f'INSERT INTO public.{name} SELECT * FROM moved'
+    ), bounds)
+    db.session.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION public.{name} {bounds_sql}'))
+
+
+def ensure_transaction_partitions(months_ahead: int, today: datetime.date | None = None) -> list[str]:
+    """Creates the missing monthly partitions of the transaction table.
+
+    Partitions are created for the current month, the given number of months ahead and every month that still
+    has rows in the default partition. Each partition is created in its own transaction, together with moving
+    its rows out of the default partition.
+
+    Args:
+        months_ahead (int): How many months after the current one should have a partition.
+        today (datetime.date, optional): The current date, defaults to today.
+
+    Returns:
+        list[str]: Names of the created partitions.
+    """
+    db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITIONS_LOCK_ID})
+    db.session.execute(text(
+        f'CREATE TABLE IF NOT EXISTS public.{DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT'
+    ))
+    db.session.commit()
+
+    current = month_start(today or datetime.date.today())
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(
+        row[0].date() for row in db.session.execute(text(
+            f"SELECT DISTINCT date_trunc('month', created_at) FROM public.{DEFAULT_PARTITION}"
+        ))
+    )
+    db.session.commit()
+
+    created = []
+    for month in sorted(months):
+        db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITIONS_LOCK_ID})
+        if not _partition_exists(partition_name(month)):
+            _create_partition(month)
+            created.append(partition_name(month))
+        db.session.commit()
+
+    return created
+
+
+def migrate_transaction_table() -> None:
+    """Converts an existing plain transaction table into a partitioned one.
+
+    The existing table is renamed and attached as the default partition of a new partitioned table with the
+    same columns, constraints, indexes and sequence, so the migration does not copy any rows. The rows are moved
+    into monthly partitions afterwards by `ensure_transaction_partitions`, one month per transaction.
+    """
+    db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITIONS_LOCK_ID})
+    is_partitioned = db.session.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"
+    ), {'name': PARENT_TABLE}).scalar()
+    if is_partitioned:
+        db.session.rollback()
+        return
+
+    statements = (
+        f'LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE',
+        f'ALTER TABLE {PARENT_TABLE} RENAME TO {DEFAULT_PARTITION}',
+        f'ALTER TABLE public.{DEFAULT_PARTITION} RENAME CONSTRAINT transaction_pkey TO {DEFAULT_PARTITION}_pkey',
+        f'CREATE TABLE {PARENT_TABLE} (LIKE public.{DEFAULT_PARTITION} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        'PARTITION BY RANGE (created_at)',
+        f'ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT transaction_pkey PRIMARY KEY (id, created_at)',
+        f'ALTER TABLE {PARENT_TABLE} ADD FOREIGN KEY (user_id) REFERENCES public."user" (id) '
+        'ON UPDATE CASCADE ON DELETE CASCADE',
+        f'ALTER TABLE {PARENT_TABLE} ADD FOREIGN KEY (category_id) REFERENCES public.category (id) '
+        'ON UPDATE CASCADE',
+        f'ALTER TABLE {PARENT_TABLE} ADD FOREIGN KEY (budget_id) REFERENCES public.budget (id) '
+        'ON UPDATE CASCADE ON DELETE CASCADE',
+        f'CREATE INDEX transaction_user_id_created_at_idx ON {PARENT_TABLE} (user_id, created_at)',
+        f'CREATE INDEX transaction_budget_id_created_at_idx ON {PARENT_TABLE} (budget_id, created_at)',
+        f'CREATE INDEX transaction_category_id_idx ON {PARENT_TABLE} (category_id)',
+        f'ALTER SEQUENCE IF EXISTS public.transaction_id_seq OWNED BY {PARENT_TABLE}.id',
+        f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION public.{DEFAULT_PARTITION} DEFAULT',
+    )
+    for statement in statements:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def drop_empty_partitions(before: datetime.date) -> list[str]:
+    """Drops the empty monthly partitions of months ending on or before the given date.
+
+    Args:
+        before (datetime.date): Only partitions of months ending on or before this day are dropped.
+
+    Returns:
+        list[str]: Names of the dropped partitions.
+    """
+    names = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent) AND c.relname ~ '^transaction_y[0-9]{4}m[0-9]{2}$'"
+    ), {'parent': PARENT_TABLE}).scalars().all()
+    db.session.commit()
+
+    dropped = []
+    for name in sorted(names):
+        month = datetime.date(int(name[13:17]), int(name[18:20]), 1)
+        if add_months(month, 1) > before:
+            continue
+
+        db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITIONS_LOCK_ID})
+        if not db.session.execute(text(f'SELECT EXISTS (SELECT 1 FROM public.{name})')).scalar():
+            db.session.execute(text(f'DROP TABLE public.{name}'))
+            dropped.append(name)
+        db.session.commit()
+
+    return dropped
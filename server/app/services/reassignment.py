@@ -0,0 +1,154 @@
+"""Moves transactions between categories and reports category usage with set-based statements.
+
+Transactions are moved with one UPDATE per transaction table (hot and archive), whatever their number. The
+change log, the training data of the category classifier and the running statistics of categories, all keyed on
+categories, are updated in bulk in the same database transaction.
+"""
+
+from types import SimpleNamespace
+
+from sqlalchemy import Select, exists, func, or_, select, update
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.category_model import Category
+from app.models.recurring_rule_model import RecurringRule
+from app.models.transaction_model import Transaction
+from app.services.anomalies import merge_category_stats, update_category_stats
+from app.services.archive import combined_transactions
+from app.services.categorizer import learn_transactions, move_counts
+from app.services.changelog import record_changes
+from app.services.forecast import invalidate_forecast
+from app.utils.extensions import db
+
+TRANSACTION_MODELS = (Transaction, ArchivedTransaction)
+"""Models of the tables holding transactions."""
+
+
+def transaction_type(category: Category) -> str:
+    """Returns the type of transactions a category of type 'incomes' or 'expenses' can hold."""
+    return 'income' if category.type == 'incomes' else 'expense'
+
+
+def category_in_use(category_id: int) -> bool:
+    """Checks with index probes whether any transaction belongs to the category.
+
+    Transactions hidden with a budget being deleted count too, as they reference the category until they are gone.
+    """
+    return db.session.execute(select(or_(*(
+        exists().where(model.category_id == category_id) for model in TRANSACTION_MODELS
+    ))).execution_options(include_deleted=True)).scalar()
+
+
+def category_stats_query(user_id: int | str) -> Select:
+    """Returns the query of `category_stats`, so it can also be executed by an asynchronous session."""
+    user_id = int(user_id)
+    transactions = combined_transactions()
+    count = func.count(transactions.c.id)
+    last_used_at = func.max(transactions.c.created_at)
+    return select(Category, count, func.coalesce(func.sum(transactions.c.amount), 0), last_used_at).outerjoin(
+        transactions,
+        (transactions.c.category_id == Category.id) & (transactions.c.user_id == user_id)
+    ).where(Category.user_id == user_id).group_by(Category.id).order_by(
+        count.desc(), last_used_at.desc().nulls_last(), Category.id
+    )
+
+
+def category_stats(user_id: int | str) -> list:
+    """Returns the categories of a user with their usage, computed by a single grouped LEFT JOIN.
+
+    Args:
+        user_id (int | str): The ID of the user.
+
+    Returns:
+        list: Rows of the category, the number of its transactions, their total amount and the creation date of
+        the latest one, ordered from the most used category.
+    """
+    return db.session.execute(category_stats_query(user_id)).all()
+
+
+def merge_categories(user_id: int | str, source: Category, target: Category) -> tuple[list[int], int]:
+    """Moves all transactions and recurring rules of a category into another category of the same type.
+
+    The changes are added to the current session and are committed by the caller.
+
+    Args:
+        user_id (int | str): The ID of the user owning both categories.
+        source (Category): The category to move the transactions from.
+        target (Category): The category to move the transactions to.
+
+    Returns:
+        tuple[list[int], int]: The IDs of the moved transactions and the number of moved recurring rules.
+    """
+    moved = []
+    for model in TRANSACTION_MODELS:
+        moved += db.session.execute(
+            update(model).where(
+                model.user_id == int(user_id),
+                model.category_id == source.id
+            ).values(category_id=target.id).returning(model.id).execution_options(synchronize_session=False)
+        ).scalars().all()
+
+    rules = db.session.execute(
+        update(RecurringRule).where(RecurringRule.category_id == source.id).values(category_id=target.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    move_counts(user_id, source.id, target.id)
+    merge_category_stats(user_id, source.id, target.id)
+    if moved:
+        invalidate_forecast(user_id)
+    record_changes(user_id, 'transaction', moved)
+    return moved, rules
+
+
+def reassign_transactions(user_id: int | str, transaction_ids: list[int], target: Category) -> list[int]:
+    """Moves the given transactions of a user into a category.
+
+    Transactions whose type does not match the type of the category, already in the category or not found are
+    skipped.
+
+    The changes are added to the current session and are committed by the caller.
+
+    Args:
+        user_id (int | str): The ID of the user owning the transactions and the category.
+        transaction_ids (list[int]): The IDs of the transactions to move.
+        target (Category): The category to move the transactions to.
+
+    Returns:
+        list[int]: The IDs of the moved transactions.
+    """
+    moved = []
+    for model in TRANSACTION_MODELS:
+        conditions = (
+            model.user_id == int(user_id),
+            model.id.in_(transaction_ids),
+            model.type == transaction_type(target),
+            model.category_id != target.id
+        )
+        rows = db.session.execute(
+            select(
+                model.id, model.user_id, model.category_id, model.description, model.amount, model.type,
+                model.created_at
+            ).where(*conditions).with_for_update()
+        ).all()
+        if not rows:
+            continue
+
+        db.session.execute(
+            update(model).where(*conditions).values(category_id=target.id)
+            .execution_options(synchronize_session=False)
+        )
+        moved_rows = [
+            SimpleNamespace(user_id=row.user_id, category_id=target.id, description=row.description,
+                            amount=row.amount, type=row.type, created_at=row.created_at)
+            for row in rows
+        ]
+        learn_transactions(rows, -1)
+        learn_transactions(moved_rows)
+        update_category_stats(rows, -1)
+        update_category_stats(moved_rows)
+        invalidate_forecast(user_id, min(row.created_at for row in rows))
+        moved += [row.id for row in rows]
+
+    record_changes(user_id, 'transaction', moved)
+    return moved
@@ -0,0 +1,245 @@
+"""Materializes due occurrences of recurring transactions in set-based batches.
+
+A batch of due rules of all users is locked with `FOR UPDATE SKIP LOCKED`, so several schedulers can run at the
+same time. All due occurrences of the batch, up to `max_catch_up` per rule, are inserted into the
+`recurring_occurrence` and `transaction` tables with a single statement. The primary key of
+`recurring_occurrence` makes every occurrence materialize only once, so the scheduler can catch up after downtime
+without creating duplicates. The net change of every affected budget is then applied with one UPDATE.
+"""
+
+import calendar
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import (BigInteger, ColumnElement, Interval, Numeric, case, column, func, literal_column, or_, select,
+                        true, update, values)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.models.budget_model import Budget
+from app.models.recurring_occurrence_model import RecurringOccurrence
+from app.models.recurring_rule_model import RecurringRule
+from app.models.transaction_model import Transaction
+from app.services.anomalies import update_category_stats
+from app.services.balance_history import invalidate_balance_histories
+from app.services.categorizer import learn_transactions
+from app.services.changelog import record_changes_of_users
+from app.services.deduplication import store_fingerprints
+from app.services.fop_tax import invalidate_quarter_incomes
+from app.services.forecast import invalidate_forecasts
+from app.utils.extensions import db
+
+TRANSACTION_ID_SEQUENCE = 'public.transaction_id_seq'
+"""Sequence of transaction IDs, IDs of materialized transactions are taken from it in advance."""
+
+UNIT_INTERVALS = {
+    'day': literal_column("INTERVAL '1 day'", Interval),
+    'week': literal_column("INTERVAL '1 week'", Interval),
+    'month': literal_column("INTERVAL '1 month'", Interval),
+    'year': literal_column("INTERVAL '1 year'", Interval),
+}
+"""SQL intervals of the interval units of recurring rules."""
+
+
+def occurrence_due_at(occurrence) -> ColumnElement:
+    """Returns the SQL expression of the due date of the given occurrence number of a rule."""
+    unit = case(UNIT_INTERVALS, value=RecurringRule.interval_unit)
+    return RecurringRule.start_at + unit * (occurrence * RecurringRule.interval_count)
+
+
+def _add_months(moment: datetime.datetime, months: int) -> datetime.datetime:
+    """Adds months to a date and time like PostgreSQL does, clamping the day to the length of the month."""
+    month = moment.month - 1 + months
+    year, month = moment.year + month // 12, month % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_due_date(rule: RecurringRule, occurrence: int) -> datetime.datetime:
+    """Returns the due date of the given occurrence number of a rule, like `occurrence_due_at` in SQL."""
+    count = occurrence * rule.interval_count
+    if rule.interval_unit in ('month', 'year'):
+        return _add_months(rule.start_at, count * 12 if rule.interval_unit == 'year' else count)
+    return rule.start_at + datetime.timedelta(days=count * 7 if rule.interval_unit == 'week' else count)
+
+
+def skip_missed_occurrences(rule: RecurringRule, now: datetime.datetime) -> None:
+    """Advances a rule to its first occurrence due after `now`, so the occurrences missed before are not created.
+
+    The skipped occurrence numbers are never materialized, as the scheduler only creates occurrences from
+    `RecurringRule.occurrences` on.
+    """
+    if rule.next_run_at > now:
+        return
+    if rule.interval_unit in ('month', 'year'):
+        months = (now.year - rule.start_at.year) * 12 + now.month - rule.start_at.month
+        step = rule.interval_count * (12 if rule.interval_unit == 'year' else 1)
+        occurrence = months // step
+    else:
+        step = datetime.timedelta(days=rule.interval_count * (7 if rule.interval_unit == 'week' else 1))
+        occurrence = (now - rule.start_at) // step
+    occurrence = max(occurrence, rule.occurrences)
+    while occurrence_due_date(rule, occurrence) <= now:
+        occurrence += 1
+    rule.occurrences = occurrence
+    rule.next_run_at = occurrence_due_date(rule, occurrence)
+
+
+def _due_rules(now: datetime.datetime):
+    """Returns the condition selecting active rules with at least one due occurrence."""
+    return (
+        RecurringRule.active,
+        RecurringRule.next_run_at <= now,
+        or_(RecurringRule.end_at.is_(None), RecurringRule.next_run_at <= RecurringRule.end_at)
+    )
+
+
+def _materialize(rule_ids: list[int], now: datetime.datetime, max_catch_up: int) -> list:
+    """Inserts the due occurrences of the given rules and their transactions, and advances the rules.
+
+    Args:
+        rule_ids (list[int]): The IDs of the locked rules.
+        now (datetime.datetime): Occurrences due at or before this moment are materialized.
+        max_catch_up (int): The maximum number of occurrences materialized per rule.
+
+    Returns:
+        list: The inserted transactions as rows.
+    """
+    numbers = func.generate_series(
+        RecurringRule.occurrences, RecurringRule.occurrences + max_catch_up - 1
+    ).table_valued('occurrence').lateral('numbers')
+    due_at = occurrence_due_at(numbers.c.occurrence)
+
+    occurrences = insert(RecurringOccurrence).from_select(
+        ['rule_id', 'occurrence', 'transaction_id', 'due_at'],
+        select(
+            RecurringRule.id, numbers.c.occurrence, func.nextval(TRANSACTION_ID_SEQUENCE), due_at
+        ).select_from(RecurringRule).join(numbers, true()).where(
+            RecurringRule.id.in_(rule_ids),
+            due_at <= now,
+            or_(RecurringRule.end_at.is_(None), due_at <= RecurringRule.end_at)
+        )
+    ).on_conflict_do_nothing().returning(
+        RecurringOccurrence.rule_id, RecurringOccurrence.transaction_id, RecurringOccurrence.due_at
+    ).cte('occurrences')
+
+    transactions = db.session.execute(
+        insert(Transaction).from_select(
+            ['id', 'user_id', 'category_id', 'budget_id', 'amount', 'description', 'created_at', 'type'],
+            select(
+                occurrences.c.transaction_id, RecurringRule.user_id, RecurringRule.category_id,
+                RecurringRule.budget_id, RecurringRule.amount, RecurringRule.description, occurrences.c.due_at,
+                RecurringRule.type
+            ).join(RecurringRule, RecurringRule.id == occurrences.c.rule_id)
+        ).returning(
+            Transaction.id, Transaction.user_id, Transaction.category_id, Transaction.budget_id,
+            Transaction.amount, Transaction.description, Transaction.created_at, Transaction.type
+        )
+    ).all()
+
+    last_occurrence = select(func.max(RecurringOccurrence.occurrence)).where(
+        RecurringOccurrence.rule_id == RecurringRule.id
+    ).scalar_subquery()
+    materialized = func.coalesce(last_occurrence + 1, RecurringRule.occurrences)
+    db.session.execute(
+        update(RecurringRule).where(RecurringRule.id.in_(rule_ids)).values(
+            occurrences=materialized,
+            next_run_at=occurrence_due_at(materialized)
+        ).execution_options(synchronize_session=False)
+    )
+
+    if not transactions:
+        return transactions
+
+    deltas = defaultdict(Decimal)
+    since = {}
+    user_since = {}
+    income_since = {}
+    changed = defaultdict(list)
+    for transaction in transactions:
+        deltas[transaction.budget_id] += transaction.amount if transaction.type == 'income' else -transaction.amount
+        since[transaction.budget_id] = min(since.get(transaction.budget_id, transaction.created_at),
+                                           transaction.created_at)
+        changed[transaction.user_id].append(transaction.id)
+        user_since[transaction.user_id] = min(user_since.get(transaction.user_id, transaction.created_at),
+                                              transaction.created_at)
+        if transaction.type == 'income':
+            income_since[transaction.user_id] = min(income_since.get(transaction.user_id, transaction.created_at),
+                                                    transaction.created_at)
+
+    budget_deltas = values(
+        column('budget_id', BigInteger), column('delta', Numeric(12, 2)), name='budget_deltas'
+    ).data(sorted(deltas.items()))
+    db.session.execute(
+        update(Budget).where(Budget.id == budget_deltas.c.budget_id).values(
+            current=Budget.current + budget_deltas.c.delta
+        ).execution_options(synchronize_session=False)
+    )
+
+    invalidate_balance_histories(since)
+    invalidate_quarter_incomes(income_since)
+    invalidate_forecasts(user_since)
+    record_changes_of_users('transaction', changed)
+    store_fingerprints(transactions)
+    learn_transactions(transactions)
+    update_category_stats(transactions)
+    return transactions
+
+
+def materialize_due_occurrences(batch_size: int, max_catch_up: int, now: datetime.datetime | None = None) -> int:
+    """Materializes all due occurrences of recurring rules of all users.
+
+    Every batch is committed separately. If a batch violates a constraint, e.g. an expense would make the
+    balance of a budget negative, its rules are retried one by one and the failing rules are deactivated.
+
+    Args:
+        batch_size (int): The number of rules processed per batch.
+        max_catch_up (int): The maximum number of occurrences materialized per rule and batch. Rules with more
+            due occurrences are picked up again by a later batch.
+        now (datetime.datetime, optional): Occurrences due at or before this moment are materialized. Defaults
+            to the current time.
+
+    Returns:
+        int: The number of created transactions.
+    """
+    now = now or datetime.datetime.now()
+    created = 0
+    while True:
+        rule_ids = db.session.execute(
+            select(RecurringRule.id).where(*_due_rules(now)).order_by(RecurringRule.id).limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not rule_ids:
+            db.session.commit()
+            return created
+
+        try:
+            created += len(_materialize(rule_ids, now, max_catch_up))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            created += _materialize_one_by_one(rule_ids, now, max_catch_up)
+
+
+def _materialize_one_by_one(rule_ids: list[int], now: datetime.datetime, max_catch_up: int) -> int:
+    """Materializes the given rules one by one, deactivating the rules that violate a constraint."""
+    created = 0
+    for rule_id in rule_ids:
+        locked = db.session.execute(
+            select(RecurringRule.id).where(RecurringRule.id == rule_id, *_due_rules(now))
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if locked is None:
+            db.session.rollback()
+            continue
+
+        try:
+            created += len(_materialize([rule_id], now, max_catch_up))
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            current_app.logger.warning('Deactivating recurring rule %s: %s', rule_id, e.orig)
+            db.session.execute(update(RecurringRule).where(RecurringRule.id == rule_id).values(active=False))
+            db.session.commit()
+    return created
@@ -0,0 +1,90 @@
+"""Brings the schema of the database up to the models of the application.
+
+The tables of the application were created by hand before the models of later features existed, so an existing
+database lacks their tables, columns and indexes. `upgrade_schema` adds whatever is missing, so it works on an
+empty database as well as on one of any earlier version, and running it again changes nothing:
+    - the enumerated types of `app.utils.types.enum_type` and the pg_trgm extension on PostgreSQL,
+    - missing tables, with their constraints and indexes,
+    - missing columns of existing tables, e.g. `deleted_at` of the budget, category and user tables, which must be
+      nullable or have a server default,
+    - missing indexes of existing tables.
+
+Existing columns, constraints and types are never changed or dropped. A plain transaction table of an older
+database is converted into the partitioned one separately by `flask migrate-partitions`.
+"""
+
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.dialects.postgresql import ENUM, CreateEnumType
+from sqlalchemy.schema import CreateColumn, Table
+
+from app.utils.extensions import db
+from app.utils.warmup import import_all_modules
+
+
+def _enum_types(tables: list[Table]) -> list[ENUM]:
+    """Returns the PostgreSQL enumerated types of the columns of the tables, each once."""
+    types = {}
+    for table in tables:
+        for column in table.columns:
+            if isinstance(column.type, ENUM):
+                types.setdefault(column.type.name, column.type)
+    return list(types.values())
+
+
+def _qualified_name(connection: Connection, table: Table) -> str:
+    """Returns the quoted name of a table in the schema it is translated to on the connection."""
+    preparer = connection.dialect.identifier_preparer
+    schema = connection.schema_for_object(table)
+    return f'{preparer.quote_schema(schema)}.{preparer.quote(table.name)}' if schema else preparer.quote(table.name)
+
+
+def upgrade_schema() -> list[str]:
+    """Creates the types, tables, columns and indexes of the models that are missing, in a single transaction.
+
+    Raises:
+        RuntimeError: If a missing column is NOT NULL without a server default, so existing rows can not get it.
+
+    Returns:
+        list[str]: The changes made, e.g. 'created table public.alert', empty if the schema was up to date.
+    """
+    import_all_modules()
+    tables = db.metadata.sorted_tables
+    changes = []
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            for enum in _enum_types(tables):
+                if not connection.execute(text('SELECT 1 FROM pg_type WHERE typname = :name'),
+                                          {'name': enum.name}).first():
+                    connection.execute(CreateEnumType(enum))
+                    changes.append(f'created type {enum.name}')
+
+        inspector = inspect(connection)
+        for table in tables:
+            name = _qualified_name(connection, table)
+            schema = connection.schema_for_object(table)
+            if not inspector.has_table(table.name, schema=schema):
+                table.create(connection)
+                changes.append(f'created table {name}')
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name, schema=schema)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f'Column {name}.{column.name} is NOT NULL without a server default')
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {name} ADD COLUMN {ddl}'))
+                changes.append(f'added column {name}.{column.name}')
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name, schema=schema)}
+            missing_indexes = sorted((index for index in table.indexes if index.name not in existing_indexes),
+                                     key=lambda index: index.name)
+            for index in missing_indexes:
+                index.create(connection)
+            if missing_indexes:
+                # Indexes of another dialect (`ddl_if`) are skipped, so only the ones now present are reported.
+                created = {index['name'] for index in inspect(connection).get_indexes(table.name, schema=schema)}
+                changes += [f'created index {index.name}' for index in missing_indexes if index.name in created]
+    return changes
@@ -0,0 +1,220 @@
+"""Full-text and fuzzy search over transaction descriptions.
+
+On PostgreSQL the search is backed by a GIN index over the `simple` tsvector of the description and a GIN
+trigram index, and results are ranked by `ts_rank` plus trigram similarity. Other databases (the SQLite
+stand-in) use an in-process inverted index per user, built lazily and rebuilt when the user's transactions
+change.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+
+from sqlalchemy import event, func, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.transaction_model import Transaction
+from app.services.archive import combined_transactions
+from app.utils.extensions import db
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+"""Pattern of the words of a description."""
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Splits a text into lowercase words."""
+    return TOKEN_PATTERN.findall(value.lower()) if value else []
+
+
+def trigrams(token: str) -> set[str]:
+    """Returns the trigrams of a padded word, as used by pg_trgm."""
+    padded = f'  {token} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def highlight(description: str | None, terms: list[str]) -> list[list[int]]:
+    """Returns the [start, end) offsets of the words of a description that match or start with a search term."""
+    if not description or not terms:
+        return []
+    return [
+        [match.start(), match.end()] for match in TOKEN_PATTERN.finditer(description)
+        if any(match.group().lower().startswith(term) for term in terms)
+    ]
+
+
+def _row_to_dict(row) -> dict:
+    """Converts a row of `combined_transactions` to the dictionary representation of a transaction."""
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'category_id': row.category_id,
+        'budget_id': row.budget_id,
+        'amount': float(row.amount) if row.amount is not None else None,
+        'description': row.description,
+        'created_at': row.created_at.isoformat(),
+        'type': row.type
+    }
+
+
+def _search_postgresql(user_id: int, query: str, offset: int, limit: int) -> tuple[int, list[tuple[dict, float]]]:
+    """Searches transactions with the tsvector and trigram GIN indexes."""
+    transactions = combined_transactions()
+    description = func.coalesce(transactions.c.description, '')
+    document = func.to_tsvector(literal_column("'simple'"), description)
+    ts_query = func.plainto_tsquery(literal_column("'simple'"), query)
+    escaped = query.replace('/', '//').replace('%', '/%').replace('_', '/_')
+    rank = (func.ts_rank(document, ts_query) + func.similarity(description, query)).label('rank')
+
+    rows = db.session.execute(
+        select(transactions, rank, func.count().over().label('total')).where(
+            transactions.c.user_id == user_id,
+            or_(
+                document.op('@@')(ts_query),
+                transactions.c.description.op('%')(query),
+                transactions.c.description.ilike(f'%{escaped}%', escape='/')
+            )
+        ).order_by(rank.desc(), transactions.c.created_at.desc()).offset(offset).limit(limit)
+    ).all()
+
+    total = rows[0].total if rows else 0
+    return total, [(_row_to_dict(row), float(row.rank)) for row in rows]
+
+
+@dataclass
+class InvertedIndex:
+    """In-process inverted index over the transaction descriptions of one user."""
+    signature: tuple
+    postings: dict[str, dict[int, int]] = field(default_factory=dict)
+    lengths: dict[int, int] = field(default_factory=dict)
+
+    def add(self, transaction_id: int, description: str | None) -> None:
+        """Adds the words of a transaction description to the index."""
+        tokens = tokenize(description)
+        self.lengths[transaction_id] = len(tokens)
+        for token in tokens:
+            postings = self.postings.setdefault(token, {})
+            postings[transaction_id] = postings.get(transaction_id, 0) + 1
+
+    def search(self, terms: list[str]) -> dict[int, float]:
+        """Scores the indexed transactions against the search terms with tf-idf.
+
+        Exact word matches get the full weight, words starting with a term and words with a trigram similarity
+        of at least 0.4 to a term get a weight reduced by the similarity.
+        """
+        scores = {}
+        documents = max(len(self.lengths), 1)
+        for term in terms:
+            term_trigrams = trigrams(term)
+            for token, postings in self.postings.items():
+                if token == term:
+                    weight = 1.0
+                elif token.startswith(term):
+                    weight = 0.75
+                else:
+                    token_trigrams = trigrams(token)
+                    weight = len(term_trigrams & token_trigrams) / len(term_trigrams | token_trigrams)
+                    if weight < 0.4:
+                        continue
+                    weight *= 0.5
+
+                idf = math.log(1 + documents / len(postings))
+                for transaction_id, count in postings.items():
+                    tf = count / self.lengths[transaction_id]
+                    scores[transaction_id] = scores.get(transaction_id, 0.0) + weight * tf * idf
+        return scores
+
+
+_indexes: dict[int, InvertedIndex] = {}
+"""In-process inverted indexes by user ID."""
+_indexes_lock = threading.Lock()
+"""Lock guarding `_indexes`."""
+
+
+def _get_index(user_id: int) -> InvertedIndex:
+    """Returns the inverted index of a user, rebuilding it if the user's transactions changed."""
+    transactions = combined_transactions()
+    signature = tuple(db.session.execute(
+        select(func.count(), func.max(transactions.c.id)).where(transactions.c.user_id == user_id)
+    ).one())
+
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+    if index is not None and index.signature == signature:
+        return index
+
+    index = InvertedIndex(signature)
+    for transaction_id, description in db.session.execute(
+            select(transactions.c.id, transactions.c.description).where(transactions.c.user_id == user_id)):
+        index.add(transaction_id, description)
+
+    with _indexes_lock:
+        _indexes[user_id] = index
+    return index
+
+
+def _search_in_process(user_id: int, query: str, offset: int, limit: int) -> tuple[int, list[tuple[dict, float]]]:
+    """Searches transactions with the in-process inverted index of the user."""
+    scores = _get_index(user_id).search(tokenize(query))
+    if not scores:
+        return 0, []
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[offset:offset + limit]
+    transactions = combined_transactions()
+    rows = {
+        row.id: row for row in db.session.execute(
+            select(transactions).where(transactions.c.id.in_([transaction_id for transaction_id, _ in ranked]))
+        )
+    }
+    return len(scores), [(_row_to_dict(rows[transaction_id]), score)
+                         for transaction_id, score in ranked if transaction_id in rows]
+
+
+def search_transactions(user_id: int | str, query: str, page: int, per_page: int) -> tuple[int, list[dict]]:
+    """Searches the transactions of a user by description.
+
+    Args:
+        user_id (int | str): The ID of the user.
+        query (str): The search text.
+        page (int): The number of the page, starting from 1.
+        per_page (int): The number of results per page.
+
+    Returns:
+        tuple[int, list[dict]]: The total number of matches and the transactions of the page, ranked by relevance,
+        each with its `rank` and the `highlights` offsets of the matching words in the description.
+    """
+    user_id = int(user_id)
+    offset = (page - 1) * per_page
+    if db.session.get_bind().dialect.name == 'postgresql':
+        total, results = _search_postgresql(user_id, query, offset, per_page)
+    else:
+        total, results = _search_in_process(user_id, query, offset, per_page)
+
+    terms = tokenize(query)
+    return total, [
+        {**transaction, 'rank': round(rank, 6), 'highlights': highlight(transaction['description'], terms)}
+        for transaction, rank in results
+    ]
+
+
+def create_search_indexes() -> None:
+    """Creates the pg_trgm extension and the search indexes on an existing transaction table."""
+    for statement in (
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        "CREATE INDEX IF NOT EXISTS transaction_description_tsv_idx ON public.transaction "
+        "USING gin (to_tsvector('simple', coalesce(description, '')))",
+        'CREATE INDEX IF NOT EXISTS transaction_description_trgm_idx ON public.transaction '
+        'USING gin (description gin_trgm_ops)',
+    ):
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_changed_indexes(session: Session, flush_context) -> None:
+    """Drops the in-process indexes of users whose transaction descriptions were changed in the session."""
+    changed = [obj for obj in (*session.new, *session.dirty, *session.deleted) if isinstance(obj, Transaction)]
+    if changed and _indexes:
+        with _indexes_lock:
+            for transaction in changed:
+                _indexes.pop(int(transaction.user_id), None)
@@ -0,0 +1,102 @@
+"""Moves money between budgets of a user.
+
+All budgets taking part in a set of transfers are locked in the order of their IDs, so concurrent transfers
+between the same budgets cannot deadlock. The net change of every budget is applied with a single UPDATE and
+every transfer is recorded as two linked ledger entries, all in the current database transaction.
+"""
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Numeric, column, select, update, values
+
+from app.models.budget_model import Budget
+from app.models.budget_transfer_model import BudgetTransfer, BudgetLedgerEntry
+from app.schemas.budget_schemas import BudgetTransferSchema
+from app.utils.extensions import db
+
+MAX_BALANCE = Decimal(100_000_000)
+"""Maximum balance of a budget, see the `budget_current_check` constraint."""
+
+
+def net_deltas(transfers: list[BudgetTransferSchema]) -> dict[int, Decimal]:
+    """Returns the net change of every budget taking part in the given transfers."""
+    deltas = defaultdict(Decimal)
+    for transfer in transfers:
+        amount = Decimal(str(transfer.amount)).quantize(Decimal('0.01'))
+        deltas[transfer.from_budget_id] -= amount
+        deltas[transfer.to_budget_id] += amount
+    return deltas
+
+
+def lock_budgets(user_id: int | str, budget_ids) -> dict[int, tuple[Decimal, Decimal | None]]:
+    """Locks the given budgets of a user in the order of their IDs until the current transaction ends.
+
+    Args:
+        user_id (int | str): The ID of the user owning the budgets.
+        budget_ids: The IDs of the budgets.
+
+    Returns:
+        dict[int, tuple[Decimal, Decimal | None]]: The current amount and the goal of every found budget by ID.
+    """
+    rows = db.session.execute(
+        select(Budget.id, Budget.current, Budget.goal).where(
+            Budget.id.in_(sorted(budget_ids)),
+            Budget.user_id == int(user_id)
+        ).order_by(Budget.id).with_for_update()
+    ).all()
+    return {row.id: (row.current, row.goal) for row in rows}
+
+
+def invalid_balances(budgets: dict[int, tuple[Decimal, Decimal | None]], deltas: dict[int, Decimal]) -> list[int]:
+    """Returns the IDs of budgets whose balance would become negative or exceed the goal or the maximum."""
+    invalid = []
+    for budget_id, delta in sorted(deltas.items()):
+        current, goal = budgets[budget_id]
+        balance = current + delta
+        if balance < 0 or balance > MAX_BALANCE or (goal is not None and balance > goal):
+            invalid.append(budget_id)
+    return invalid
+
+
+def apply_transfers(user_id: int | str, transfers: list[BudgetTransferSchema],
+                    deltas: dict[int, Decimal]) -> tuple[list[BudgetTransfer], dict[int, Decimal]]:
+    """Applies the net changes of locked budgets and records the transfers with their ledger entries.
+
+    The changes are added to the current session and are committed by the caller.
+
+    Args:
+        user_id (int | str): The ID of the user owning the budgets.
+        transfers (list[BudgetTransferSchema]): The transfers to record.
+        deltas (dict[int, Decimal]): The net changes of budgets returned by `net_deltas`.
+
+    Returns:
+        tuple[list[BudgetTransfer], dict[int, Decimal]]: The recorded transfers and the new current amounts of
+        the budgets by ID.
+    """
+    budget_deltas = values(
+        column('budget_id', BigInteger), column('delta', Numeric(12, 2)), name='budget_deltas'
+    ).data(sorted(deltas.items()))
+    balances = dict(db.session.execute(
+        update(Budget).where(Budget.id == budget_deltas.c.budget_id).values(
+            current=Budget.current + budget_deltas.c.delta
+        ).returning(Budget.id, Budget.current).execution_options(synchronize_session=False)
+    ).all())
+
+    now = datetime.datetime.now()
+    records = []
+    for transfer in transfers:
+        amount = Decimal(str(transfer.amount)).quantize(Decimal('0.01'))
+        records.append(BudgetTransfer(
+            user_id=int(user_id),
+            description=transfer.description,
+            created_at=now,
+            entries=[
+                BudgetLedgerEntry(budget_id=transfer.from_budget_id, amount=-amount, created_at=now),
+                BudgetLedgerEntry(budget_id=transfer.to_budget_id, amount=amount, created_at=now)
+            ]
+        ))
+    db.session.add_all(records)
+    db.session.flush()
+    return records, balances
@@ -0,0 +1,185 @@
+"""Admission control shedding requests with `503 Service Unavailable` when the worker is overloaded.
+
+When the database slows down, requests pile up waiting for a connection of the pool until they time out, and the
+requests admitted meanwhile wait just as long. Instead, every request is admitted or rejected right away by the
+priority of its view, declared with `admission_priority`:
+    - critical: authentication, the current user, single records and monitoring. Cheap and needed to use the
+      application at all, they are always admitted.
+    - normal: the default. Rejected when `ADMISSION_MAX_IN_FLIGHT` requests are in flight in the worker, or
+      checkouts of the pool currently wait longer than `ADMISSION_POOL_WAIT_MS`.
+    - heavy: full listings, searches, forecasts and other expensive views. Rejected already when
+      `ADMISSION_HEAVY_MAX_IN_FLIGHT` heavy requests are in flight, or checkouts of the pool wait longer than
+      `ADMISSION_HEAVY_POOL_WAIT_MS`.
+
+The wait of the pool is `MeasuredQueuePool.recent_wait`, so only the in-flight limits apply to other pools. Rejected
+requests get the `Retry-After` header of `ADMISSION_RETRY_AFTER` seconds, as do requests failing with a timeout of
+the pool, so clients back off while the admitted requests keep a bounded latency.
+"""
+
+import threading
+from collections import Counter
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.utils.extensions import db
+from app.utils.pool import MeasuredQueuePool
+from app.utils.responses import create_response
+from app.utils.sessions import NESTED_REQUEST
+
+PRIORITIES = ('critical', 'normal', 'heavy')
+"""Priorities of views, from the one shed last."""
+
+OVERLOADED_MESSAGE = 'Сервер перевантажено, спробуйте пізніше'
+"""Message of the responses of rejected requests."""
+
+ADMITTED_PRIORITY = 'app.admission_priority'
+"""WSGI environ key of the priority of an admitted request, released when the request is torn down.
+
+Kept in the environ of the request rather than in `g`, which is shared by the nested requests of a batch request."""
+
+
+def admission_priority(priority: str):
+    """Decorator declaring the priority of a view for the admission control, 'normal' by default.
+
+    Must be applied below the decorators wrapping the view, e.g. `logged_in_required`, which copy the priority
+    via `functools.wraps`. Its order among other decorators only marking the view, e.g. `query_budget`, does not
+    matter.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Admission priority must be one of {', '.join(PRIORITIES)}")
+
+    def decorator(f):
+        f.admission_priority = priority
+        return f
+
+    return decorator
+
+
+class AdmissionController:
+    """Counts the requests in flight in this process by priority and decides whether to admit new ones."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.max_in_flight = 64
+        self.heavy_max_in_flight = 8
+        self.pool_wait_ms = 500.0
+        self.heavy_pool_wait_ms = 100.0
+        self.retry_after = 2
+        self.engine = None
+        self._lock = threading.Lock()
+        self._in_flight = Counter()
+        self._admitted = Counter()
+        self._rejected = Counter()
+
+    def configure(self, config, engine=None) -> None:
+        """Applies the `ADMISSION_*` settings, the pool of `engine` is checked for the wait of its checkouts."""
+        self.enabled = config['ADMISSION_CONTROL_ENABLED']
+        self.max_in_flight = config['ADMISSION_MAX_IN_FLIGHT']
+        self.heavy_max_in_flight = config['ADMISSION_HEAVY_MAX_IN_FLIGHT']
+        self.pool_wait_ms = config['ADMISSION_POOL_WAIT_MS']
+        self.heavy_pool_wait_ms = config['ADMISSION_HEAVY_POOL_WAIT_MS']
+        self.retry_after = config['ADMISSION_RETRY_AFTER']
+        self.engine = engine
+
+    def pool_wait_ms_now(self) -> float:
+        """Returns how long checkouts of the pool wait currently in milliseconds, 0 for pools not measured."""
+        pool = self.engine.pool if self.engine is not None else None
+        return pool.recent_wait() * 1000 if isinstance(pool, MeasuredQueuePool) else 0.0
+
+    def admit(self, priority: str) -> bool:
+        """Admits a request of the priority and counts it in flight, or returns False if it is to be rejected.
+
+        Every admitted request must be released with `release`.
+        """
+        if not self.enabled:
+            return True
+
+        pool_wait_ms = self.pool_wait_ms_now() if priority != 'critical' else 0.0
+        with self._lock:
+            in_flight = sum(self._in_flight.values())
+            if priority == 'heavy':
+                rejected = (self._in_flight['heavy'] >= self.heavy_max_in_flight or in_flight >= self.max_in_flight
+                            or pool_wait_ms >= self.heavy_pool_wait_ms)
+            elif priority == 'normal':
+                rejected = in_flight >= self.max_in_flight or pool_wait_ms >= self.pool_wait_ms
+            else:
+                rejected = False
+
+            if rejected:
+                self._rejected[priority] += 1
+                return False
+            self._in_flight[priority] += 1
+            self._admitted[priority] += 1
+            return True
+
+    def release(self, priority: str) -> None:
+        """Stops counting a finished request admitted by `admit` in flight."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._in_flight[priority] -= 1
+
+    def in_flight(self) -> int:
+        """Returns the number of requests in flight of all priorities."""
+        with self._lock:
+            return sum(self._in_flight.values())
+
+    def statistics(self) -> dict:
+        """Returns the requests in flight now, and the admitted and rejected ones since the start, by priority."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pool_wait_ms': round(self.pool_wait_ms_now(), 3),
+                'in_flight': {priority: self._in_flight[priority] for priority in PRIORITIES},
+                'admitted': {priority: self._admitted[priority] for priority in PRIORITIES},
+                'rejected': {priority: self._rejected[priority] for priority in PRIORITIES},
+            }
+
+
+controller = AdmissionController()
+"""Admission controller of this process."""
+
+
+def view_priority(view) -> str:
+    """Returns the priority of a view, unmatched requests (`view` is None) are critical as they are cheap."""
+    if view is None:
+        return 'critical'
+    return getattr(view, 'admission_priority', 'normal')
+
+
+def overloaded_response() -> tuple[Response, int]:
+    """Create the response of a rejected request, with the `Retry-After` header."""
+    response, status_code = create_response(503, OVERLOADED_MESSAGE)
+    response.headers['Retry-After'] = str(controller.retry_after)
+    return response, status_code
+
+
+def _before_request() -> tuple[Response, int] | None:
+    if request.environ.get(NESTED_REQUEST):
+        return None
+    priority = view_priority(current_app.view_functions.get(request.endpoint))
+    if not controller.admit(priority):
+        return overloaded_response()
+    request.environ[ADMITTED_PRIORITY] = priority
+    return None
+
+
+def _teardown_request(exception) -> None:
+    priority = request.environ.pop(ADMITTED_PRIORITY, None)
+    if priority is not None:
+        controller.release(priority)
+
+
+def _pool_timeout(error: PoolTimeoutError) -> tuple[Response, int]:
+    current_app.logger.warning('Database pool timed out in %s: %s', request.endpoint, error)
+    return overloaded_response()
+
+
+def init_admission(app: Flask) -> None:
+    """Sheds the requests of an application when its worker is overloaded, see the module documentation."""
+    with app.app_context():
+        controller.configure(app.config, db.engine)
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    app.register_error_handler(PoolTimeoutError, _pool_timeout)
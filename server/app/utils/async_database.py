@@ -0,0 +1,63 @@
+"""Asynchronous database access for the views served on the event loop by the ASGI application, see `app.asgi`."""
+
+from flask import Flask
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.utils.pool import configure_engine, engine_options
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+"""Asynchronous drivers by database backend."""
+
+
+def event_loop_view(f):
+    """Decorator marking a view to be served on the event loop by the ASGI application, see `app.asgi`.
+
+    The view only waits for the database, through `db.session` or the models, so it runs with a session of the
+    asynchronous engine. Views blocking on anything else, e.g. SMTP, must stay in the thread pool. Must be
+    applied below the decorators wrapping the view, e.g. `logged_in_required`, which copy the mark via
+    `functools.wraps`.
+    """
+    f.event_loop = True
+    return f
+
+
+def async_database_uri(uri: str) -> str:
+    """Returns the URI of a database with the driver replaced by the asynchronous driver of its backend."""
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+class AsyncDatabase:
+    """Holds the asynchronous engine of a worker, created when the ASGI application starts.
+
+    The synchronous session of an `AsyncSession` stands in for `db.session` while a view runs, so the models,
+    the services and the session event listeners, e.g. the one hiding deleted records, are shared with the
+    synchronous code.
+    """
+
+    def __init__(self) -> None:
+        self.engine: AsyncEngine | None = None
+        self.session: async_sessionmaker[AsyncSession] | None = None
+
+    def init_app(self, app: Flask) -> None:
+        """Creates the engine from `ASYNC_DATABASE_URI`, or from `SQLALCHEMY_DATABASE_URI` with an async driver.
+
+        The pool is configured by the `DB_*` settings like the synchronous one, but sized by `ASYNC_POOL_SIZE`
+        and `ASYNC_MAX_OVERFLOW`.
+        """
+        uri = app.config.get('ASYNC_DATABASE_URI') or async_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(uri, **engine_options(
+            app.config, uri, app.config['ASYNC_POOL_SIZE'], app.config['ASYNC_MAX_OVERFLOW']
+        ))
+        configure_engine(self.engine.sync_engine, app.config)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def dispose(self) -> None:
+        """Closes all connections of the engine."""
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self.session = None
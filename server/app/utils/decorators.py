@@ -1,11 +1,20 @@
-"""Decorators to control access to routes based on user authentication and roles."""
+"""Decorators to control access to routes based on user authentication and roles, and to make routes idempotent."""
 
+import hashlib
 from functools import wraps
-from flask import make_response
+from flask import make_response, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, unset_jwt_cookies
 from app.models.user_model import User
+from app.services.deduplication import claim_idempotency_key, store_idempotent_response, release_idempotency_key
+from app.services.deletion import hide_pending_deletions
 from app.utils.responses import create_response
 
+AUTHENTICATED_REQUEST = 'app.authenticated_request'
+"""WSGI environ key marking a request dispatched inside a request already authenticated by `logged_in_required`.
+
+The verified JWT of the outer request stays in `g`, which is shared by the nested requests, so e.g. the operations
+of a batch request are not authenticated again."""
+
 
 def logged_in_required(f):
     """Decorator to ensure the user is logged in before accessing a route.
@@ -13,11 +22,18 @@ def logged_in_required(f):
     This decorator checks if the user is authenticated by verifying the JWT token.
     If the user is not authenticated, it returns a 401 Unauthorized response.
     If the user is authenticated but not found in the database, it returns a 404 Not Found response.
+    The budgets and categories of the user being deleted are loaded for the request, see `hide_pending_deletions`.
+    Requests marked with `AUTHENTICATED_REQUEST` are let through, as their outer request was checked already.
     """
 
     @wraps(f)
-    @jwt_required()
     def decorated_function(*args, **kwargs):
+        if request.environ.get(AUTHENTICATED_REQUEST):
+            return f(*args, **kwargs)
+        return authenticated_function(*args, **kwargs)
+
+    @jwt_required()
+    def authenticated_function(*args, **kwargs):
         user_id = get_jwt_identity()
         if not user_id:
             return create_response(
@@ -34,6 +50,7 @@ def logged_in_required(f):
             unset_jwt_cookies(response)
             return response
 
+        hide_pending_deletions(user)
         return f(*args, **kwargs)
 
     return decorated_function
@@ -76,3 +93,53 @@ def admin_required(f):
         return f(*args, **kwargs)
 
     return decorated_function
+
+
+def idempotent(f):
+    """Decorator to make a route safe to retry with an `Idempotency-Key` header.
+
+    The first request with a key is executed and its response is stored. A retry with the same key and the same
+    method, path and body returns the stored response with the `Idempotent-Replayed` header instead of being
+    executed again. A retry with a different request returns a 422 Unprocessable Entity response, and a retry
+    while the first request is still being processed returns a 409 Conflict response. Requests without the
+    header are executed as usual. Must be applied after `logged_in_required`.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return f(*args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return create_response(400, 'Неправильний ключ ідемпотентності')
+
+        user_id = get_jwt_identity()
+        request_hash = hashlib.sha256(
+            request.method.encode() + request.full_path.encode() + request.get_data()
+        ).hexdigest()
+        existing = claim_idempotency_key(user_id, key, request_hash, current_app.config['IDEMPOTENCY_KEY_TTL'])
+
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return create_response(422, 'Ключ ідемпотентності вже використано для іншого запиту')
+            if existing.status_code is None:
+                return create_response(409, 'Запит з цим ключем ідемпотентності ще виконується')
+
+            response = current_app.response_class(existing.response, status=existing.status_code,
+                                                  mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            release_idempotency_key(user_id, key)
+            raise
+
+        if response.status_code >= 500:
+            release_idempotency_key(user_id, key)
+        else:
+            store_idempotent_response(user_id, key, response.status_code, response.get_data(as_text=True))
+        return response
+
+    return decorated_function
@@ -5,6 +5,7 @@ from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 
+from app.utils.async_database import AsyncDatabase
 from app.utils.responses import create_response
 
 db = SQLAlchemy()
@@ -15,6 +16,8 @@ bcrypt = Bcrypt()
 """Bcrypt instance for hashing passwords."""
 mail = Mail()
 """Mail instance for sending emails."""
+async_db = AsyncDatabase()
+"""Asynchronous database instance of the ASGI application."""
 
 
 @jwt.unauthorized_loader
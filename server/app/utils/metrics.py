@@ -0,0 +1,208 @@
+"""Request metrics of the application in the Prometheus text format.
+
+Every request records its latency, response size, and the number and time of the SQL statements it executed,
+labelled by endpoint, method and status. A request thread writes only to its own shard of counters, so recording
+takes no lock. A worker periodically writes the sum of its shards to `METRICS_DIR/metrics-<pid>.json`, and
+`/metrics` adds up the files of all workers, including the ones of exited workers merged into
+`metrics-archive.json` by the server, so the counters of all Gunicorn workers are reported together. Without
+`METRICS_DIR` only the counters of the process serving `/metrics` are reported.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from flask import Flask, Response, current_app, request
+
+from app.utils.timing import current_timings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds in seconds of the buckets of the request latency histogram."""
+
+COUNT, DURATION, SIZE, QUERIES, QUERY_DURATION = range(5)
+"""Positions of the values of a series, followed by the counts of the latency buckets and the overflow bucket."""
+
+SERIES_LENGTH = 5 + len(LATENCY_BUCKETS) + 1
+"""Number of values of a series."""
+
+ARCHIVE_FILE = 'metrics-archive.json'
+"""Name of the file collecting the counters of exited workers."""
+
+Series = dict[tuple[str, str, str], list[float]]
+"""Values of the series by endpoint, method and status."""
+
+class MetricsRegistry:
+    """Counters of the requests served by this process, sharded by thread."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[Series] = []
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def _shard(self) -> Series:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, endpoint: str, method: str, status: int, duration: float, size: int, queries: int,
+               query_duration: float) -> None:
+        """Records a served request."""
+        shard = self._shard()
+        key = (endpoint, method, str(status))
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * SERIES_LENGTH
+        values[COUNT] += 1
+        values[DURATION] += duration
+        values[SIZE] += size
+        values[QUERIES] += queries
+        values[QUERY_DURATION] += query_duration
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and duration > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        values[5 + bucket] += 1
+
+    def snapshot(self) -> Series:
+        """Returns the sum of the counters of all threads."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        total = {}
+        for shard in shards:
+            merge_series(total, shard.copy())
+        return total
+
+    def flush(self, directory: str | None, interval: float = 0) -> None:
+        """Writes the counters of this process to its file if `interval` seconds passed since the last write.
+
+        A concurrent flush of another thread is skipped instead of waited for.
+        """
+        if directory is None or time.monotonic() - self._flushed_at < interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            write_series(Path(directory) / f'metrics-{os.getpid()}.json', self.snapshot())
+            self._flushed_at = time.monotonic()
+        finally:
+            self._flush_lock.release()
+
+
+registry = MetricsRegistry()
+"""Request metrics of this process."""
+
+
+def merge_series(total: Series, series: Series) -> Series:
+    """Adds the values of `series` to `total`."""
+    for key, values in series.items():
+        current = total.get(key)
+        if current is None:
+            total[key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                current[index] += value
+    return total
+
+
+def read_series(path: Path) -> Series:
+    """Reads series written by `write_series`, or none if the file is missing or being replaced."""
+    try:
+        rows = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return {tuple(row[:3]): row[3:] for row in rows}
+
+
+def write_series(path: Path, series: Series) -> None:
+    """Writes series to a file, replacing it atomically so readers never see a partial file."""
+    temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+    temporary.write_text(json.dumps([[*key, *values] for key, values in series.items()]))
+    os.replace(temporary, path)
+
+
+def archive_worker(directory: str, pid: int) -> None:
+    """Merges the file of an exited worker into the archive, so its counters are kept after it is restarted."""
+    path = Path(directory) / f'metrics-{pid}.json'
+    if not path.exists():
+        return
+    archive = Path(directory) / ARCHIVE_FILE
+    write_series(archive, merge_series(read_series(archive), read_series(path)))
+    path.unlink()
+
+
+def collect(directory: str | None) -> Series:
+    """Returns the counters of all workers sharing `directory`, or of this process only."""
+    if directory is None:
+        return registry.snapshot()
+    registry.flush(directory)
+    total = {}
+    for path in Path(directory).glob('metrics-*.json'):
+        merge_series(total, read_series(path))
+    return total
+
+
+def _labels(key: tuple[str, str, str], **extra: str) -> str:
+    endpoint, method, status = key
+    labels = {'endpoint': endpoint, 'method': method, 'status': status, **extra}
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def render(series: Series) -> str:
+    """Renders series in the Prometheus text exposition format."""
+    keys = sorted(series)
+    lines = [
+        '# HELP http_request_duration_seconds Time spent handling HTTP requests.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for key in keys:
+        values = series[key]
+        cumulative = 0
+        for bucket, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += values[5 + bucket]
+            lines.append(f'http_request_duration_seconds_bucket{{{_labels(key, le=str(bound))}}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{{{_labels(key, le="+Inf")}}} {values[COUNT]}')
+        lines.append(f'http_request_duration_seconds_sum{{{_labels(key)}}} {values[DURATION]}')
+        lines.append(f'http_request_duration_seconds_count{{{_labels(key)}}} {values[COUNT]}')
+
+    for name, kind, description, position in (
+        ('http_response_size_bytes', 'summary', 'Size of HTTP response bodies.', SIZE),
+        ('db_queries_total', 'counter', 'SQL statements executed while handling HTTP requests.', QUERIES),
+        ('db_query_duration_seconds_total', 'counter', 'Time spent in SQL statements of HTTP requests.',
+         QUERY_DURATION),
+    ):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        for key in keys:
+            if kind == 'summary':
+                lines.append(f'{name}_sum{{{_labels(key)}}} {series[key][position]}')
+                lines.append(f'{name}_count{{{_labels(key)}}} {series[key][COUNT]}')
+            else:
+                lines.append(f'{name}{{{_labels(key)}}} {series[key][position]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _after_request(response: Response) -> Response:
+    timings = current_timings()
+    if timings is None:
+        return response
+    registry.record(
+        request.endpoint or 'unmatched', request.method, response.status_code, timings.elapsed(),
+        response.calculate_content_length() or 0, timings.queries, timings.stages['db']
+    )
+    registry.flush(current_app.config['METRICS_DIR'], current_app.config['METRICS_FLUSH_INTERVAL'])
+    return response
+
+
+def init_metrics(app: Flask) -> None:
+    """Records the latency, response size and SQL statements of every request of an application.
+
+    The requests are measured by `app.utils.timing`, which must be initialized for the application as well.
+    """
+    if app.config['METRICS_DIR']:
+        Path(app.config['METRICS_DIR']).mkdir(parents=True, exist_ok=True)
+    app.after_request(_after_request)
@@ -0,0 +1,227 @@
+"""Database connection pool configured from the application settings, with live statistics of its saturation.
+
+Every worker process has its own pool, so a database server (or PgBouncer) must accept
+`SERVER_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW)` connections of the synchronous engine, plus
+`SERVER_WORKERS * (ASYNC_POOL_SIZE + ASYNC_MAX_OVERFLOW)` in the ASGI mode. `pool_statistics` shows how many
+connections a worker actually uses and how long requests wait for one, which is what the pool should be sized by.
+
+A SQLite database stands in for PostgreSQL without a server, see `app.utils.types`. Its tables are looked up
+without the `public` schema, and an in-memory database (`sqlite://`, or shared between the connections of the
+process with `sqlite:///file:<name>?mode=memory&cache=shared&uri=true`) lives as long as the process.
+"""
+
+import threading
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+from app.utils.types import begin_sqlite_transaction, register_sqlite_functions
+
+PRE_PING_STRATEGIES = ('always', 'stale', 'never')
+"""Values of `DB_POOL_PRE_PING`: ping every checked out connection, only connections idle for longer than
+`DB_POOL_PRE_PING_IDLE` seconds, or none and rely on `DB_POOL_RECYCLE` and the invalidation of the pool after a
+disconnect error."""
+
+RECENT_WAIT_WEIGHT = 0.2
+"""Weight of the latest checkout in the moving average of `MeasuredQueuePool.recent_wait`."""
+
+RECENT_WAIT_HALF_LIFE = 2.0
+"""Seconds in which the moving average of `MeasuredQueuePool.recent_wait` decays to half without checkouts."""
+
+_memory_connections = []
+"""Connections keeping the shared in-memory SQLite databases of this process alive."""
+
+
+class MeasuredQueuePool(QueuePool):
+    """Queue pool counting checkouts, the time they wait for a free connection and the checkouts timing out."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waiting: dict[int, float] = {}
+        self._recent_wait = 0.0
+        self._recent_wait_at = time.perf_counter()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        thread_id = threading.get_ident()
+        with self._stats_lock:
+            self._waiting.setdefault(thread_id, started)
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            now = time.perf_counter()
+            waited = now - started
+            with self._stats_lock:
+                self._waiting.pop(thread_id, None)
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                self._recent_wait = (self._decayed_wait(now) * (1 - RECENT_WAIT_WEIGHT)
+                                     + waited * RECENT_WAIT_WEIGHT)
+                self._recent_wait_at = now
+
+    def _decayed_wait(self, now: float) -> float:
+        return self._recent_wait * 0.5 ** ((now - self._recent_wait_at) / RECENT_WAIT_HALF_LIFE)
+
+    def waiting(self) -> int:
+        """Returns the number of checkouts waiting for a free connection now."""
+        return len(self._waiting)
+
+    def recent_wait(self) -> float:
+        """Returns how long checkouts wait for a free connection currently, in seconds.
+
+        This is the moving average of the waits of recent checkouts, decaying while there are none, or the wait of
+        the longest waiting checkout if it is longer, so a pool exhausted by slow queries shows right away.
+        """
+        now = time.perf_counter()
+        with self._stats_lock:
+            oldest = min(self._waiting.values(), default=now)
+            return max(self._decayed_wait(now), now - oldest)
+
+
+def _async_driver_options(config) -> dict:
+    """Returns the `connect_args` of the asyncpg driver, which caches server-side prepared statements."""
+    if config['DB_PGBOUNCER']:
+        # PgBouncer in transaction mode hands every transaction to any server connection, so a statement
+        # prepared on one is missing on another, and the names of unnamed statements must not collide.
+        return {
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid.uuid4()}__',
+        }
+    return {'prepared_statement_cache_size': config['DB_PREPARED_STATEMENT_CACHE_SIZE']}
+
+
+def engine_options(config, uri: str, pool_size: int, max_overflow: int) -> dict:
+    """Returns the options of an engine of the database at `uri` built from the `DB_*` settings.
+
+    Args:
+        config: The application configuration.
+        uri (str): The URI of the database.
+        pool_size (int): The number of connections kept open in the pool.
+        max_overflow (int): The number of connections opened above `pool_size` under load.
+
+    Returns:
+        dict: Keyword arguments of `create_engine` or `create_async_engine`.
+    """
+    if config['DB_POOL_PRE_PING'] not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_POOL_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}")
+
+    url = make_url(uri)
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'] == 'always',
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'query_cache_size': config['DB_STATEMENT_CACHE_SIZE'],
+    }
+    if url.get_backend_name() == 'sqlite':
+        options['execution_options'] = {'schema_translate_map': {'public': None}}
+        if is_memory_database(url):
+            options['pool_recycle'] = -1
+        return options
+
+    options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=config['DB_POOL_TIMEOUT'])
+    if url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = _async_driver_options(config)
+    else:
+        options['poolclass'] = MeasuredQueuePool
+    return options
+
+
+def install_stale_pre_ping(engine: Engine, idle: float) -> None:
+    """Pings connections idle in the pool for longer than `idle` seconds when they are checked out.
+
+    A connection that fails the ping is discarded and the checkout is retried with a new connection, while
+    connections returned to the pool recently are handed out without the extra round trip.
+    """
+
+    @event.listens_for(engine, 'checkin')
+    def record_checkin(dbapi_connection, connection_record) -> None:
+        connection_record.info['checked_in_at'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def ping_stale(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_in_at = connection_record.info.get('checked_in_at')
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle:
+            return
+
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        except Exception as e:
+            raise DisconnectionError() from e
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def is_memory_database(url) -> bool:
+    """Returns whether the URL is of an in-memory SQLite database, private to a connection or shared."""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    )
+
+
+def configure_engine(engine: Engine, config) -> None:
+    """Installs the event listeners of the `DB_POOL_PRE_PING` strategy on an engine.
+
+    On SQLite the PostgreSQL functions of `register_sqlite_functions` are added to every connection, transactions
+    are begun by `begin_sqlite_transaction`, and a shared in-memory database is kept open by a connection outside
+    of the pool, as it is gone with its last connection.
+    """
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', register_sqlite_functions)
+        event.listen(engine, 'begin', begin_sqlite_transaction)
+        if engine.url.query.get('mode') == 'memory' and not engine.dialect.is_async:
+            arguments, options = engine.dialect.create_connect_args(engine.url)
+            _memory_connections.append(engine.dialect.connect(*arguments, **options))
+    if config['DB_POOL_PRE_PING'] == 'stale':
+        install_stale_pre_ping(engine, config['DB_POOL_PRE_PING_IDLE'])
+
+
+def pool_statistics(pool: Pool) -> dict:
+    """Returns the current usage of a pool of this process.
+
+    Returns:
+        dict: The class of the pool, and for queue pools its size, the checked in, checked out and overflow
+            connections, and for `MeasuredQueuePool` the number of checkouts since the pool was created, the
+            timed out ones, the average and maximum time they waited for a connection, and the checkouts waiting
+            now and their current wait, see `MeasuredQueuePool.recent_wait`.
+    """
+    statistics = {'pool_class': type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return statistics
+
+    statistics.update(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+    )
+    if isinstance(pool, MeasuredQueuePool):
+        with pool._stats_lock:
+            statistics.update(
+                checkouts=pool.checkouts,
+                timeouts=pool.timeouts,
+                wait_average_ms=round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                wait_max_ms=round(pool.wait_max * 1000, 3),
+            )
+        statistics.update(waiting=pool.waiting(), recent_wait_ms=round(pool.recent_wait() * 1000, 3))
+    return statistics
@@ -0,0 +1,105 @@
+"""Sampling profiler of a single thread, producing stacks in the collapsed format of flame graph tools."""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+_switch_interval_lock = threading.Lock()
+"""Held by the profiler that changed the switch interval of the interpreter, so only one changes it at a time."""
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """Samples the stack of the thread that started it, every `interval` seconds, until it is stopped.
+
+    The sampler is a separate thread, so the profiled code runs unmodified. With `lower_switch_interval`, the
+    interpreter switches threads every `interval` seconds while sampling, otherwise the sampler only gets the GIL
+    every 5 ms. The switch interval applies to the whole process, so it is only lowered on request of the caller,
+    by one profiler at a time, and restored when the profiler stops.
+
+    Usage:
+        with SamplingProfiler(0.001) as profiler:
+            ...
+        profiler.folded()
+    """
+
+    def __init__(self, interval: float, lower_switch_interval: bool = True) -> None:
+        self.interval = interval
+        self.lower_switch_interval = lower_switch_interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._target = None
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name='profiler', daemon=True)
+        self._switch_interval = None
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    @property
+    def switch_interval_lowered(self) -> bool:
+        """Whether the profiler lowered the switch interval of the interpreter while sampling."""
+        return self._switch_interval is not None
+
+    def _restore_switch_interval(self) -> None:
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+            _switch_interval_lock.release()
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self._target = threading.get_ident()
+        if self.lower_switch_interval and _switch_interval_lock.acquire(blocking=False):
+            self._switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._started_at = time.perf_counter()
+        try:
+            self._sampler.start()
+        except BaseException:
+            self._restore_switch_interval()
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self._stopped.set()
+            self._sampler.join()
+            self.duration = time.perf_counter() - self._started_at
+        finally:
+            self._restore_switch_interval()
+
+    def folded(self, skip: int = 0) -> str:
+        """Returns the sampled stacks in the collapsed format, one `frame;frame;frame count` line per stack.
+
+        The output can be read by `flamegraph.pl`, speedscope or inferno.
+
+        Args:
+            skip (int): The number of outermost frames to leave out of every stack, e.g. the frames of the server.
+        """
+        return '\n'.join(
+            f"{';'.join(stack[skip:])} {count}" for stack, count in self.stacks.most_common() if stack[skip:]
+        )
+
+
+def stack_depth() -> int:
+    """Returns the number of frames of the stack of the caller, including its own frame."""
+    depth = 0
+    frame = sys._getframe(1)
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
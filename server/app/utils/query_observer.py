@@ -0,0 +1,252 @@
+"""Observer of the SQL statements of the application: slow-query log, statistics by fingerprint and N+1 detection.
+
+- Statements slower than `SLOW_QUERY_MS` are logged to the `app.queries` logger. A slow SELECT on PostgreSQL is
+  logged with the plan of `EXPLAIN (ANALYZE, BUFFERS)`, at most once per `SLOW_QUERY_EXPLAIN_INTERVAL` seconds for
+  the same fingerprint, since explaining runs the statement again.
+- Statements are aggregated by fingerprint, the statement with literals, parameters and lists of parameters
+  replaced by placeholders, see `query_statistics`.
+- A request executing statements of the same fingerprint more than `QUERY_REPEAT_THRESHOLD` times, typically a
+  lazy relationship or a `.first()` in a loop, is logged as a possible N+1 query.
+- A view decorated with `query_budget(n)` that executes more than `n` statements is logged, or fails with
+  `QueryBudgetExceeded` when the application is in testing mode, so tests catch a regression. Transaction control
+  statements, e.g. the SAVEPOINT of every operation of a batch request, are not counted, see
+  `app.utils.timing.is_transaction_control`. Neither are the statements counted in `EXTRA_QUERIES` of a request.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.timing import RequestTimings, current_timings
+
+logger = logging.getLogger('app.queries')
+"""Logger of slow statements and N+1 queries, a child of the logger of the Flask application."""
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|\$\d+|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'\(\?\+?\)(?:\s*,\s*\(\?\+?\))+')
+_SPACE = re.compile(r'\s+')
+
+
+EXTRA_QUERIES = 'app.extra_queries'
+"""WSGI environ key of the number of statements a request executes outside of its view for some users only, e.g. the
+records being deleted loaded by `logged_in_required`, which are not counted against the budget of the view."""
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in testing mode when a view executes more statements than its query budget."""
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> tuple[str, str]:
+    """Returns the ID and the normalized text of the fingerprint of a statement.
+
+    Example:
+        `SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s) AND name = 'x'` is normalized to
+        `SELECT * FROM t WHERE id IN (?+) AND name = ?`.
+    """
+    normalized = _STRING.sub('?', statement)
+    normalized = _PARAMETER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _SPACE.sub(' ', normalized).strip()
+    normalized = _LIST.sub('(?+)', normalized)
+    normalized = _ROWS.sub('(?+)+', normalized)
+    return hashlib.md5(normalized.encode()).hexdigest()[:16], normalized
+
+
+def query_budget(limit: int):
+    """Decorator declaring the maximum number of SQL statements of a view, see `QueryObserver.finish_request`.
+
+    Must be applied below the decorators wrapping the view, e.g. `logged_in_required`, which copy the budget via
+    `functools.wraps`. Its order among other decorators only marking the view, e.g. `admission_priority`, does
+    not matter.
+    """
+
+    def decorator(f):
+        f.query_budget = limit
+        return f
+
+    return decorator
+
+
+class QueryObserver:
+    """Aggregates the statements executed by this process and checks the statements of every request."""
+
+    def __init__(self) -> None:
+        self.slow_query_ms = 200.0
+        self.explain = True
+        self.explain_interval = 300.0
+        self.repeat_threshold = 10
+        self.max_fingerprints = 1000
+        self._lock = threading.Lock()
+        self._statistics: dict[str, list] = {}
+        self._explained_at: dict[str, float] = {}
+
+    def configure(self, config) -> None:
+        """Applies the `SLOW_QUERY_*` and `QUERY_*` settings."""
+        self.slow_query_ms = config['SLOW_QUERY_MS']
+        self.explain = config['SLOW_QUERY_EXPLAIN']
+        self.explain_interval = config['SLOW_QUERY_EXPLAIN_INTERVAL']
+        self.repeat_threshold = config['QUERY_REPEAT_THRESHOLD']
+        self.max_fingerprints = config['QUERY_FINGERPRINTS_MAX']
+
+    def record(self, statement: str, duration: float) -> str:
+        """Adds an executed statement to the statistics of its fingerprint and returns the fingerprint ID."""
+        fingerprint_id, normalized = fingerprint(statement)
+        with self._lock:
+            values = self._statistics.get(fingerprint_id)
+            if values is None:
+                if len(self._statistics) >= self.max_fingerprints:
+                    fingerprint_id, normalized = 'other', '(fingerprints over QUERY_FINGERPRINTS_MAX)'
+                    values = self._statistics.get(fingerprint_id)
+                if values is None:
+                    values = self._statistics[fingerprint_id] = [normalized, 0, 0.0, 0.0, 0]
+            values[1] += 1
+            values[2] += duration
+            values[3] = max(values[3], duration)
+        return fingerprint_id
+
+    def should_explain(self, fingerprint_id: str) -> bool:
+        """Returns whether a slow statement of the fingerprint is to be explained now."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(fingerprint_id, -self.explain_interval) < self.explain_interval:
+                return False
+            self._explained_at[fingerprint_id] = now
+        return True
+
+    def statistics(self, order_by: str = 'total', limit: int = 20) -> list[dict]:
+        """Returns the statistics of the fingerprints, ordered descending by 'total', 'count', 'max' or 'repeats'.
+
+        Returns:
+            list[dict]: The ID and normalized statement of every fingerprint, the number of executions, their total,
+                average and maximum time in milliseconds, and the number of requests repeating it as an N+1 query.
+        """
+        with self._lock:
+            rows = [(fingerprint_id, *values) for fingerprint_id, values in self._statistics.items()]
+        position = {'count': 2, 'total': 3, 'max': 4, 'repeats': 5}[order_by]
+        rows.sort(key=lambda row: row[position], reverse=True)
+        return [{
+            'fingerprint': fingerprint_id,
+            'statement': normalized,
+            'count': count,
+            'total_ms': round(total * 1000, 3),
+            'average_ms': round(total / count * 1000, 3) if count else 0.0,
+            'max_ms': round(maximum * 1000, 3),
+            'repeated_requests': repeats,
+        } for fingerprint_id, normalized, count, total, maximum, repeats in rows[:limit]]
+
+    def finish_request(self, endpoint: str, timings: RequestTimings, budget: int | None, strict: bool) -> None:
+        """Checks the statements of a finished request for N+1 queries and against the budget of its view.
+
+        Raises:
+            QueryBudgetExceeded: If the budget is exceeded and `strict` is set.
+        """
+        repeated = Counter()
+        for statement, count in timings.statements.items():
+            repeated[fingerprint(statement)] += count
+        for (fingerprint_id, normalized), count in repeated.items():
+            if count > self.repeat_threshold:
+                logger.warning('Possible N+1 query in %s, executed %d times [%s]: %s',
+                               endpoint, count, fingerprint_id, normalized)
+                with self._lock:
+                    if fingerprint_id in self._statistics:
+                        self._statistics[fingerprint_id][4] += 1
+
+        if budget is not None and timings.queries > budget:
+            message = f'{endpoint} executed {timings.queries} SQL statements, its budget is {budget}'
+            if strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+observer = QueryObserver()
+"""Query observer of this process."""
+
+
+def _explain(dbapi_connection, statement: str, parameters) -> str:
+    """Returns the plan of a statement run by `EXPLAIN (ANALYZE, BUFFERS)` in a savepoint of its transaction.
+
+    The savepoint keeps the transaction usable if explaining fails, e.g. because the statement can not be
+    explained with its parameters.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT query_observer_explain')
+        try:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT query_observer_explain')
+            plan = f'EXPLAIN failed: {e}'
+        cursor.execute('RELEASE SAVEPOINT query_observer_explain')
+        return plan
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault('observer_started_at', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = conn.info.get('observer_started_at')
+    if not started_at:
+        return
+    duration = time.perf_counter() - started_at.pop()
+    fingerprint_id = observer.record(statement, duration)
+    if duration * 1000 < observer.slow_query_ms:
+        return
+
+    plan = None
+    if (observer.explain and not executemany and conn.dialect.name == 'postgresql'
+            and statement.lstrip()[:6].upper() == 'SELECT'
+            and not (context is not None and context.execution_options.get('stream_results'))
+            and observer.should_explain(fingerprint_id)):
+        plan = _explain(conn.connection.dbapi_connection, statement, parameters)
+    logger.warning('Slow query (%.1f ms) [%s]: %s%s', duration * 1000, fingerprint_id, statement,
+                   f'\n{plan}' if plan else '')
+
+
+def _handle_error(exception_context) -> None:
+    started_at = exception_context.connection.info.get('observer_started_at') \
+        if exception_context.connection is not None else None
+    if started_at:
+        started_at.pop()
+
+
+def _after_request(response: Response) -> Response:
+    timings = current_timings()
+    if timings is None:
+        return response
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None:
+        budget += request.environ.get(EXTRA_QUERIES, 0)
+    observer.finish_request(request.endpoint or 'unmatched', timings, budget, current_app.testing)
+    return response
+
+
+def init_query_observer(app: Flask) -> None:
+    """Observes the SQL statements of the application and of its requests.
+
+    The requests are measured by `app.utils.timing`, which must be initialized for the application as well.
+    """
+    observer.configure(app.config)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.after_request(_after_request)
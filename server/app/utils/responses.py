@@ -2,7 +2,10 @@
 
 from flask import jsonify, Response
 
+from app.utils.timing import timed
 
+
+@timed('json')
 def create_response(status_code: int, message: str = None, data=None, details: str = None) -> tuple[Response, int]:
     """Create a standardized JSON response for API endpoints.
 
@@ -0,0 +1,49 @@
+"""Helpers for running several units of work inside one database transaction."""
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.engine import RootTransaction
+from sqlalchemy.orm import Session
+
+from app.utils.extensions import db
+
+NESTED_REQUEST = 'app.nested_request'
+"""WSGI environ key marking a request dispatched inside another request, e.g. an operation of a batch request.
+
+The admission control skips nested requests, as the outer request is admitted already."""
+
+
+@contextmanager
+def outer_transaction() -> Iterator[RootTransaction]:
+    """Runs the code inside the block in a single database transaction.
+
+    While the block is running, `db.session` is replaced by a session joined to an outer transaction in
+    `create_savepoint` mode, so every `db.session.commit()` only releases a savepoint and every
+    `db.session.rollback()` only rolls back to it. The outer transaction is committed when the block exits,
+    unless it was rolled back inside the block or an exception was raised.
+
+    The transaction `db.session` has open is committed first, so the block does not hold a second connection of
+    the pool meanwhile. On an in-memory SQLite database, which has a single connection per thread, the outer
+    transaction could not begin otherwise.
+
+    Yields:
+        RootTransaction: The outer transaction, which can be rolled back to discard all the work of the block.
+    """
+    previous_session = db.session.registry()
+    previous_session.commit()
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection, join_transaction_mode='create_savepoint')
+        db.session.registry.set(session)
+        try:
+            yield transaction
+            if transaction.is_active:
+                transaction.commit()
+        except Exception:
+            if transaction.is_active:
+                transaction.rollback()
+            raise
+        finally:
+            session.close()
+            db.session.registry.set(previous_session)
@@ -0,0 +1,191 @@
+"""Breakdown of the time of a request by stage, reported in the `Server-Timing` header.
+
+A request is split into the stages:
+    - validation: Pydantic schemas, see `app.schemas.base_schemas.Schema`.
+    - db: SQL statements, measured around the execution of the cursor. Transaction control statements (BEGIN,
+      SAVEPOINT, ...) count to the time of the stage, but not to the number of queries of the request.
+    - orm: building ORM objects from the rows of SELECT statements.
+    - serialize: `to_dict` methods of the models, decorated with `timed('serialize')`.
+    - json: encoding the response body in `create_response`.
+
+Every stage records its own time only, time spent in a nested stage (e.g. a lazy load of a relationship inside
+`to_dict`) is counted for the nested stage, so the stages add up to at most the total time of the request.
+"""
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from functools import wraps
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+STAGES = ('validation', 'db', 'orm', 'serialize', 'json')
+"""Stages of a request in the order they are reported."""
+
+TIMINGS_TOKEN = 'app.timings_token'
+"""WSGI environ key of the token of `start_request_timings` of a request.
+
+Kept in the environ of the request rather than in `g`, which is shared by requests dispatched inside another
+request, e.g. a request run by the profiler."""
+
+_TRANSACTION_CONTROL = re.compile(r'\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|START\s+TRANSACTION|END)\b',
+                                  re.IGNORECASE)
+
+
+def is_transaction_control(statement: str) -> bool:
+    """Returns whether a statement only controls the transaction, e.g. BEGIN or SAVEPOINT, instead of data."""
+    return _TRANSACTION_CONTROL.match(statement) is not None
+
+
+class RequestTimings:
+    """Time spent by a request in every stage, and the number of its SQL statements and of each distinct one."""
+
+    __slots__ = ('started_at', 'stages', 'queries', 'statements', '_stack')
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.queries = 0
+        self.statements: Counter[str] = Counter()
+        self._stack: list[list] = []
+
+    def enter(self, stage: str) -> None:
+        """Starts measuring a stage, nested in the current one."""
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def exit(self) -> float:
+        """Stops measuring the current stage and returns its time including nested stages."""
+        stage, started_at, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started_at
+        self.stages[stage] += elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        return elapsed
+
+    def current(self) -> str | None:
+        """Returns the stage being measured."""
+        return self._stack[-1][0] if self._stack else None
+
+    def elapsed(self) -> float:
+        """Returns the time since the start of the request."""
+        return time.perf_counter() - self.started_at
+
+    def header(self) -> str:
+        """Returns the value of the `Server-Timing` header, with durations in milliseconds."""
+        metrics = [f'{stage};dur={self.stages[stage] * 1000:.3f}' for stage in STAGES]
+        metrics[STAGES.index('db')] += f';desc="{self.queries} queries"'
+        metrics.append(f'total;dur={self.elapsed() * 1000:.3f}')
+        return ', '.join(metrics)
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar('request_timings', default=None)
+"""Timings of the request handled in the current thread or task."""
+
+
+def current_timings() -> RequestTimings | None:
+    """Returns the timings of the current request, or None outside of a measured request."""
+    return _current.get()
+
+
+def start_request_timings() -> Token:
+    """Starts measuring a request, returns the token for `stop_request_timings`."""
+    return _current.set(RequestTimings())
+
+
+def stop_request_timings(token: Token) -> RequestTimings | None:
+    """Stops measuring a request and returns its timings."""
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+def timed(stage: str):
+    """Decorator recording the time of a function as a stage of the current request."""
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return f(*args, **kwargs)
+            timings.enter(stage)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                timings.exit()
+
+        return decorated_function
+
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.enter('db')
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    timings = _current.get()
+    if timings is not None and timings.current() == 'db':
+        timings.exit()
+        if not is_transaction_control(statement):
+            timings.queries += 1
+            timings.statements[statement] += 1
+
+
+def _handle_error(exception_context) -> None:
+    timings = _current.get()
+    if timings is not None and timings.current() == 'db':
+        timings.exit()
+
+
+def _time_orm_select(state: ORMExecuteState):
+    """Executes an ORM SELECT and builds all its objects at once, so building them is measured as a stage.
+
+    The objects are returned as a frozen result, which is why streamed results (`yield_per`, `stream_results`)
+    are left alone.
+    """
+    timings = _current.get()
+    if (timings is None or not state.is_select or state.execution_options.get('yield_per')
+            or state.execution_options.get('stream_results')):
+        return None
+
+    timings.enter('orm')
+    try:
+        return state.invoke_statement().freeze()()
+    finally:
+        timings.exit()
+
+
+def _before_request() -> None:
+    request.environ[TIMINGS_TOKEN] = start_request_timings()
+
+
+def _after_request(response: Response) -> Response:
+    timings = _current.get()
+    if timings is not None and current_app.config['SERVER_TIMING_ENABLED']:
+        response.headers['Server-Timing'] = timings.header()
+    return response
+
+
+def _teardown_request(exception) -> None:
+    token = request.environ.pop(TIMINGS_TOKEN, None)
+    if token is not None:
+        stop_request_timings(token)
+
+
+def init_timings(app: Flask) -> None:
+    """Measures the stages of every request of an application, for `Server-Timing` and the metrics."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        event.listen(Session, 'do_orm_execute', _time_orm_select)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,151 @@
+"""Column types and DDL of the models that work on PostgreSQL and on the SQLite stand-in.
+
+PostgreSQL is the production database. SQLite runs the application without a database server, for local
+benchmarks and tests, see `app.utils.pool.is_memory_database`. On SQLite:
+    - Enumerated types of `enum_type` are text columns with a CHECK constraint of the allowed values, instead of
+      the native ENUM types of PostgreSQL.
+    - BIGINT primary keys are INTEGER, the only type SQLite generates values of (as an alias of the rowid).
+    - The primary key of a table with an autoincrement column and further key columns, e.g. the `created_at` key
+      column of the partitioned transaction table, is the autoincrement column alone for the same reason.
+    - Casts to DATE and TIMESTAMP are the `date` and `datetime` functions, a plain CAST would make numbers of them.
+    - A named VALUES list used as a table is a subquery naming its columns, as SQLite has no column aliases of a
+      table alias.
+    - `generate_series` of days used as a table is a recursive query, as SQLite has no set-returning functions.
+    - `register_sqlite_functions` adds the PostgreSQL functions the models and queries use.
+    - Transactions are begun by `begin_sqlite_transaction` rather than by the driver, which begins them only
+      before data changes and commits on its own before a SAVEPOINT, so nested transactions would not roll back.
+"""
+
+import datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, Enum, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.elements import Cast, _truncated_label
+from sqlalchemy.sql.expression import TableValuedAlias, Values
+
+
+def enum_type(*values: str, name: str) -> ENUM:
+    """Returns an enumerated type, the existing PostgreSQL type `name` or a CHECK-constrained text column on SQLite.
+
+    The PostgreSQL type is not created with the tables, see `create_type`, it must exist already.
+    """
+    return ENUM(*values, name=name, create_type=False).with_variant(
+        Enum(*values, name=name, native_enum=False, create_constraint=True, length=max(map(len, values))),
+        'sqlite'
+    )
+
+
+@compiles(BigInteger, 'sqlite')
+def _compile_big_integer(type_, compiler, **kw) -> str:
+    return 'INTEGER'
+
+
+def _composite_autoincrement(column) -> bool:
+    return column.autoincrement is True and len(column.table.primary_key.columns) > 1
+
+
+@compiles(CreateColumn, 'sqlite')
+def _compile_create_column(create, compiler, **kw) -> str:
+    column = create.element
+    if not _composite_autoincrement(column):
+        return compiler.visit_create_column(create, **kw)
+    return f'{compiler.preparer.format_column(column)} INTEGER NOT NULL'
+
+
+@compiles(PrimaryKeyConstraint, 'sqlite')
+def _compile_primary_key(constraint, compiler, **kw) -> str:
+    autoincrement = [column for column in constraint.columns if _composite_autoincrement(column)]
+    if not autoincrement:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    return f'PRIMARY KEY ({compiler.preparer.format_column(autoincrement[0])})'
+
+
+@compiles(Cast, 'sqlite')
+def _compile_cast(cast, compiler, **kw) -> str:
+    if isinstance(cast.type, DateTime):
+        return f'datetime({compiler.process(cast.clause, **kw)})'
+    if isinstance(cast.type, Date):
+        return f'date({compiler.process(cast.clause, **kw)})'
+    return compiler.visit_cast(cast, **kw)
+
+
+@compiles(Values, 'sqlite')
+def _compile_values(element, compiler, asfrom=False, from_linter=None, **kw) -> str:
+    if not asfrom or element._unnamed:
+        return compiler.visit_values(element, asfrom=asfrom, from_linter=from_linter, **kw)
+    if from_linter:
+        from_linter.froms[element._de_clone()] = element.name
+    columns = ', '.join(f'column{position} AS {compiler.preparer.quote(column.name)}'
+                        for position, column in enumerate(element.columns, 1))
+    rows = compiler.visit_values(element, **kw)
+    return f'(SELECT {columns} FROM ({rows})) AS {compiler.preparer.quote(element.name)}'
+
+
+@compiles(TableValuedAlias, 'sqlite')
+def _compile_table_valued(element, compiler, asfrom=False, from_linter=None, **kw) -> str:
+    function = element.element
+    if not asfrom or function.name != 'generate_series':
+        return compiler.visit_table_valued_alias(element, asfrom=asfrom, from_linter=from_linter, **kw)
+    start, end, step = function.clauses
+    name = compiler._truncated_identifier('alias', element.name) if isinstance(element.name, _truncated_label) \
+        else element.name
+    if from_linter:
+        from_linter.froms[element._de_clone()] = name
+    shift = f"'+{step.value.days} days'"
+    series = (f'WITH RECURSIVE series(value) AS (SELECT datetime({compiler.process(start, **kw)}) UNION ALL '
+              f'SELECT datetime(value, {shift}) FROM series '
+              f'WHERE datetime(value, {shift}) <= datetime({compiler.process(end, **kw)})) '
+              f'SELECT value AS {compiler.preparer.quote(element.c[0].name)} FROM series')
+    return f'({series}) AS {compiler.preparer.format_alias(element, name)}'
+
+
+def _greatest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _least(*values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def _date_trunc(field: str, value: str | None) -> str | None:
+    """Truncates a date or timestamp stored as ISO text to the precision `field`, like `date_trunc` of PostgreSQL."""
+    if value is None:
+        return None
+    timestamp = datetime.datetime.fromisoformat(value)
+    if field == 'year':
+        timestamp = timestamp.replace(month=1, day=1)
+    elif field == 'quarter':
+        timestamp = timestamp.replace(month=(timestamp.month - 1) // 3 * 3 + 1, day=1)
+    elif field == 'month':
+        timestamp = timestamp.replace(day=1)
+    elif field == 'week':
+        timestamp -= datetime.timedelta(days=timestamp.weekday())
+    elif field != 'day':
+        raise ValueError(f'date_trunc field {field!r} is not supported on SQLite')
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0).isoformat(' ')
+
+
+def register_sqlite_functions(dbapi_connection, connection_record=None) -> None:
+    """Adds `char_length`, `greatest`, `least` and `date_trunc` to a SQLite connection and enforces foreign keys.
+
+    The transaction handling of the driver is turned off, see `begin_sqlite_transaction`. Meant as a `connect`
+    listener of a SQLite engine.
+    """
+    dbapi_connection.isolation_level = None
+    dbapi_connection.create_function('char_length', 1, lambda value: None if value is None else len(value),
+                                     deterministic=True)
+    dbapi_connection.create_function('greatest', -1, _greatest, deterministic=True)
+    dbapi_connection.create_function('least', -1, _least, deterministic=True)
+    dbapi_connection.create_function('date_trunc', 2, _date_trunc, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys = ON')
+    cursor.close()
+
+
+def begin_sqlite_transaction(connection) -> None:
+    """Begins the transaction of a SQLite connection. Meant as a `begin` listener of a SQLite engine."""
+    connection.exec_driver_sql('BEGIN')
@@ -0,0 +1,52 @@
+"""Helpers preparing the application for serving requests in a pre-forking production server."""
+
+import importlib
+import pkgutil
+
+from flask import Flask
+
+import app as app_package
+from app.utils.extensions import db
+
+
+def import_all_modules() -> list[str]:
+    """Imports every module of the application package, so workers forked afterwards share them.
+
+    Returns:
+        list[str]: The names of the imported modules.
+    """
+    names = [module.name for module in pkgutil.walk_packages(app_package.__path__, f'{app_package.__name__}.')]
+    for name in names:
+        importlib.import_module(name)
+    return names
+
+
+def reset_pool(app: Flask) -> None:
+    """Drops database connections inherited from the parent process without closing them for the parent.
+
+    Must be called in a worker right after it is forked, connections can not be shared between processes.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def warm_up_pool(app: Flask, connections: int) -> int:
+    """Opens database connections in advance, so the first requests of a worker do not pay for connecting.
+
+    Args:
+        app (Flask): The application.
+        connections (int): The number of connections to open, capped at the size of the pool.
+
+    Returns:
+        int: The number of opened connections.
+    """
+    with app.app_context():
+        pool_size = getattr(db.engine.pool, 'size', None)
+        if callable(pool_size):
+            connections = min(connections, pool_size())
+
+        opened = [db.engine.connect() for _ in range(connections)]
+        for connection in opened:
+            connection.exec_driver_sql('SELECT 1')
+            connection.close()
+    return len(opened)
@@ -0,0 +1,17 @@
+"""ASGI entry point of the application for production servers, see `app.asgi`.
+
+Run it with the settings of `gunicorn.conf.py` and `SERVER_MODE=asgi`:
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+
+from app import create_app
+from app.asgi import create_asgi_app
+from app.utils.warmup import import_all_modules
+
+flask_app = create_app()
+"""variable flask_app is the Flask application instance serving the synchronous endpoints"""
+
+app = create_asgi_app(flask_app)
+"""variable app is the ASGI application instance"""
+
+import_all_modules()
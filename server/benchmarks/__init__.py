@@ -0,0 +1 @@
+"""Contains benchmarks of the application run against a local PostgreSQL database."""
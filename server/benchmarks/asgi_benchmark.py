@@ -0,0 +1,124 @@
+"""Compares the WSGI and the ASGI mode of the production server under thousands of concurrent clients.
+
+The benchmark starts Gunicorn with `SERVER_MODE=wsgi` and then with `SERVER_MODE=asgi`, opens the given number of
+keep-alive connections from a single asyncio client and sends the same authenticated request over every
+connection for a fixed duration. The access token is issued for an existing user, so the database of the
+configuration must contain it. The open file limit (`ulimit -n`) must exceed the number of connections.
+
+Usage:
+    python -m benchmarks.asgi_benchmark --user-id 1 --connections 2000 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.server_benchmark import SERVER_DIRECTORY, auth_headers, wait_for_port
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: bytes) -> int:
+    """Sends a request over a keep-alive connection, reads the whole response and returns its status code."""
+    writer.write(request)
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return int(lines[0].split(' ', 2)[1])
+
+
+async def load(port: int, path: str, headers: dict, connections: int, duration: float) -> dict:
+    """Sends requests over `connections` keep-alive connections for `duration` seconds."""
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: keep-alive\r\n'
+        + ''.join(f'{name}: {value}\r\n' for name, value in headers.items()) + '\r\n'
+    ).encode('latin-1')
+    timings = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client() -> None:
+        nonlocal errors
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            errors += 1
+            return
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                status = await _request(reader, writer, request)
+                timings.append((time.perf_counter() - started) * 1000)
+                if status >= 400:
+                    errors += 1
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    if not timings:
+        return {'requests': 0, 'errors': errors}
+    timings.sort()
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'p99_ms': round(timings[int(len(timings) * 0.99) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def main() -> None:
+    """Parses the arguments, runs the benchmark and prints the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--user-id', type=int, required=True, help='ID of an existing user to authenticate as.')
+    parser.add_argument('--path', default='/api/transactions/')
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='Path of a JSON file to write the results to.')
+    args = parser.parse_args()
+
+    headers = auth_headers(args.user_id)
+    results = {}
+    for mode in ('wsgi', 'asgi'):
+        environment = {**os.environ, 'SERVER_MODE': mode, 'SERVER_BIND': f'127.0.0.1:{args.port}'}
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+                                   cwd=SERVER_DIRECTORY, env=environment, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port, timeout=30)
+            asyncio.run(load(args.port, args.path, headers, min(args.connections, 50), 2))
+            results[mode] = asyncio.run(load(args.port, args.path, headers, args.connections, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+
+    if results.get('wsgi', {}).get('requests_per_second') and 'requests_per_second' in results['asgi']:
+        results['speedup'] = round(
+            results['asgi']['requests_per_second'] / results['wsgi']['requests_per_second'], 2
+        )
+
+    output = json.dumps({'path': args.path, 'connections': args.connections, 'results': results}, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
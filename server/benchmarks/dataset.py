@@ -0,0 +1,242 @@
+"""Seeds a scratch PostgreSQL database with a realistic synthetic dataset for the load tests.
+
+The schema is created from the models of `app.models`, with the monthly partitions of the transaction table of
+`app.services.partitions`. Users get categories and budgets of their own and a skewed number of transactions: the
+transaction counts follow a Zipf distribution, so a few users own most of the transactions as in production.
+Users, categories and budgets are inserted in bulk with `INSERT ... RETURNING`, transactions are streamed with
+`COPY`. Every user has the password `BENCHMARK_PASSWORD` and the email `bench<n>@example.com`.
+
+The database at `BENCHMARK_DATABASE_URI` is dropped and recreated, never point it at real data.
+
+Usage:
+    BENCHMARK_DATABASE_URI=postgresql://... python -m benchmarks.dataset --users 1000 --transactions 1000000
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+"""Password of every seeded user."""
+
+EXPENSE_CATEGORIES = ('Продукти', 'Транспорт', 'Кафе', 'Комунальні', 'Здоровʼя', 'Одяг', 'Розваги', 'Подарунки',
+                      'Освіта', 'Подорожі', 'Звʼязок', 'Спорт')
+"""Names of the expense categories a user picks from."""
+
+INCOME_CATEGORIES = ('Зарплата', 'Фриланс', 'Депозит', 'Кешбек')
+"""Names of the income categories a user picks from."""
+
+BUDGET_NAMES = ('Основний', 'Картка', 'Готівка', 'Заощадження', 'Відпустка')
+"""Names of the budgets a user picks from."""
+
+DESCRIPTIONS = ('Покупка в супермаркеті', 'Оплата таксі', 'Кава з собою', 'Рахунок за світло', 'Аптека',
+                'Квитки в кіно', 'Поповнення рахунку', 'Обід', 'Переказ від друга', 'Підписка')
+"""Descriptions of the transactions, a transaction has none in a quarter of the cases."""
+
+COPY_CHUNK_ROWS = 200_000
+"""Number of transactions generated and copied at once."""
+
+
+def create_schema(app) -> None:
+    """Recreates the public schema with the tables of the models and the partitions of the transaction table."""
+    from sqlalchemy import text
+
+    from app.models.category_model import category_type_enum
+    from app.models.transaction_model import transaction_type_enum
+    from app.models.user_model import user_type_enum
+    from app.utils.extensions import db
+    from app.utils.warmup import import_all_modules
+
+    import_all_modules()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP SCHEMA public CASCADE'))
+            connection.execute(text('CREATE SCHEMA public'))
+            for enum in (user_type_enum, category_type_enum, transaction_type_enum):
+                enum.create(connection, checkfirst=True)
+            db.metadata.create_all(connection)
+
+
+def transaction_counts(rng: np.random.Generator, users: int, transactions: int, skew: float) -> np.ndarray:
+    """Splits the transactions between the users by a Zipf distribution with the exponent `skew`."""
+    weights = 1 / np.arange(1, users + 1) ** skew
+    counts = np.floor(weights / weights.sum() * transactions).astype(np.int64)
+    counts[0] += transactions - counts.sum()
+    rng.shuffle(counts)
+    return counts
+
+
+def seed(app, users: int, transactions: int, months: int, skew: float, random_seed: int) -> dict:
+    """Creates the schema and fills it with the synthetic dataset.
+
+    Args:
+        app (Flask): The application connected to the scratch database.
+        users (int): The number of users.
+        transactions (int): The total number of transactions.
+        months (int): How many months back the transactions reach.
+        skew (float): The exponent of the Zipf distribution of the transactions between the users.
+        random_seed (int): The seed of the generator, the same arguments always produce the same dataset.
+
+    Returns:
+        dict: The arguments, the number of created rows and the time the seeding took.
+    """
+    from sqlalchemy import insert, text
+
+    from app.models.budget_model import Budget
+    from app.models.category_model import Category
+    from app.models.user_model import User
+    from app.services.partitions import add_months, ensure_transaction_partitions, month_start
+    from app.utils.extensions import bcrypt, db
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(random_seed)
+    today = datetime.date.today()
+    first_month = add_months(month_start(today), -(months - 1))
+    create_schema(app)
+
+    with app.app_context():
+        ensure_transaction_partitions(months + 2, today=first_month)
+        password_hash = bcrypt.generate_password_hash(BENCHMARK_PASSWORD).decode('utf-8')
+
+        user_ids = db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {'username': f'bench{n}', 'email': f'bench{n}@example.com', 'password_hash': password_hash,
+             'type': 'default'}
+            for n in range(users)
+        ]).all()
+
+        category_rows, category_owners = [], []
+        for user_id in user_ids:
+            for kind, names, count in (('expenses', EXPENSE_CATEGORIES, rng.integers(5, len(EXPENSE_CATEGORIES))),
+                                       ('incomes', INCOME_CATEGORIES, rng.integers(1, len(INCOME_CATEGORIES)))):
+                for name in rng.choice(names, size=count, replace=False):
+                    category_rows.append({'user_id': user_id, 'name': str(name), 'type': kind})
+                    category_owners.append((user_id, kind))
+        category_ids = db.session.scalars(
+            insert(Category).returning(Category.id, sort_by_parameter_order=True), category_rows
+        ).all()
+
+        budget_rows = []
+        for user_id in user_ids:
+            for name in rng.choice(BUDGET_NAMES, size=rng.integers(1, 4), replace=False):
+                initial = round(float(rng.uniform(0, 50_000)), 2)
+                budget_rows.append({'user_id': user_id, 'name': str(name), 'initial': initial, 'current': initial,
+                                    'created_at': first_month})
+        budget_owners = [row['user_id'] for row in budget_rows]
+        budget_ids = db.session.scalars(
+            insert(Budget).returning(Budget.id, sort_by_parameter_order=True), budget_rows
+        ).all()
+        db.session.commit()
+
+        categories_by_user = {}
+        for category_id, (user_id, kind) in zip(category_ids, category_owners):
+            categories_by_user.setdefault((user_id, kind), []).append(category_id)
+        budgets_by_user = {}
+        for budget_id, user_id in zip(budget_ids, budget_owners):
+            budgets_by_user.setdefault(user_id, []).append(budget_id)
+
+        balances = dict.fromkeys(budget_ids, 0.0)
+        span = (datetime.datetime.now() - datetime.datetime.combine(first_month, datetime.time())).total_seconds()
+        counts = transaction_counts(rng, users, transactions, skew)
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            buffer, buffered = io.StringIO(), 0
+            writer = csv.writer(buffer)
+            for user_id, count in zip(user_ids, counts):
+                incomes = rng.random(count) < 0.15
+                amounts = np.where(incomes, rng.lognormal(9.5, 0.6, count), rng.lognormal(5.5, 1.1, count))
+                amounts = np.round(np.clip(amounts, 1, 1_000_000), 2)
+                offsets = rng.uniform(0, span, count)
+                budget_choice = rng.choice(budgets_by_user[user_id], size=count)
+                expense_choice = rng.choice(categories_by_user[(user_id, 'expenses')], size=count)
+                income_choice = rng.choice(categories_by_user[(user_id, 'incomes')], size=count)
+                described = rng.random(count) < 0.75
+                description_choice = rng.integers(0, len(DESCRIPTIONS), count)
+                for index in range(count):
+                    income = bool(incomes[index])
+                    budget_id = int(budget_choice[index])
+                    amount = float(amounts[index])
+                    balances[budget_id] += amount if income else -amount
+                    writer.writerow((
+                        user_id,
+                        int(income_choice[index] if income else expense_choice[index]),
+                        budget_id,
+                        f'{amount:.2f}',
+                        DESCRIPTIONS[description_choice[index]] if described[index] else '',
+                        datetime.datetime.combine(first_month, datetime.time())
+                        + datetime.timedelta(seconds=float(offsets[index])),
+                        'income' if income else 'expense',
+                    ))
+                buffered += count
+                if buffered >= COPY_CHUNK_ROWS:
+                    _copy_transactions(cursor, buffer)
+                    buffer, buffered = io.StringIO(), 0
+                    writer = csv.writer(buffer)
+            _copy_transactions(cursor, buffer)
+            connection.commit()
+        finally:
+            connection.close()
+
+        db.session.execute(
+            text('UPDATE public.budget SET current = LEAST(GREATEST(initial + :balance, 0), 100000000) '
+                 'WHERE id = :id'),
+            [{'balance': round(balance, 2), 'id': budget_id} for budget_id, balance in balances.items()]
+        )
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    return {
+        'users': users,
+        'transactions': int(counts.sum()),
+        'categories': len(category_ids),
+        'budgets': len(budget_ids),
+        'months': months,
+        'skew': skew,
+        'seed': random_seed,
+        'max_user_transactions': int(counts.max()),
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+
+def _copy_transactions(cursor, buffer: io.StringIO) -> None:
+    """Copies the CSV rows of the buffer into the transaction table, an empty description is NULL."""
+    buffer.seek(0)
+    cursor.copy_expert(
+        'COPY public.transaction (user_id, category_id, budget_id, amount, description, created_at, type) '
+        'FROM STDIN WITH (FORMAT csv)',
+        buffer
+    )
+
+
+def benchmark_app():
+    """Returns the application connected to the database at `BENCHMARK_DATABASE_URI`."""
+    from app import create_app
+    from app.config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['BENCHMARK_DATABASE_URI']
+    return create_app()
+
+
+def main() -> None:
+    """Parses the arguments, seeds the database and prints the summary as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--skew', type=float, default=1.1, help='Exponent of the Zipf distribution of transactions.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary = seed(benchmark_app(), args.users, args.transactions, args.months, args.skew, args.seed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
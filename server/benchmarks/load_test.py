@@ -0,0 +1,223 @@
+"""Load test of the main endpoints against the synthetic dataset of `benchmarks.dataset`.
+
+Every scenario sends requests of a sample of seeded users from concurrent keep-alive clients for a fixed duration
+and reports the throughput and the p50, p95 and p99 latency. The results are written as JSON, by default to
+`benchmarks/results/<commit>.json`, so runs of different commits can be compared with `--compare`.
+
+The production server is started with `gunicorn.conf.py` on the database at `BENCHMARK_DATABASE_URI` (the
+`SERVER_*` settings of the environment apply), unless `--port` of a running server is given.
+
+Usage:
+    BENCHMARK_DATABASE_URI=postgresql://... python -m benchmarks.load_test --seed --users 1000 --transactions 1000000
+    BENCHMARK_DATABASE_URI=postgresql://... python -m benchmarks.load_test --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.dataset import BENCHMARK_PASSWORD, benchmark_app, seed
+from benchmarks.server_benchmark import SERVER_DIRECTORY, wait_for_port
+
+RESULTS_DIRECTORY = Path(__file__).resolve().parent / 'results'
+"""Default directory of the results."""
+
+Request = tuple[str, str, bytes | None, dict[str, str]]
+"""Method, path, body and headers of a request."""
+
+
+def sample_users(app, count: int) -> list[tuple[int, str, dict[str, str]]]:
+    """Returns the ID, email and authentication headers of every `count`-th seeded user, heavy users included."""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select
+
+    from app.models.user_model import User
+    from app.utils.extensions import db
+
+    with app.app_context():
+        users = db.session.execute(select(User.id, User.email).order_by(User.id)).all()
+        step = max(len(users) // count, 1)
+        sample = []
+        for user_id, email in users[::step][:count]:
+            token = create_access_token(identity=str(user_id))
+            if 'cookies' in app.config['JWT_TOKEN_LOCATION']:
+                headers = {'Cookie': f"{app.config.get('JWT_ACCESS_COOKIE_NAME', 'access_token_cookie')}={token}"}
+            else:
+                headers = {'Authorization': f'Bearer {token}'}
+            sample.append((user_id, email, headers))
+    return sample
+
+
+def scenarios(users: list[tuple[int, str, dict[str, str]]]) -> dict[str, list[Request]]:
+    """Returns the requests of every scenario, one per sampled user."""
+    json_headers = {'Content-Type': 'application/json'}
+    since = (datetime.date.today() - datetime.timedelta(days=90)).isoformat()
+    return {
+        'login': [
+            ('POST', '/api/auth/login', json.dumps({'email': email, 'password': BENCHMARK_PASSWORD}).encode(),
+             json_headers)
+            for _, email, _ in users
+        ],
+        'transactions': [('GET', f'/api/transactions/?from={since}', None, headers) for _, _, headers in users],
+        'budgets_balance': [('GET', '/api/budgets/balance', None, headers) for _, _, headers in users],
+        'balance_forecast': [
+            ('POST', '/api/calculators/balance-forecast', json.dumps({'forecast_months': 12}).encode(),
+             {**headers, **json_headers})
+            for _, _, headers in users
+        ],
+    }
+
+
+def run_scenario(port: int, requests: list[Request], duration: float, concurrency: int) -> dict:
+    """Sends the requests round-robin from concurrent clients for `duration` seconds.
+
+    Returns:
+        dict: The number of requests and errors, the throughput and the latency percentiles in milliseconds.
+    """
+    deadline = time.monotonic() + duration
+    timings = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def client(index: int) -> None:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        sent = index
+        while time.monotonic() < deadline:
+            method, path, body, headers = requests[sent % len(requests)]
+            sent += concurrency
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 500 or response.status in (401, 403, 422):
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            timings[index].append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(timing for client_timings in timings for timing in client_timings)
+    if not latencies:
+        return {'requests': 0, 'errors': sum(errors)}
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 3),
+        'p99_ms': round(latencies[max(int(len(latencies) * 0.99) - 1, 0)], 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Returns the relative change in percent of the throughput and latencies of every scenario of both runs."""
+    comparison = {}
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        comparison[name] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ('requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms')
+            if current.get(metric) and previous.get(metric)
+        }
+    return comparison
+
+
+def current_commit() -> str | None:
+    """Returns the short hash of the checked out commit, or None outside of a git repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIRECTORY, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Parses the arguments, optionally seeds the database, runs the scenarios and writes the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', action='store_true', help='Recreate and seed the database first.')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--sample-users', type=int, default=200, help='Number of users sending the requests.')
+    parser.add_argument('--scenario', action='append', help='Scenario to run, all of them by default.')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--port', type=int, help='Port of a running server, by default Gunicorn is started.')
+    parser.add_argument('--output', help='Path of the JSON results, defaults to benchmarks/results/<commit>.json.')
+    parser.add_argument('--compare', help='Path of the JSON results of a previous run to compare with.')
+    args = parser.parse_args()
+
+    app = benchmark_app()
+    dataset = None
+    if args.seed:
+        dataset = seed(app, args.users, args.transactions, args.months, args.skew, args.random_seed)
+    requests = scenarios(sample_users(app, args.sample_users))
+    names = args.scenario or list(requests)
+
+    port = args.port or 8766
+    process = None
+    if args.port is None:
+        environment = {**os.environ, 'SQLALCHEMY_DATABASE_URI': os.environ['BENCHMARK_DATABASE_URI'],
+                       'SERVER_BIND': f'127.0.0.1:{port}'}
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+                                   cwd=SERVER_DIRECTORY, env=environment, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, timeout=60)
+        scenario_results = {}
+        for name in names:
+            run_scenario(port, requests[name], 2, args.concurrency)
+            scenario_results[name] = run_scenario(port, requests[name], args.duration, args.concurrency)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    commit = current_commit()
+    results = {
+        'commit': commit,
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'server_mode': app.config['SERVER_MODE'],
+        'workers': app.config['SERVER_WORKERS'],
+        'threads': app.config['SERVER_THREADS'],
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'sample_users': args.sample_users,
+        'dataset': dataset,
+        'scenarios': scenario_results,
+    }
+    if args.compare:
+        results['comparison'] = compare(results, json.loads(Path(args.compare).read_text()))
+
+    output = Path(args.output) if args.output else RESULTS_DIRECTORY / f'{commit or "results"}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
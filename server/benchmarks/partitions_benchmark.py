@@ -0,0 +1,121 @@
+"""Compares range-query latency of a plain and a monthly partitioned transaction table.
+
+The benchmark creates both tables in a scratch `bench` schema, seeds them with the same synthetic rows using
+`generate_series` and times typical date-ranged queries against each of them.
+
+Usage:
+    BENCHMARK_DATABASE_URI=postgresql://... python -m benchmarks.partitions_benchmark --rows 10000000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from sqlalchemy import create_engine, text
+
+COLUMNS = """
+    id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    category_id BIGINT NOT NULL,
+    budget_id BIGINT NOT NULL,
+    amount NUMERIC(12, 2) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP NOT NULL,
+    type TEXT NOT NULL
+"""
+"""Columns of the benchmark tables, matching the transaction table."""
+
+QUERIES = {
+    'user_month': "SELECT * FROM bench.{table} WHERE user_id = :user_id "
+                  "AND created_at >= :start AND created_at < :start + interval '1 month' ORDER BY created_at DESC",
+    'budget_quarter': "SELECT * FROM bench.{table} WHERE budget_id = :budget_id "
+                      "AND created_at >= :start AND created_at < :start + interval '3 months'",
+    'month_totals': "SELECT type, sum(amount) FROM bench.{table} "
+                    "WHERE created_at >= :start AND created_at < :start + interval '1 month' GROUP BY type",
+}
+"""Date-ranged queries to time, formatted with the table name."""
+
+
+def setup(connection, rows: int, users: int, months: int) -> None:
+    """Creates and seeds the plain and the partitioned benchmark tables."""
+    connection.execute(text('DROP SCHEMA IF EXISTS bench CASCADE'))
+    connection.execute(text('CREATE SCHEMA bench'))
+    connection.execute(text(f'CREATE TABLE bench.plain ({COLUMNS}, PRIMARY KEY (id))'))
+    connection.execute(text(
+        f'CREATE TABLE bench.partitioned ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)'
+    ))
+    for month in range(months):
+        connection.execute(text(
+            f"CREATE TABLE bench.partitioned_{month} PARTITION OF bench.partitioned FOR VALUES "
+            f"FROM (date_trunc('month', now()) - interval '{months - month - 1} months') "
+            f"TO (date_trunc('month', now()) - interval '{months - month - 2} months')"
+        ))
+
+    seed = f"""
+        SELECT n, 1 + (n % {users}), 1 + (n % 13), 1 + (n % {users * 3}), round((random() * 5000)::numeric, 2),
+               'transaction ' || n,
+               date_trunc('month', now()) - interval '{months - 1} months'
+                   + random() * (now() - (date_trunc('month', now()) - interval '{months - 1} months')),
+               CASE WHEN n % 4 = 0 THEN 'income' ELSE 'expense' END
+        FROM generate_series(1, {rows}) AS n
+    """
+    connection.execute(text(f'INSERT INTO bench.plain {seed}'))
+    connection.execute(text('INSERT INTO bench.partitioned SELECT * FROM bench.plain'))
+    for table in ('plain', 'partitioned'):
+        connection.execute(text(f'CREATE INDEX ON bench.{table} (user_id, created_at)'))
+        connection.execute(text(f'CREATE INDEX ON bench.{table} (budget_id, created_at)'))
+        connection.execute(text(f'ANALYZE bench.{table}'))
+
+
+def measure(connection, table: str, query: str, params: dict, repeat: int) -> dict:
+    """Runs a query several times and returns its latency percentiles in milliseconds."""
+    statement = text(query.format(table=table))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(statement, params).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def main() -> None:
+    """Parses the arguments, runs the benchmark and prints the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--skip-setup', action='store_true', help='Reuse the tables of a previous run.')
+    parser.add_argument('--output', help='Path of a JSON file to write the results to.')
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ['BENCHMARK_DATABASE_URI'])
+    with engine.connect() as connection:
+        if not args.skip_setup:
+            setup(connection, args.rows, args.users, args.months)
+            connection.commit()
+
+        start = connection.execute(text("SELECT date_trunc('month', now()) - interval '6 months'")).scalar()
+        params = {'user_id': 42, 'budget_id': 42, 'start': start}
+        results = {
+            name: {table: measure(connection, table, query, params, args.repeat)
+                   for table in ('plain', 'partitioned')}
+            for name, query in QUERIES.items()
+        }
+
+    output = json.dumps({'rows': args.rows, 'months': args.months, 'results': results}, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
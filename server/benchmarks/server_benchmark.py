@@ -0,0 +1,150 @@
+"""Compares the throughput of the development server and the production Gunicorn server.
+
+The benchmark starts both servers with the application configuration of the environment, one after the other,
+and sends the same authenticated request from concurrent keep-alive clients for a fixed duration. The access
+token is issued for an existing user, so the database of the configuration must contain it.
+
+Usage:
+    python -m benchmarks.server_benchmark --user-id 1 --duration 20 --concurrency 32
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+
+SERVER_DIRECTORY = Path(__file__).resolve().parent.parent
+"""Directory of the server entry points."""
+
+SAVINGS_REQUEST = {'initial_sum': 1000, 'term_months': 12, 'annual_rate': 10}
+"""Body of the default benchmarked request."""
+
+
+def server_commands(port: int) -> dict[str, list[str]]:
+    """Returns the commands starting every benchmarked server on the given port."""
+    return {
+        'development': [sys.executable, '-m', 'flask', '--app', 'main', 'run', '--port', str(port)],
+        'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+    }
+
+
+def auth_headers(user_id: int) -> dict[str, str]:
+    """Returns the headers authenticating requests as the given user."""
+    app = create_app()
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    if 'cookies' in app.config['JWT_TOKEN_LOCATION']:
+        return {'Cookie': f"{app.config.get('JWT_ACCESS_COOKIE_NAME', 'access_token_cookie')}={token}"}
+    return {'Authorization': f'Bearer {token}'}
+
+
+def wait_for_port(port: int, timeout: float) -> None:
+    """Waits until a server accepts connections on the given port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f'Server did not start on port {port}')
+
+
+def load(port: int, method: str, path: str, body: bytes | None, headers: dict, duration: float,
+         concurrency: int) -> dict:
+    """Sends requests from concurrent clients for `duration` seconds and returns the throughput and latencies."""
+    deadline = time.monotonic() + duration
+    timings = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def client(index: int) -> None:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            timings[index].append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+    clients = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(timing for client_timings in timings for timing in client_timings)
+    if not latencies:
+        return {'requests': 0, 'errors': sum(errors)}
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+
+
+def main() -> None:
+    """Parses the arguments, runs the benchmark and prints the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--user-id', type=int, required=True, help='ID of an existing user to authenticate as.')
+    parser.add_argument('--method', default='POST')
+    parser.add_argument('--path', default='/api/calculators/savings')
+    parser.add_argument('--body', default=json.dumps(SAVINGS_REQUEST), help='JSON body of the requests.')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='Path of a JSON file to write the results to.')
+    args = parser.parse_args()
+
+    headers = {**auth_headers(args.user_id), 'Content-Type': 'application/json'}
+    body = args.body.encode() if args.body else None
+    results = {}
+    for name, command in server_commands(args.port).items():
+        process = subprocess.Popen(command, cwd=SERVER_DIRECTORY, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port, timeout=30)
+            load(args.port, args.method, args.path, body, headers, 2, args.concurrency)
+            results[name] = load(args.port, args.method, args.path, body, headers, args.duration,
+                                 args.concurrency)
+        finally:
+            process.terminate()
+            process.wait()
+
+    if results.get('development', {}).get('requests_per_second') and 'requests_per_second' in results['gunicorn']:
+        results['speedup'] = round(
+            results['gunicorn']['requests_per_second'] / results['development']['requests_per_second'], 2
+        )
+
+    output = json.dumps({'path': args.path, 'concurrency': args.concurrency, 'results': results}, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
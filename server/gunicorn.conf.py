@@ -0,0 +1,87 @@
+"""Gunicorn settings of the production server, taken from `Config`.
+
+With `SERVER_MODE=wsgi` (the default) the Flask application of `wsgi.py` is served by threaded workers. With
+`SERVER_MODE=asgi` the ASGI application of `asgi.py` is served by Uvicorn workers, which run the I/O-bound
+endpoints on an event loop and the other endpoints in a pool of `SERVER_THREADS` threads.
+
+The application is loaded once in the master process before the workers are forked, so the imported modules
+are shared by all workers copy-on-write. Every worker then drops the database connections inherited from the
+master and opens a connection per thread in advance. Workers are restarted after `SERVER_MAX_REQUESTS`
+requests, with a random jitter so they do not restart at the same time.
+
+The workers share their request metrics through `METRICS_DIR`, a fresh temporary directory unless it is set.
+The counters of a worker are kept in the archive of the directory when it exits, see `app.utils.metrics`.
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+
+import gc
+import os
+import tempfile
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'budget-metrics-{os.getpid()}'))
+
+from app.config import Config  # noqa: E402
+
+if Config.SERVER_MODE == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'wsgi:app'
+    worker_class = 'gthread' if Config.SERVER_THREADS > 1 else 'sync'
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+timeout = Config.SERVER_TIMEOUT
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+preload_app = True
+
+
+def on_starting(server) -> None:
+    """Removes the metrics of a previous run of the server from `METRICS_DIR`."""
+    if Config.METRICS_DIR:
+        for path in Path(Config.METRICS_DIR).glob('metrics-*.json'):
+            path.unlink()
+
+
+def pre_fork(server, worker) -> None:
+    """Moves the objects of the loaded application out of the reach of the garbage collector.
+
+    The collector would otherwise touch them in every worker and copy the shared memory pages.
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker) -> None:
+    """Replaces the database connections inherited from the master by fresh ones for the worker."""
+    from app.utils.warmup import reset_pool, warm_up_pool
+    if Config.SERVER_MODE == 'asgi':
+        from asgi import flask_app as app
+    else:
+        from wsgi import app
+
+    reset_pool(app)
+    try:
+        opened = warm_up_pool(app, Config.SERVER_THREADS)
+        server.log.info('Worker %s opened %s database connection(s)', worker.pid, opened)
+    except SQLAlchemyError as e:
+        server.log.warning('Worker %s could not warm up the database pool: %s', worker.pid, e)
+
+
+def worker_exit(server, worker) -> None:
+    """Writes the final metrics of an exiting worker."""
+    from app.utils.metrics import registry
+    registry.flush(Config.METRICS_DIR)
+
+
+def child_exit(server, worker) -> None:
+    """Merges the metrics of an exited worker into the archive, so they are kept after the worker is replaced."""
+    from app.utils.metrics import archive_worker
+    if Config.METRICS_DIR:
+        archive_worker(Config.METRICS_DIR, worker.pid)
@@ -1,4 +1,7 @@
-"""Runs the Flask application with CORS enabled."""
+"""Runs the Flask application with CORS enabled on the development server.
+
+In production the application is served by Gunicorn from `wsgi.py`, see `gunicorn.conf.py`.
+"""
 
 from app import create_app
 
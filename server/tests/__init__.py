@@ -0,0 +1 @@
+"""Tests of the application, run with `python -m pytest` from the server directory."""
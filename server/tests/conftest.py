@@ -0,0 +1,68 @@
+"""Fixtures of the tests, an application on an in-memory SQLite database with an authenticated user.
+
+The configuration is read from the environment when `app.config` is imported, so it is set up here first.
+"""
+
+import os
+
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+os.environ['JWT_SECRET_KEY'] = 'tests-jwt-secret-key-of-at-least-32-bytes'
+os.environ['JWT_TOKEN_LOCATION'] = 'headers'
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.models.user_model import User
+from app.utils.extensions import db
+
+PASSWORD = 'Password123!'
+"""Password of the users of the tests."""
+
+
+@pytest.fixture
+def app():
+    """Application with a fresh in-memory database, with an application context pushed."""
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    """Test client of the application."""
+    return app.test_client()
+
+
+def create_user(username: str = 'tester', user_type: str = 'default') -> User:
+    """Creates a user with the password `PASSWORD`."""
+    user = User(username, f'{username}@example.com', PASSWORD, user_type)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def auth_headers(user: User) -> dict[str, str]:
+    """Returns the headers authenticating requests as the user."""
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def user(app) -> User:
+    """A default user."""
+    return create_user()
+
+
+@pytest.fixture
+def headers(user) -> dict[str, str]:
+    """Headers authenticating requests as `user`."""
+    return auth_headers(user)
+
+
+def create(client, headers: dict[str, str], path: str, body: dict, **query: str) -> dict:
+    """Creates a record through the API and returns its data, failing on an unexpected status."""
+    response = client.post(path, json=body, headers=headers, query_string=query)
+    assert response.status_code in (200, 201), response.get_json()
+    return response.get_json()['data']
@@ -0,0 +1,73 @@
+"""Tests of the admission control of `app.utils.admission`."""
+
+import pytest
+
+from app.utils.admission import AdmissionController, controller
+
+
+@pytest.fixture
+def limits():
+    """Admission controller admitting 2 requests, at most 1 of them heavy."""
+    admission = AdmissionController()
+    admission.configure({
+        'ADMISSION_CONTROL_ENABLED': True,
+        'ADMISSION_MAX_IN_FLIGHT': 2,
+        'ADMISSION_HEAVY_MAX_IN_FLIGHT': 1,
+        'ADMISSION_POOL_WAIT_MS': 500,
+        'ADMISSION_HEAVY_POOL_WAIT_MS': 100,
+        'ADMISSION_RETRY_AFTER': 2,
+    })
+    return admission
+
+
+def test_heavy_requests_are_limited_first(limits):
+    assert limits.admit('heavy')
+    assert not limits.admit('heavy')
+    assert limits.admit('normal')
+    assert not limits.admit('normal')
+    assert limits.admit('critical')
+
+    statistics = limits.statistics()
+    assert statistics['in_flight'] == {'critical': 1, 'normal': 1, 'heavy': 1}
+    assert statistics['rejected'] == {'critical': 0, 'normal': 1, 'heavy': 1}
+
+
+def test_released_requests_free_their_slot(limits):
+    assert limits.admit('heavy')
+    limits.release('heavy')
+    assert limits.admit('heavy')
+    assert limits.statistics()['in_flight']['heavy'] == 1
+
+
+def test_disabled_controller_admits_everything(limits):
+    limits.enabled = False
+    assert all(limits.admit('heavy') for _ in range(10))
+
+
+def test_rejected_request_gets_retry_after(app, client, headers):
+    controller.heavy_max_in_flight = 0
+    try:
+        response = client.get('/api/transactions/', headers=headers)
+    finally:
+        controller.configure(app.config, controller.engine)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['ADMISSION_RETRY_AFTER'])
+
+
+def test_batch_operations_do_not_leak_heavy_slots(client, headers):
+    operations = {'operations': [{'method': 'GET', 'path': '/api/transactions/'}]}
+    for _ in range(controller.heavy_max_in_flight + 1):
+        assert client.post('/api/batch/', json=operations, headers=headers).status_code != 503
+
+    assert controller.statistics()['in_flight']['heavy'] == 0
+    assert client.get('/api/transactions/', headers=headers).status_code != 503
+
+
+@pytest.mark.parametrize('mark', ['admission_priority', 'query_budget', 'event_loop'])
+def test_marks_of_views_are_copied_to_their_wrappers(app, mark):
+    for endpoint, view in app.view_functions.items():
+        wrapped = view
+        while hasattr(wrapped, '__wrapped__'):
+            wrapped = wrapped.__wrapped__
+            assert getattr(view, mark, None) == getattr(wrapped, mark, None), endpoint
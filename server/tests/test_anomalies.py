@@ -0,0 +1,92 @@
+"""Tests of the running category statistics of `app.services.anomalies`."""
+
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.models.alert_model import Alert
+from app.models.category_month_model import CategoryMonth
+from app.models.category_stats_model import CategoryStats
+from app.services.anomalies import _batch_stats, update_category_stats
+from app.utils.extensions import db
+from tests.conftest import create
+
+AMOUNTS = [12.5, 40, 7.25, 100, 33, 58.75]
+
+
+def transactions(user_id: int, category_id: int, amounts: list[float], start: int = 1) -> list[SimpleNamespace]:
+    """Returns expenses of the given amounts, each in its own month of 2023 from the month `start` on."""
+    return [SimpleNamespace(user_id=user_id, category_id=category_id, amount=amount, type='expense',
+                            created_at=datetime.datetime(2023, month, 15))
+            for month, amount in enumerate(amounts, start)]
+
+
+def add_expense(client, headers, budget: dict, category: dict, amount: float, created_at: datetime.date) -> dict:
+    return create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': f'{created_at.isoformat()}T12:00:00'
+    })
+
+
+def months_ago(months: int) -> datetime.date:
+    today = datetime.date.today()
+    month = today.year * 12 + today.month - 1 - months
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+def test_batch_stats_match_the_population_variance():
+    stats = _batch_stats([(1, 2, amount) for amount in AMOUNTS] + [(1, 3, 5)])
+
+    count, mean, m2 = stats[(1, 2)]
+    assert count == len(AMOUNTS)
+    assert mean == pytest.approx(np.mean(AMOUNTS))
+    assert m2 / count == pytest.approx(np.var(AMOUNTS))
+    assert stats[(1, 3)] == (1, 5.0, 0.0)
+
+
+def test_batches_are_added_and_removed(client, headers, user):
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+
+    update_category_stats(transactions(user.id, food['id'], AMOUNTS[:2]))
+    update_category_stats(transactions(user.id, food['id'], AMOUNTS[2:], start=3))
+    update_category_stats(transactions(user.id, food['id'], AMOUNTS[1:4], start=2), -1)
+    db.session.commit()
+
+    remaining = AMOUNTS[:1] + AMOUNTS[4:]
+    stats = db.session.get(CategoryStats, (user.id, food['id']))
+    assert stats.count == len(remaining)
+    assert stats.mean == pytest.approx(np.mean(remaining))
+    assert stats.m2 / stats.count == pytest.approx(np.var(remaining))
+
+
+def test_statistics_are_kept_over_monthly_totals(client, headers, user):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 10000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    salary = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    for amount, months in ((30, 2), (20, 2), (80, 1)):
+        add_expense(client, headers, budget, food, amount, months_ago(months))
+    create(client, headers, '/api/transactions/', {'amount': 1500, 'type': 'income', 'description': 'Monthly pay',
+                                                   'budget_id': budget['id'], 'category_id': salary['id']})
+
+    stats = db.session.get(CategoryStats, (user.id, food['id']))
+    assert (stats.count, stats.mean, stats.m2) == (2, pytest.approx(65), pytest.approx(450))
+    assert CategoryMonth.query.filter_by(category_id=food['id']).count() == 2
+    assert db.session.get(CategoryStats, (user.id, salary['id'])) is None
+
+
+def test_unusual_month_is_flagged_once(app, client, headers):
+    app.config['ANOMALY_MIN_MONTHS'] = 3
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 10000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    for months, amount in enumerate((90, 110, 100, 95, 105), 1):
+        assert 'alert' not in add_expense(client, headers, budget, food, amount, months_ago(months))
+
+    assert 'alert' not in add_expense(client, headers, budget, food, 100, months_ago(0))
+    alert = add_expense(client, headers, budget, food, 300, months_ago(0))['alert']
+    assert add_expense(client, headers, budget, food, 50, months_ago(0)).get('alert') is None
+
+    assert alert['expected'] == 100
+    assert alert['value'] > app.config['ANOMALY_Z_THRESHOLD']
+    assert Alert.query.filter_by(kind='anomaly').count() == 1
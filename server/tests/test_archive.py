@@ -0,0 +1,77 @@
+"""Tests of the access to archived transactions of `app.services.archive`."""
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.transaction_model import Transaction
+from app.services.archive import ARCHIVED_COLUMNS
+from app.utils.extensions import db
+from tests.conftest import auth_headers, create, create_user
+
+
+def archive(transaction_id: int) -> None:
+    """Moves a transaction into the archive table, like `archive_transactions` does."""
+    transaction = db.session.get(Transaction, transaction_id)
+    db.session.add(ArchivedTransaction(**{name: getattr(transaction, name) for name in ARCHIVED_COLUMNS}))
+    db.session.delete(transaction)
+    db.session.commit()
+
+
+def archived_expense(client, headers, amount: float = 30) -> tuple[dict, dict, dict]:
+    """Creates a budget, an expense category and an archived expense, returns them."""
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    category = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    transaction = create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': '2020-03-01T12:00:00'
+    })
+    archive(transaction['id'])
+    return budget, category, transaction
+
+
+def budget_current(client, headers, budget_id: int) -> float:
+    return float(client.get(f'/api/budgets/{budget_id}', headers=headers).get_json()['data']['current'])
+
+
+def test_archived_transaction_is_updated(client, headers):
+    budget, _, transaction = archived_expense(client, headers)
+
+    response = client.put(f"/api/transactions/{transaction['id']}", headers=headers,
+                          json={'amount': 50, 'type': 'expense', 'description': 'Groceries'})
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['id'] == transaction['id']
+    assert db.session.get(ArchivedTransaction, transaction['id']) is None
+    assert db.session.get(Transaction, transaction['id']).amount == 50
+    assert budget_current(client, headers, budget['id']) == 50
+
+
+def test_archived_transaction_is_deleted(client, headers):
+    budget, _, transaction = archived_expense(client, headers)
+
+    response = client.delete(f"/api/transactions/{transaction['id']}", headers=headers)
+
+    assert response.status_code == 200
+    assert client.get(f"/api/transactions/{transaction['id']}", headers=headers).status_code == 404
+    assert budget_current(client, headers, budget['id']) == 100
+
+
+def test_transaction_of_another_user_is_not_restored(client, headers):
+    _, _, transaction = archived_expense(client, headers)
+    other = auth_headers(create_user('other'))
+
+    assert client.delete(f"/api/transactions/{transaction['id']}", headers=other).status_code == 404
+    assert db.session.get(ArchivedTransaction, transaction['id']) is not None
+
+
+def test_changes_of_archived_transactions_are_synced(client, headers):
+    _, _, transaction = archived_expense(client, headers)
+    other = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    since = client.get('/api/sync/', headers=headers).get_json()['data']['seq']
+
+    create(client, headers, '/api/categories/reassign', {'category_id': other['id'],
+                                                         'transaction_ids': [transaction['id']]})
+
+    changes = client.get('/api/sync/', headers=headers, query_string={'since': since}).get_json()['data']
+    assert not changes['full']
+    assert [(row['id'], row['category_id']) for row in changes['upserts']['transactions']] == [
+        (transaction['id'], other['id'])
+    ]
@@ -0,0 +1,112 @@
+"""Tests of the ASGI application of `app.asgi`, serving the views marked with `event_loop_view` on the event loop.
+
+The asynchronous engine can not share an in-memory SQLite database, so the application uses a database file.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app import create_app
+from app.asgi import create_asgi_app
+from app.config import Config
+from app.utils.admission import controller
+from app.utils.extensions import async_db, db
+from tests.conftest import auth_headers, create, create_user
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application on a database file, with the asynchronous engine of the ASGI application."""
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'asgi.db'}")
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        async_db.init_app(app)
+        yield app
+        db.session.remove()
+        asyncio.run(async_db.dispose())
+        db.engine.dispose()
+
+
+def login() -> dict[str, str]:
+    """Creates a user and returns the headers authenticating requests as the user.
+
+    The session of the test is closed, so its read transaction does not lock the database file against the
+    requests handled by other threads.
+    """
+    headers = auth_headers(create_user())
+    db.session.close()
+    return headers
+
+
+def call(asgi, method: str, path: str, headers: dict[str, str] = None, body: dict = None) -> tuple[int, dict, dict]:
+    """Sends a request to the ASGI application and returns its status code, headers and JSON body."""
+    content = json.dumps(body).encode() if body is not None else b''
+    messages = [{'type': 'http.request', 'body': content, 'more_body': False}]
+    sent = []
+
+    async def receive() -> dict:
+        return messages.pop(0)
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    request_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    if body is not None:
+        request_headers.append((b'content-type', b'application/json'))
+    scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+             'query_string': b'', 'headers': request_headers, 'server': ('localhost', 80)}
+    asyncio.run(asgi(scope, receive, send))
+    response_headers = {name.decode(): value.decode() for name, value in sent[0]['headers']}
+    return sent[0]['status'], response_headers, json.loads(sent[1]['body'])
+
+
+def test_event_loop_view_matches_flask_view(app):
+    app.config['SERVER_TIMING_ENABLED'] = True
+    headers = login()
+    client = app.test_client()
+    create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    asgi = create_asgi_app(app)
+
+    status_code, response_headers, body = call(asgi, 'GET', '/api/budgets/', headers)
+
+    assert status_code == 200
+    assert body == client.get('/api/budgets/', headers=headers).get_json()
+    assert 'queries' in response_headers['server-timing']
+    assert 'db;dur=0.000;desc="0 queries"' not in response_headers['server-timing']
+
+
+def test_event_loop_view_uses_jwt_error_handlers(app):
+    asgi = create_asgi_app(app)
+
+    status_code, _, body = call(asgi, 'GET', '/api/budgets/balance')
+
+    assert status_code == 401
+    assert body['message'] == 'Authorization token is missing or invalid'
+
+
+def test_event_loop_view_is_admitted_and_released(app):
+    headers = login()
+    asgi = create_asgi_app(app)
+    admitted = controller.statistics()['admitted']['heavy']
+
+    status_code, _, _ = call(asgi, 'GET', '/api/transactions/', headers)
+
+    assert status_code == 404
+    statistics = controller.statistics()
+    assert statistics['admitted']['heavy'] == admitted + 1
+    assert statistics['in_flight']['heavy'] == 0
+
+
+def test_other_views_run_in_threads(app):
+    headers = login()
+    asgi = create_asgi_app(app)
+
+    status_code, _, body = call(asgi, 'POST', '/api/budgets/', headers, {'name': 'Wallet', 'initial': 100})
+
+    assert status_code == 201, body
+    assert (call(asgi, 'GET', '/api/budgets/balance', headers)[2]
+            == app.test_client().get('/api/budgets/balance', headers=headers).get_json())
@@ -0,0 +1,75 @@
+"""Tests of the balance history of budgets, `app.services.balance_history` and its endpoint."""
+
+import datetime
+
+from app.models.balance_snapshot_model import BalanceSnapshot
+from app.models.budget_model import Budget
+from app.utils.extensions import db
+from tests.conftest import create
+
+TODAY = datetime.date.today()
+
+
+def days_ago(days: int) -> datetime.date:
+    return TODAY - datetime.timedelta(days=days)
+
+
+def history(client, headers, budget_id: int, **query: str):
+    return client.get(f'/api/budgets/{budget_id}/history', headers=headers, query_string=query)
+
+
+def add_expense(client, headers, budget: dict, category: dict, amount: float, day: datetime.date) -> dict:
+    return create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': f'{day.isoformat()}T12:00:00'
+    })
+
+
+def test_closed_days_are_cached_and_invalidated(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    category = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    add_expense(client, headers, budget, category, 30, days_ago(2))
+    query = {'from': days_ago(3).isoformat(), 'to': days_ago(1).isoformat()}
+
+    response = history(client, headers, budget['id'], **query)
+
+    assert response.status_code == 200
+    assert [day['balance'] for day in response.get_json()['data']['history']] == [100, 70, 70]
+    assert BalanceSnapshot.query.filter_by(budget_id=budget['id']).count() == 3
+
+    add_expense(client, headers, budget, category, 20, days_ago(1))
+
+    response = history(client, headers, budget['id'], **query)
+    assert [day['balance'] for day in response.get_json()['data']['history']] == [100, 70, 50]
+
+
+def test_range_defaults_to_the_life_of_the_budget(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+
+    data = history(client, headers, budget['id']).get_json()['data']
+
+    assert (data['from'], data['to']) == (TODAY.isoformat(), TODAY.isoformat())
+    assert [day['balance'] for day in data['history']] == [100]
+
+
+def test_range_is_capped_with_a_single_bound(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+
+    assert history(client, headers, budget['id'], **{'from': '1900-01-01'}).status_code == 400
+
+
+def test_range_is_capped_without_bounds_for_an_old_budget(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    db.session.get(Budget, budget['id']).created_at = datetime.date(1990, 1, 1)
+    db.session.commit()
+
+    assert history(client, headers, budget['id']).status_code == 400
+    assert history(client, headers, budget['id'], to='1995-01-01').status_code == 200
+
+
+def test_start_after_default_end_is_rejected(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+
+    response = history(client, headers, budget['id'], **{'from': (TODAY + datetime.timedelta(days=1)).isoformat()})
+
+    assert response.status_code == 400
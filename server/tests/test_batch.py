@@ -0,0 +1,82 @@
+"""Tests of the batch API."""
+
+import flask_jwt_extended.view_decorators
+
+from tests.conftest import create
+
+
+def batch(client, headers, *operations, atomic=True):
+    """Sends a batch request of the operations, given as (method, path, body) tuples."""
+    return client.post('/api/batch/', headers=headers, json={
+        'operations': [{'method': method, 'path': path, 'body': body} for method, path, body in operations],
+        'atomic': atomic
+    })
+
+
+def test_operations_run_in_order(client, headers):
+    response = batch(client, headers,
+                     ('POST', '/api/categories/', {'name': 'Salary', 'type': 'incomes'}),
+                     ('GET', '/api/categories/?with_stats=true', None))
+
+    assert response.status_code == 200
+    created, listed = response.get_json()['data']
+    assert created['status'] == 201
+    assert 'Salary' in [category['name'] for category in listed['body']['data']]
+
+
+def test_view_arguments_are_resolved(client, headers):
+    created = batch(client, headers, ('POST', '/api/categories/', {'name': 'Rent', 'type': 'expenses'}))
+    category_id = created.get_json()['data'][0]['body']['data']['id']
+
+    response = batch(client, headers, ('GET', f'/api/categories/{category_id}', None))
+    assert response.get_json()['data'][0]['body']['data']['name'] == 'Rent'
+
+
+def test_encoded_batch_path_is_rejected(client, headers):
+    response = batch(client, headers, ('POST', '/api/%62atch/', {'operations': []}), atomic=False)
+
+    assert response.status_code == 200
+    assert response.get_json()['data'][0]['status'] == 400
+
+
+def test_unknown_path_fails_the_batch(client, headers):
+    response = batch(client, headers,
+                     ('POST', '/api/categories/', {'name': 'Gifts', 'type': 'expenses'}),
+                     ('GET', '/api/unknown', None),
+                     ('GET', '/api/categories/', None))
+
+    assert response.status_code == 400
+    results = response.get_json()['data']
+    assert results[1]['status'] == 404
+    assert results[2]['skipped']
+    assert client.get('/api/categories/', headers=headers).get_json()['data'] == []
+
+
+def test_batch_is_authenticated_once(client, headers, monkeypatch):
+    decode = flask_jwt_extended.view_decorators._decode_jwt_from_request
+    calls = []
+    monkeypatch.setattr(flask_jwt_extended.view_decorators, '_decode_jwt_from_request',
+                        lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+
+    response = batch(client, headers, *[('GET', '/api/users/me', None)] * 3)
+    assert response.status_code == 200
+    assert len(calls) == 1
+
+
+def test_batch_requires_authentication(client):
+    assert batch(client, {}, ('GET', '/api/users/me', None)).status_code == 401
+
+
+def test_idempotency_key_is_not_shared_by_operations(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    category = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    transaction = {'amount': 5, 'type': 'expense', 'budget_id': budget['id'], 'category_id': category['id']}
+
+    response = batch(client, {**headers, 'Idempotency-Key': 'batch-1'},
+                     ('POST', '/api/transactions/', {**transaction, 'description': 'Bread'}),
+                     ('POST', '/api/transactions/', {**transaction, 'description': 'Milk'}))
+
+    assert response.status_code == 200
+    results = response.get_json()['data']
+    assert [result['status'] for result in results] == [201, 201]
+    assert results[0]['body']['data']['id'] != results[1]['body']['data']['id']
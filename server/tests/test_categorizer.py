@@ -0,0 +1,46 @@
+"""Tests of the category suggestions of `app.services.categorizer`."""
+
+from tests.conftest import create
+
+
+def suggested_category(client, headers, description: str) -> int:
+    response = client.post('/api/categories/suggest', json={'descriptions': [description], 'k': 1},
+                           headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['data'][0][0]['category_id']
+
+
+def test_cached_model_follows_reassigned_transactions(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    cafe = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    create(client, headers, '/api/transactions/', {'amount': 5, 'type': 'expense', 'description': 'Coffee latte',
+                                                   'budget_id': budget['id'], 'category_id': cafe['id']})
+    lattes = [create(client, headers, '/api/transactions/', {'amount': amount, 'type': 'expense',
+                                                             'description': 'Latte coffee', 'budget_id': budget['id'],
+                                                             'category_id': food['id']})
+              for amount in (3, 4)]
+    assert suggested_category(client, headers, 'coffee') == food['id']
+
+    create(client, headers, '/api/categories/reassign',
+           {'category_id': cafe['id'], 'transaction_ids': [lattes[0]['id']]})
+
+    assert suggested_category(client, headers, 'coffee') == cafe['id']
+
+
+def test_cached_model_follows_changed_descriptions(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    cafe = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    for description, category in (('Tea house', cafe), ('Tea leaves', food), ('Tea bags', food)):
+        create(client, headers, '/api/transactions/', {'amount': 5, 'type': 'expense', 'description': description,
+                                                       'budget_id': budget['id'], 'category_id': category['id']})
+    coffee = create(client, headers, '/api/transactions/', {'amount': 4, 'type': 'expense', 'description': 'Coffee',
+                                                            'budget_id': budget['id'], 'category_id': cafe['id']})
+    assert suggested_category(client, headers, 'tea') == food['id']
+
+    response = client.put(f"/api/transactions/{coffee['id']}", headers=headers,
+                          json={'amount': 4, 'type': 'expense', 'description': 'Tea'})
+    assert response.status_code == 200
+
+    assert suggested_category(client, headers, 'tea') == cafe['id']
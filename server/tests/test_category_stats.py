@@ -0,0 +1,63 @@
+"""Tests of the category list with usage statistics of `app.services.reassignment.category_stats`."""
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.transaction_model import Transaction
+from app.services.archive import ARCHIVED_COLUMNS
+from app.utils.extensions import db
+from tests.conftest import auth_headers, create, create_user
+
+
+def add_expense(client, headers, budget: dict, category: dict, amount: float, created_at: str) -> dict:
+    return create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': created_at
+    })
+
+
+def categories_with_stats(client, headers) -> list[dict]:
+    response = client.get('/api/categories/', headers=headers, query_string={'with_stats': 'true'})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+
+def test_stats_include_archived_transactions(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    cafe = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    unused = create(client, headers, '/api/categories/', {'name': 'Travel', 'type': 'expenses'})
+    archived = add_expense(client, headers, budget, food, 30, '2020-01-10T12:00:00')
+    add_expense(client, headers, budget, food, 12.5, '2024-05-10T12:00:00')
+    add_expense(client, headers, budget, cafe, 8, '2024-06-01T09:30:00')
+    row = db.session.get(Transaction, archived['id'])
+    db.session.add(ArchivedTransaction(**{name: getattr(row, name) for name in ARCHIVED_COLUMNS}))
+    db.session.delete(row)
+    db.session.commit()
+
+    stats = categories_with_stats(client, headers)
+
+    assert [(category['id'], category['transactions_count'], category['total_amount']) for category in stats] == [
+        (food['id'], 2, 42.5), (cafe['id'], 1, 8), (unused['id'], 0, 0)
+    ]
+    assert [category['last_used_at'] for category in stats] == ['2024-05-10T12:00:00', '2024-06-01T09:30:00', None]
+
+
+def test_ties_are_ordered_by_recency(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    cafe = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    add_expense(client, headers, budget, food, 10, '2024-05-10T12:00:00')
+    add_expense(client, headers, budget, cafe, 10, '2024-06-10T12:00:00')
+
+    assert [category['id'] for category in categories_with_stats(client, headers)] == [cafe['id'], food['id']]
+
+
+def test_transactions_of_other_users_are_not_counted(client, headers):
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    other_headers = auth_headers(create_user('other'))
+    other_budget = create(client, other_headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    other_food = create(client, other_headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    add_expense(client, other_headers, other_budget, other_food, 10, '2024-05-10T12:00:00')
+
+    stats = categories_with_stats(client, headers)
+
+    assert [(category['id'], category['transactions_count']) for category in stats] == [(food['id'], 0)]
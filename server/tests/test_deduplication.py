@@ -0,0 +1,81 @@
+"""Tests of the duplicate detection of `app.services.deduplication`."""
+
+import datetime
+
+from sqlalchemy import Select, delete
+
+from app.models.transaction_fingerprint_model import TransactionFingerprint
+from app.models.transaction_model import Transaction
+from app.services.deduplication import claim_fingerprint, transaction_fingerprint
+from app.utils.extensions import db
+from tests.conftest import create
+
+DAY = datetime.datetime(2025, 3, 14, 9, 30)
+
+
+def test_fingerprint_normalizes_the_description_and_amount():
+    fingerprint = transaction_fingerprint(1, 40, DAY, 'Coffee & cake')
+    assert transaction_fingerprint(1, '40.00', DAY.replace(hour=18), '  coffee, CAKE!') == fingerprint
+    assert transaction_fingerprint(2, 40, DAY, 'Coffee & cake') != fingerprint
+    assert transaction_fingerprint(1, 40.01, DAY, 'Coffee & cake') != fingerprint
+    assert transaction_fingerprint(1, 40, DAY + datetime.timedelta(days=1), 'Coffee & cake') != fingerprint
+    assert transaction_fingerprint(1, 40, DAY, None) == transaction_fingerprint(1, 40, DAY, '')
+
+
+def setup_expense(client, headers) -> dict:
+    """Creates a budget, a category and an expense and returns the body creating the same expense again."""
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    body = {'amount': 40, 'type': 'expense', 'description': 'Groceries', 'created_at': DAY.isoformat(),
+            'budget_id': budget['id'], 'category_id': food['id']}
+    create(client, headers, '/api/transactions/', body)
+    return body
+
+
+def test_duplicates_are_allowed_skipped_or_rejected(client, headers):
+    body = setup_expense(client, headers)
+    original = Transaction.query.one()
+
+    skipped = client.post('/api/transactions/', json=body, headers=headers, query_string={'on_duplicate': 'skip'})
+    assert skipped.status_code == 200
+    assert skipped.get_json()['data']['id'] == original.id
+    rejected = client.post('/api/transactions/', json=body, headers=headers, query_string={'on_duplicate': 'reject'})
+    assert rejected.status_code == 409
+    allowed = create(client, headers, '/api/transactions/', body)
+    assert allowed['duplicate_of'] == original.id
+    assert Transaction.query.count() == 2
+
+
+def test_skip_creates_the_transaction_when_the_duplicate_is_gone(client, headers, user):
+    body = setup_expense(client, headers)
+    original = Transaction.query.one()
+    # A later transaction keeps SQLite from reusing the ID of the deleted one for the new transaction.
+    create(client, headers, '/api/transactions/', {**body, 'description': 'Bakery'})
+    db.session.execute(delete(Transaction).where(Transaction.id == original.id))
+    db.session.commit()
+
+    response = client.post('/api/transactions/', json=body, headers=headers, query_string={'on_duplicate': 'skip'})
+
+    assert response.status_code == 201
+    assert Transaction.query.count() == 2
+
+
+def test_claim_retries_a_fingerprint_released_concurrently(client, headers, user, monkeypatch):
+    setup_expense(client, headers)
+    duplicate = Transaction(**{column: getattr(Transaction.query.one(), column)
+                               for column in ('user_id', 'category_id', 'budget_id', 'amount', 'description',
+                                              'created_at', 'type')})
+    db.session.add(duplicate)
+    db.session.flush()
+
+    execute = db.session.execute
+
+    def release_before_lookup(statement, *args, **kwargs):
+        if isinstance(statement, Select):
+            execute(delete(TransactionFingerprint))
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, 'execute', release_before_lookup)
+    assert claim_fingerprint(user.id, duplicate) is None
+    monkeypatch.undo()
+    assert TransactionFingerprint.query.one().transaction_id == duplicate.id
@@ -0,0 +1,104 @@
+"""Tests of the background deletion of `app.services.deletion`."""
+
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models.category_model import Category
+from app.models.category_stats_model import CategoryStats
+from app.models.category_token_model import CategoryToken
+from app.models.deletion_job_model import DeletionJob
+from app.models.user_model import User
+from app.services.deletion import run_deletion_jobs
+from app.utils.extensions import db
+from tests.conftest import auth_headers, create, create_user
+
+
+def setup_budget(client, headers):
+    """Creates a budget with an income and an expense and returns the budget."""
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    salary = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    create(client, headers, '/api/transactions/', {'amount': 1500, 'type': 'income', 'description': 'Monthly pay',
+                                                   'budget_id': budget['id'], 'category_id': salary['id']})
+    create(client, headers, '/api/transactions/', {'amount': 40, 'type': 'expense', 'description': 'Groceries',
+                                                   'budget_id': budget['id'], 'category_id': food['id']})
+    return budget
+
+
+def year_income(client, headers) -> float:
+    response = client.post('/api/calculators/tax-fop/income', json={'tax_group': 3, 'period': 'year'},
+                           headers=headers)
+    return response.get_json()['data']['year']['income']
+
+
+def test_transactions_of_deleted_budget_are_hidden(client, headers):
+    budget = setup_budget(client, headers)
+    assert year_income(client, headers) == 1500
+    search = client.get('/api/transactions/search?q=Groceries', headers=headers).get_json()
+    assert search['data']['total'] == 1
+
+    assert client.delete(f"/api/budgets/{budget['id']}", headers=headers).status_code == 202
+
+    listing = client.get('/api/transactions/', headers=headers).get_json()
+    assert not listing.get('data')
+    search = client.get('/api/transactions/search?q=Groceries', headers=headers).get_json()
+    assert search['data']['total'] == 0
+    stats = client.get('/api/categories/?with_stats=true', headers=headers).get_json()['data']
+    assert [category['transactions_count'] for category in stats] == [0, 0]
+    assert year_income(client, headers) == 0
+
+
+def test_deletion_job_removes_rows(app, client, headers):
+    budget = setup_budget(client, headers)
+    job = client.delete(f"/api/budgets/{budget['id']}", headers=headers).get_json()['data']
+
+    assert run_deletion_jobs(batch_size=1, pause=0) == 1
+    finished = DeletionJob.query.get(job['id'])
+    assert finished.status == 'done'
+    assert finished.deleted_rows == finished.total_rows
+    assert finished.finished_at <= datetime.datetime.now()
+
+
+def test_deletion_job_removes_transactions_from_statistics(app, client, headers):
+    budget = setup_budget(client, headers)
+    other = create(client, headers, '/api/budgets/', {'name': 'Cash', 'initial': 100})
+    food = Category.query.filter_by(name='Food').one()
+    for amount in (10, 25):
+        create(client, headers, '/api/transactions/', {'amount': amount, 'type': 'expense', 'description': 'Groceries',
+                                                       'budget_id': other['id'], 'category_id': food.id})
+
+    client.delete(f"/api/budgets/{budget['id']}", headers=headers)
+    run_deletion_jobs(batch_size=1, pause=0)
+
+    stats = db.session.get(CategoryStats, (food.user_id, food.id))
+    assert (stats.count, stats.mean, stats.m2) == (1, pytest.approx(35), pytest.approx(0))
+    tokens = {token.token: token.count for token in CategoryToken.query.filter_by(category_id=food.id)}
+    assert tokens['groceries'] == 2
+    salary = Category.query.filter_by(name='Salary').one()
+    assert not any(token.count for token in CategoryToken.query.filter_by(category_id=salary.id))
+
+
+def test_reads_of_other_users_are_not_filtered(app, client, headers, user):
+    budget = setup_budget(client, headers)
+    other = auth_headers(create_user('other'))
+    setup_budget(client, other)
+    client.delete(f"/api/budgets/{budget['id']}", headers=headers)
+    statements = []
+
+    def listen(connection, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', listen)
+    try:
+        listing = client.get('/api/transactions/', headers=other).get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listen)
+
+    assert len(listing['data']) == 2
+    assert not any('NOT IN' in statement or 'deletion_job' in statement for statement in statements)
+    assert db.session.get(User, user.id).pending_deletions == 1
+    run_deletion_jobs(batch_size=10, pause=0)
+    db.session.expire_all()
+    assert db.session.get(User, user.id).pending_deletions == 0
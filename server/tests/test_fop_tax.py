@@ -0,0 +1,59 @@
+"""Tests of the FOP tax of `app.services.fop_tax`."""
+
+import datetime
+from decimal import Decimal
+
+from app.models.quarter_income_model import QuarterIncome
+from app.services.fop_tax import fop_tax, quarterly_income
+from tests.conftest import create
+
+YEAR = datetime.date.today().year - 1
+"""A year whose quarters are all closed, so their incomes are cached."""
+
+
+def add_income(client, headers, budget: dict, category: dict, amount: float, created_at: str) -> dict:
+    return create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': 'income', 'description': 'Invoice', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': created_at
+    })
+
+
+def test_income_over_limit_is_taxed_at_increased_rate():
+    quarters = [(datetime.date(YEAR, 1, 1), Decimal(600)), (datetime.date(YEAR, 4, 1), Decimal(600))]
+
+    result = fop_tax(quarters, rate=5, esc_rate=22, min_wage=100, limit_wages=10, over_limit_rate=15)
+
+    assert result['income_limit'] == 1000
+    assert result['limit_exceeded']
+    first, second = result['quarters']
+    assert (first['tax_amount'], first['over_limit_income']) == (30, 0)
+    assert (second['tax_amount'], second['over_limit_income']) == (20 + 30, 200)
+    assert second['unified_social_contribution'] == 66
+    assert result['year']['total_tax'] == 30 + 50 + 2 * 66
+
+
+def test_cached_quarters_follow_new_income(app, client, headers, user):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 0})
+    category = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    add_income(client, headers, budget, category, 1000, f'{YEAR}-02-10T12:00:00')
+    add_income(client, headers, budget, category, 500, f'{YEAR}-08-05T12:00:00')
+
+    assert [income for _, income in quarterly_income(user.id, YEAR)] == [1000, 0, 500, 0]
+    assert QuarterIncome.query.filter_by(user_id=user.id).count() == 4
+
+    add_income(client, headers, budget, category, 200, f'{YEAR}-05-20T12:00:00')
+
+    assert [income for _, income in quarterly_income(user.id, YEAR)] == [1000, 200, 500, 0]
+
+
+def test_tax_from_income_endpoint(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 0})
+    category = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    add_income(client, headers, budget, category, 10000, f'{YEAR}-03-01T12:00:00')
+
+    data = create(client, headers, '/api/calculators/tax-fop/income', {'year': YEAR, 'tax_group': 5, 'period': 'year'})
+
+    assert data['tax_year'] == YEAR
+    assert 'quarters' not in data
+    assert data['year']['income'] == 10000
+    assert data['year']['tax_amount'] == 500
@@ -0,0 +1,75 @@
+"""Tests of the balance forecast of `app.services.forecast`."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from app.services.forecast import TREND_DAMPING, fit, forecast_balance, project
+from tests.conftest import create
+
+START = datetime.date(2024, 1, 1)
+
+
+def test_category_is_fitted_from_its_first_transaction():
+    matrix = np.zeros((2, 24))
+    matrix[0, 12:] = -50
+    matrix[1, :] = 100
+
+    params = fit(np.array([1, 2]), matrix, START)
+
+    assert params['coef'][0] == pytest.approx([-50, 100])
+    assert params['coef'][1] == pytest.approx([0, 0])
+    assert project(params, datetime.date(2026, 1, 1), 1)[0] == pytest.approx([-50, 100])
+
+
+def test_leading_empty_months_are_skipped():
+    matrix = np.zeros((1, 6))
+    matrix[0, 3:] = [10, 20, 30]
+
+    params = fit(np.array([7]), matrix, START)
+
+    assert params['start'] == '2024-04-01'
+    assert params['months'] == 3
+    assert params['coef'][1] == pytest.approx([10])
+
+
+def test_trend_is_damped_beyond_the_history():
+    matrix = -(100 + 10 * np.arange(12, dtype=float))[None, :]
+    params = fit(np.array([1]), matrix, START)
+
+    projected = project(params, datetime.date(2025, 1, 1), 120)[:, 0]
+
+    assert projected[0] == pytest.approx(-210 - 10 * TREND_DAMPING)
+    assert np.all(np.diff(projected) < 0)
+    assert projected[-1] > -210 - 10 * TREND_DAMPING / (1 - TREND_DAMPING)
+
+
+def test_seasonal_component_needs_two_years_of_the_category():
+    matrix = np.zeros((2, 24))
+    matrix[0] = np.tile([200.0] + [0.0] * 11, 2) - 50
+    matrix[1, 6:] = np.tile([0.0] * 11 + [300.0], 2)[6:] - 100
+
+    params = fit(np.array([1, 2]), matrix, START)
+    seasonal = np.array(params['seasonal'])
+
+    assert seasonal[0, 0] > seasonal[1, 0]
+    assert np.all(seasonal[:, 1] == 0)
+
+
+def test_empty_history():
+    params = fit(np.array([], dtype=np.int64), np.zeros((0, 12)), START)
+    assert params['months'] == 0
+    assert project(params, START, 3).shape == (3, 0)
+
+
+def test_recorded_income_without_history_keeps_the_balance(client, headers, user):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    salary = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    create(client, headers, '/api/transactions/', {'amount': 600, 'type': 'income',
+                                                   'budget_id': budget['id'], 'category_id': salary['id']})
+
+    forecast = forecast_balance(user.id, 3, 36)
+
+    assert forecast['current_balance'] == 1600
+    assert [month['balance'] for month in forecast['months']] == [1600, 1600, 1600]
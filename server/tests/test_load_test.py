@@ -0,0 +1,124 @@
+"""Tests of the dataset generator of `benchmarks.dataset` and the load test helpers of `benchmarks.load_test`."""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from benchmarks import load_test
+from benchmarks.dataset import transaction_counts
+from benchmarks.load_test import compare, run_scenario, sample_users, scenarios
+from tests.conftest import PASSWORD, create, create_user
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Answers every request with the status given in its path, e.g. `/500`, over a keep-alive connection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{}'
+        self.send_response(int(self.path.strip('/')))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def status_server():
+    """Port of a local server answering with the status of the requested path."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_transactions_are_split_by_a_zipf_distribution():
+    counts = transaction_counts(np.random.default_rng(42), 100, 10_000, 1.1)
+
+    assert len(counts) == 100
+    assert counts.sum() == 10_000
+    assert counts.min() >= 0
+    assert np.sort(counts)[-10:].sum() > 0.5 * 10_000
+    assert not np.array_equal(counts, np.sort(counts)[::-1])
+
+
+def test_same_seed_produces_the_same_split():
+    first = transaction_counts(np.random.default_rng(7), 50, 1000, 1.1)
+
+    assert np.array_equal(first, transaction_counts(np.random.default_rng(7), 50, 1000, 1.1))
+    assert not np.array_equal(first, transaction_counts(np.random.default_rng(8), 50, 1000, 1.1))
+
+
+def test_zero_skew_splits_the_transactions_evenly():
+    counts = transaction_counts(np.random.default_rng(42), 4, 10, 0)
+
+    assert sorted(counts) == [2, 2, 2, 4]
+
+
+def test_scenarios_of_sampled_users_are_served(app, client, monkeypatch):
+    monkeypatch.setattr(load_test, 'BENCHMARK_PASSWORD', PASSWORD)
+    for n in range(4):
+        create_user(f'bench{n}')
+    users = sample_users(app, 2)
+    for _, _, headers in users:
+        budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+        food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+        create(client, headers, '/api/transactions/', {
+            'amount': 10, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+            'category_id': food['id']
+        })
+
+    requests = scenarios(users)
+
+    assert [email for _, email, _ in users] == ['bench0@example.com', 'bench2@example.com']
+    assert set(requests) == {'login', 'transactions', 'budgets_balance', 'balance_forecast'}
+    for name, scenario in requests.items():
+        assert len(scenario) == 2
+        for method, path, body, headers in scenario:
+            response = client.open(path, method=method, data=body, headers=headers)
+            assert response.status_code == 200, (name, response.get_json())
+
+
+def test_scenario_reports_throughput_latencies_and_errors(status_server):
+    result = run_scenario(status_server, [('GET', '/200', None, {}), ('GET', '/500', None, {})], 0.3, 2)
+
+    assert result['requests'] > 0
+    assert result['errors'] == result['requests'] // 2
+    assert result['requests_per_second'] > 0
+    assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+
+
+def test_scenario_without_responses_counts_only_errors():
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+
+    result = run_scenario(port, [('GET', '/200', None, {})], 0.1, 1)
+
+    assert result['requests'] == 0
+    assert result['errors'] > 0
+
+
+def test_runs_are_compared_in_percent():
+    results = {'scenarios': {
+        'login': {'requests_per_second': 110, 'p50_ms': 9, 'p95_ms': 30, 'p99_ms': 50},
+        'transactions': {'requests_per_second': 50, 'p50_ms': 20, 'p95_ms': 40, 'p99_ms': 80},
+        'budgets_balance': {'requests': 0, 'errors': 10},
+    }}
+    baseline = {'scenarios': {
+        'login': {'requests_per_second': 100, 'p50_ms': 10, 'p95_ms': 40, 'p99_ms': 50},
+        'budgets_balance': {'requests_per_second': 100, 'p50_ms': 10, 'p95_ms': 40, 'p99_ms': 50},
+    }}
+
+    assert compare(results, baseline) == {
+        'login': {'requests_per_second': 10.0, 'p50_ms': -10.0, 'p95_ms': -25.0, 'p99_ms': 0.0},
+        'budgets_balance': {},
+    }
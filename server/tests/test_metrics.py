@@ -0,0 +1,21 @@
+"""Tests of the Prometheus endpoint of `app.api.metrics_api`."""
+
+import pytest
+
+
+@pytest.mark.parametrize('token', [None, ''])
+def test_metrics_are_not_served_without_a_token(app, client, token):
+    app.config['METRICS_TOKEN'] = token
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 403
+
+
+def test_metrics_require_the_token(app, client):
+    app.config['METRICS_TOKEN'] = 'scraper-secret'
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong-ключ'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scraper-secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
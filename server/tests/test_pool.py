@@ -0,0 +1,72 @@
+"""Tests of the connection pool settings and statistics of `app.utils.pool` and their endpoint."""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.utils.pool import MeasuredQueuePool, engine_options, pool_statistics
+from tests.conftest import auth_headers, create_user
+
+
+def test_saturated_pool_counts_waits_and_timeouts():
+    engine = create_engine('sqlite://', creator=lambda: sqlite3.connect(':memory:', check_same_thread=False),
+                           poolclass=MeasuredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    connection = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    statistics = pool_statistics(engine.pool)
+    connection.close()
+
+    assert statistics['pool_class'] == 'MeasuredQueuePool'
+    assert (statistics['size'], statistics['checked_out'], statistics['overflow']) == (1, 1, 0)
+    assert (statistics['checkouts'], statistics['timeouts'], statistics['waiting']) == (2, 1, 0)
+    assert statistics['wait_max_ms'] >= 50
+    assert statistics['recent_wait_ms'] > 0
+    assert pool_statistics(engine.pool)['checked_in'] == 1
+    engine.dispose()
+
+
+def test_pools_without_a_queue_report_their_class():
+    engine = create_engine('sqlite://')
+
+    assert pool_statistics(engine.pool) == {'pool_class': type(engine.pool).__name__}
+
+
+def test_postgresql_engines_are_sized_from_the_settings(app):
+    options = engine_options(app.config, 'postgresql://localhost/budget', pool_size=7, max_overflow=3)
+
+    assert options['poolclass'] is MeasuredQueuePool
+    assert (options['pool_size'], options['max_overflow']) == (7, 3)
+    assert options['pool_timeout'] == app.config['DB_POOL_TIMEOUT']
+
+
+def test_asyncpg_behind_pgbouncer_does_not_cache_prepared_statements(app):
+    app.config['DB_PGBOUNCER'] = True
+
+    options = engine_options(app.config, 'postgresql+asyncpg://localhost/budget', pool_size=2, max_overflow=0)
+
+    assert 'poolclass' not in options
+    assert options['connect_args']['statement_cache_size'] == 0
+    assert options['connect_args']['prepared_statement_cache_size'] == 0
+
+
+def test_unknown_pre_ping_strategy_is_rejected(app):
+    app.config['DB_POOL_PRE_PING'] = 'sometimes'
+
+    with pytest.raises(ValueError):
+        engine_options(app.config, 'postgresql://localhost/budget', pool_size=1, max_overflow=0)
+
+
+def test_pool_endpoint_is_only_served_to_admins(client, headers):
+    assert client.get('/api/system/pool').status_code == 401
+    assert client.get('/api/system/pool', headers=headers).status_code == 403
+
+    response = client.get('/api/system/pool', headers=auth_headers(create_user('admin', 'admin')))
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert isinstance(data['pid'], int)
+    assert 'pool_class' in data['pool']
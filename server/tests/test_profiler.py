@@ -0,0 +1,60 @@
+"""Tests of the sampling profiler and of the profile endpoint of the system API."""
+
+import sys
+
+import pytest
+
+from app.utils.profiler import SamplingProfiler
+from tests.conftest import auth_headers, create_user
+
+
+@pytest.fixture
+def admin_headers(app) -> dict[str, str]:
+    """Headers authenticating requests as an admin."""
+    return auth_headers(create_user('admin', 'admin'))
+
+
+def test_switch_interval_is_restored():
+    switch_interval = sys.getswitchinterval()
+    with pytest.raises(RuntimeError):
+        with SamplingProfiler(0.0005) as profiler:
+            assert sys.getswitchinterval() == 0.0005
+            raise RuntimeError
+    assert profiler.switch_interval_lowered
+    assert sys.getswitchinterval() == switch_interval
+
+
+def test_one_profiler_lowers_switch_interval_at_a_time():
+    switch_interval = sys.getswitchinterval()
+    with SamplingProfiler(0.0005) as outer:
+        with SamplingProfiler(0.0002) as inner:
+            assert sys.getswitchinterval() == 0.0005
+    assert outer.switch_interval_lowered and not inner.switch_interval_lowered
+    assert sys.getswitchinterval() == switch_interval
+
+
+def test_profile_endpoint_can_not_profile_itself(client, admin_headers):
+    response = client.post('/api/system/profile', json={'method': 'POST', 'path': '/api/system/%70rofile'},
+                           headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_profile_endpoint_profiles_paths_sharing_its_prefix(client, admin_headers):
+    response = client.post('/api/system/profile', json={'path': '/api/system/profile-anything'},
+                           headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['status'] == 404
+
+
+def test_profiled_request_reports_server_timing(app, client, admin_headers):
+    app.config['SERVER_TIMING_ENABLED'] = True
+    response = client.post('/api/system/profile', json={'path': '/api/users/me'}, headers=admin_headers)
+    data = response.get_json()['data']
+    assert data['status'] == 200
+    assert 'total;dur=' in data['server_timing']
+    assert data['switch_interval_lowered']
+
+
+def test_server_timing_is_disabled_by_default(client, headers):
+    response = client.get('/api/users/me', headers=headers)
+    assert 'Server-Timing' not in response.headers
@@ -0,0 +1,89 @@
+"""Tests of the query observer of `app.utils.query_observer` and of the statements counted by `app.utils.timing`."""
+
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.utils.extensions import db
+from app.utils.query_observer import QueryBudgetExceeded, QueryObserver, fingerprint
+from app.utils.timing import RequestTimings, is_transaction_control, start_request_timings, stop_request_timings
+
+
+def timings_of(*statements: str) -> RequestTimings:
+    """Returns timings of a request that executed the statements."""
+    timings = RequestTimings()
+    for statement in statements:
+        timings.queries += 1
+        timings.statements[statement] += 1
+    return timings
+
+
+def test_fingerprint_replaces_literals_and_parameter_lists():
+    first_id, normalized = fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x' LIMIT 10")
+    second_id, _ = fingerprint("SELECT * FROM t WHERE id IN (?) AND name = 'y' LIMIT 20")
+
+    assert normalized == 'SELECT * FROM t WHERE id IN (?+) AND name = ? LIMIT ?'
+    assert first_id != second_id
+    assert fingerprint('SELECT * FROM t WHERE id IN (?, ?)') == fingerprint('SELECT * FROM t WHERE id IN (?, ?, ?)')
+
+
+@pytest.mark.parametrize('statement', ['BEGIN', 'SAVEPOINT sa_savepoint_1', 'RELEASE SAVEPOINT sa_savepoint_1',
+                                       'ROLLBACK TO SAVEPOINT sa_savepoint_1', 'COMMIT', ' start transaction'])
+def test_transaction_control_statements(statement):
+    assert is_transaction_control(statement)
+
+
+@pytest.mark.parametrize('statement', ['SELECT 1', 'UPDATE "user" SET deleted_at = NULL', 'BEGINNING'])
+def test_data_statements(statement):
+    assert not is_transaction_control(statement)
+
+
+def test_budget_exceeded_fails_in_strict_mode():
+    with pytest.raises(QueryBudgetExceeded, match='executed 3 SQL statements, its budget is 2'):
+        QueryObserver().finish_request('api.view', timings_of('SELECT 1', 'SELECT 2', 'SELECT 3'), 2, True)
+
+
+def test_budget_exceeded_is_logged(caplog):
+    with caplog.at_level(logging.WARNING, 'app.queries'):
+        QueryObserver().finish_request('api.view', timings_of('SELECT 1', 'SELECT 2'), 1, False)
+    assert 'its budget is 1' in caplog.text
+
+
+def test_request_within_budget_passes(caplog):
+    with caplog.at_level(logging.WARNING, 'app.queries'):
+        QueryObserver().finish_request('api.view', timings_of('SELECT 1', 'SELECT 2'), 2, True)
+    assert not caplog.records
+
+
+def test_repeated_fingerprint_is_reported_as_n_plus_one(caplog):
+    observer = QueryObserver()
+    statements = [f'SELECT * FROM category WHERE id = {category_id}' for category_id in range(11)]
+    for statement in statements:
+        observer.record(statement, 0.001)
+
+    with caplog.at_level(logging.WARNING, 'app.queries'):
+        observer.finish_request('api.view', timings_of(*statements), None, True)
+
+    assert 'Possible N+1 query in api.view, executed 11 times' in caplog.text
+    assert observer.statistics('repeats', 1)[0]['repeated_requests'] == 1
+
+
+def test_statements_below_threshold_are_not_reported(caplog):
+    with caplog.at_level(logging.WARNING, 'app.queries'):
+        QueryObserver().finish_request('api.view', timings_of(*['SELECT * FROM t WHERE id = 1'] * 10), None, True)
+    assert not caplog.records
+
+
+def test_savepoints_are_not_counted(app):
+    token = start_request_timings()
+    try:
+        with db.engine.connect() as connection:
+            with connection.begin():
+                with connection.begin_nested():
+                    connection.execute(text('SELECT 1'))
+    finally:
+        timings = stop_request_timings(token)
+
+    assert timings.queries == 1
+    assert list(timings.statements) == ['SELECT 1']
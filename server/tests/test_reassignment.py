@@ -0,0 +1,117 @@
+"""Tests of the category merge and bulk reassignment of `app.services.reassignment`."""
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.category_month_model import CategoryMonth
+from app.models.category_stats_model import CategoryStats
+from app.models.recurring_rule_model import RecurringRule
+from app.models.transaction_model import Transaction
+from app.services.archive import ARCHIVED_COLUMNS
+from app.utils.extensions import db
+from tests.conftest import auth_headers, create, create_user
+
+
+def add_transaction(client, headers, budget: dict, category: dict, amount: float = 10, kind: str = 'expense',
+                    created_at: str = '2024-05-10T12:00:00') -> dict:
+    return create(client, headers, '/api/transactions/', {
+        'amount': amount, 'type': kind, 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': category['id'], 'created_at': created_at
+    })
+
+
+def test_merge_moves_hot_archived_and_recurring_rows(client, headers, user):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    source = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    target = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    add_transaction(client, headers, budget, source, 20)
+    archived = add_transaction(client, headers, budget, source, 30, created_at='2020-01-10T12:00:00')
+    add_transaction(client, headers, budget, target, 50)
+    row = db.session.get(Transaction, archived['id'])
+    db.session.add(ArchivedTransaction(**{name: getattr(row, name) for name in ARCHIVED_COLUMNS}))
+    db.session.delete(row)
+    db.session.commit()
+    create(client, headers, '/api/recurring/', {
+        'budget_id': budget['id'], 'category_id': source['id'], 'amount': 5, 'type': 'expense',
+        'interval_unit': 'month', 'start_at': '2100-01-01T00:00:00'
+    })
+
+    data = create(client, headers, f"/api/categories/{source['id']}/merge", {'target_category_id': target['id']})
+
+    assert (data['moved_transactions'], data['moved_recurring']) == (2, 1)
+    assert data['deletion']['entity'] == 'category'
+    assert Transaction.query.filter_by(category_id=source['id']).count() == 0
+    assert db.session.get(ArchivedTransaction, archived['id']).category_id == target['id']
+    assert RecurringRule.query.filter_by(category_id=target['id']).count() == 1
+    months = {str(month.month): float(month.total) for month in CategoryMonth.query.filter_by(category_id=target['id'])}
+    assert months == {'2020-01-01': 30, '2024-05-01': 70}
+    assert db.session.get(CategoryStats, (user.id, source['id'])) is None
+    assert db.session.get(CategoryStats, (user.id, target['id'])).count == 2
+    categories = client.get('/api/categories/', headers=headers).get_json()['data']
+    assert [category['id'] for category in categories] == [target['id']]
+
+
+def test_merge_keeps_the_source_on_request(client, headers):
+    source = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    target = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+
+    data = create(client, headers, f"/api/categories/{source['id']}/merge",
+                  {'target_category_id': target['id'], 'delete_source': False})
+
+    assert (data['moved_transactions'], data['moved_recurring']) == (0, 0)
+    assert 'deletion' not in data
+    assert len(client.get('/api/categories/', headers=headers).get_json()['data']) == 2
+
+
+def test_merge_across_users_and_types_is_forbidden(client, headers):
+    source = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    salary = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    other_headers = auth_headers(create_user('other'))
+    foreign = create(client, other_headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+
+    def merge(target_id: int) -> int:
+        return client.post(f"/api/categories/{source['id']}/merge", headers=headers,
+                           json={'target_category_id': target_id}).status_code
+
+    assert merge(foreign['id']) == 404
+    assert merge(salary['id']) == 400
+    assert merge(source['id']) == 400
+    assert client.post(f"/api/categories/{foreign['id']}/merge", headers=headers,
+                       json={'target_category_id': source['id']}).status_code == 404
+
+
+def test_reassign_moves_matching_transactions_and_reports_skipped(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    cafe = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    salary = create(client, headers, '/api/categories/', {'name': 'Salary', 'type': 'incomes'})
+    first = add_transaction(client, headers, budget, food)
+    second = add_transaction(client, headers, budget, food)
+    already = add_transaction(client, headers, budget, cafe)
+    income = add_transaction(client, headers, budget, salary, kind='income')
+    other_headers = auth_headers(create_user('other'))
+    other_budget = create(client, other_headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    other_food = create(client, other_headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    foreign = add_transaction(client, other_headers, other_budget, other_food)
+
+    data = create(client, headers, '/api/categories/reassign', {
+        'category_id': cafe['id'],
+        'transaction_ids': [first['id'], second['id'], already['id'], income['id'], foreign['id'], 999]
+    })
+
+    assert data['moved'] == sorted([first['id'], second['id']])
+    assert data['skipped'] == sorted([already['id'], income['id'], foreign['id'], 999])
+    assert db.session.get(Transaction, foreign['id']).category_id == other_food['id']
+    assert db.session.get(Transaction, income['id']).category_id == salary['id']
+
+
+def test_reassign_into_category_of_another_user_is_forbidden(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    transaction = add_transaction(client, headers, budget, food)
+    foreign = create(client, auth_headers(create_user('other')), '/api/categories/',
+                     {'name': 'Food', 'type': 'expenses'})
+
+    response = client.post('/api/categories/reassign', headers=headers,
+                           json={'category_id': foreign['id'], 'transaction_ids': [transaction['id']]})
+
+    assert response.status_code == 404
+    assert db.session.get(Transaction, transaction['id']).category_id == food['id']
@@ -0,0 +1,72 @@
+"""Tests of the recurring transaction rules API."""
+
+import datetime
+
+import pytest
+
+from app.models.budget_model import Budget
+from app.models.category_model import Category
+from app.models.recurring_rule_model import RecurringRule
+from app.services.deletion import schedule_deletion
+from app.services.recurring import materialize_due_occurrences
+from app.utils.extensions import db
+from tests.conftest import create
+
+
+@pytest.fixture
+def rule(client, headers) -> dict:
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    rent = create(client, headers, '/api/categories/', {'name': 'Rent', 'type': 'expenses'})
+    return create(client, headers, '/api/recurring/', {
+        'budget_id': budget['id'], 'category_id': rent['id'], 'amount': 300, 'description': 'Monthly rent',
+        'type': 'expense', 'interval_unit': 'month'
+    })
+
+
+@pytest.mark.parametrize('field', ['category_id', 'amount', 'active'])
+def test_required_fields_cannot_be_set_to_null(client, headers, rule, field):
+    response = client.put(f"/api/recurring/{rule['id']}", json={field: None}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.get_json()['details'][0]['loc'] == [field]
+
+
+def test_description_and_end_can_be_removed(client, headers, rule):
+    response = client.put(f"/api/recurring/{rule['id']}", json={'description': None, 'end_at': None},
+                          headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['description'] is None
+    assert response.get_json()['data']['amount'] == 300
+
+
+def test_resumed_rule_skips_missed_occurrences(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    rent = create(client, headers, '/api/categories/', {'name': 'Rent', 'type': 'expenses'})
+    start_at = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(days=100, hours=1)
+    rule = create(client, headers, '/api/recurring/', {
+        'budget_id': budget['id'], 'category_id': rent['id'], 'amount': 10, 'type': 'expense',
+        'interval_unit': 'week', 'start_at': start_at.isoformat()
+    })
+    client.put(f"/api/recurring/{rule['id']}", json={'active': False}, headers=headers)
+
+    response = client.put(f"/api/recurring/{rule['id']}", json={'active': True}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['active']
+    assert data['occurrences'] == 15
+    assert datetime.datetime.fromisoformat(data['next_run_at']) == start_at + datetime.timedelta(weeks=15)
+    assert materialize_due_occurrences(batch_size=10, max_catch_up=10) == 0
+
+
+@pytest.mark.parametrize('model, parent', [(Budget, 'budget_id'), (Category, 'category_id')])
+def test_rule_of_deleted_parent_cannot_be_resumed(client, headers, rule, model, parent):
+    client.put(f"/api/recurring/{rule['id']}", json={'active': False}, headers=headers)
+    schedule_deletion(model.__tablename__, db.session.get(model, rule[parent]))
+    db.session.commit()
+
+    response = client.put(f"/api/recurring/{rule['id']}", json={'active': True}, headers=headers)
+
+    assert response.status_code == 404
+    assert not db.session.get(RecurringRule, rule['id']).active
@@ -0,0 +1,33 @@
+"""Tests of the schema upgrade of `app.services.schema`."""
+
+from sqlalchemy import inspect, text
+
+from app.services.schema import upgrade_schema
+from app.utils.extensions import db
+
+
+def test_up_to_date_schema_is_not_changed(app):
+    assert upgrade_schema() == []
+
+
+def test_missing_tables_columns_and_indexes_are_created(app):
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE alert'))
+        connection.execute(text('ALTER TABLE budget DROP COLUMN deleted_at'))
+        connection.execute(text('DROP INDEX transaction_category_id_idx'))
+
+    assert sorted(upgrade_schema()) == [
+        'added column budget.deleted_at', 'created index transaction_category_id_idx', 'created table alert'
+    ]
+    inspector = inspect(db.engine)
+    assert 'deleted_at' in {column['name'] for column in inspector.get_columns('budget')}
+    assert upgrade_schema() == []
+
+
+def test_command_reports_changes(app):
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE user DROP COLUMN deleted_at'))
+
+    result = app.test_cli_runner().invoke(args=['upgrade-schema'])
+    assert result.exit_code == 0
+    assert 'Added column user.deleted_at' in result.output
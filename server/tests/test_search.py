@@ -0,0 +1,86 @@
+"""Tests of the search over transaction descriptions of `app.services.search`."""
+
+from app.models.archived_transaction_model import ArchivedTransaction
+from app.models.transaction_model import Transaction
+from app.services.archive import ARCHIVED_COLUMNS
+from app.utils.extensions import db
+from tests.conftest import auth_headers, create, create_user
+
+
+def add_expenses(client, headers, *descriptions: str) -> list[dict]:
+    """Creates an expense for every description and returns them."""
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 1000})
+    category = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    return [
+        create(client, headers, '/api/transactions/', {
+            'amount': 10, 'type': 'expense', 'description': description, 'budget_id': budget['id'],
+            'category_id': category['id']
+        })
+        for description in descriptions
+    ]
+
+
+def search(client, headers, q: str, **query: str) -> dict:
+    response = client.get('/api/transactions/search', headers=headers, query_string={'q': q, **query})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+
+def test_exact_matches_rank_above_prefix_and_fuzzy_matches(client, headers):
+    exact, prefix, fuzzy, _ = add_expenses(client, headers, 'Coffee beans', 'Coffeehouse visit', 'Cofee to go',
+                                           'Groceries')
+
+    data = search(client, headers, 'coffee')
+
+    assert data['total'] == 3
+    assert [result['id'] for result in data['results']] == [exact['id'], prefix['id'], fuzzy['id']]
+    ranks = [result['rank'] for result in data['results']]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+def test_shorter_descriptions_rank_higher(client, headers):
+    longer, shorter = add_expenses(client, headers, 'Coffee with friends downtown', 'Coffee')
+
+    data = search(client, headers, 'coffee')
+
+    assert [result['id'] for result in data['results']] == [shorter['id'], longer['id']]
+
+
+def test_matching_words_are_highlighted(client, headers):
+    add_expenses(client, headers, 'Morning coffee and Coffeehouse beans')
+
+    result = search(client, headers, 'coffee')['results'][0]
+
+    assert result['highlights'] == [[8, 14], [19, 30]]
+
+
+def test_results_are_paged(client, headers):
+    add_expenses(client, headers, *(f'Taxi ride {number}' for number in range(5)))
+
+    data = search(client, headers, 'taxi', page='2', per_page='2')
+
+    assert data['total'] == 5
+    assert len(data['results']) == 2
+
+
+def test_archived_transactions_are_found_only_for_their_user(client, headers):
+    transaction, = add_expenses(client, headers, 'Concert tickets')
+    row = db.session.get(Transaction, transaction['id'])
+    db.session.add(ArchivedTransaction(**{name: getattr(row, name) for name in ARCHIVED_COLUMNS}))
+    db.session.delete(row)
+    db.session.commit()
+
+    assert [result['id'] for result in search(client, headers, 'tickets')['results']] == [transaction['id']]
+    assert search(client, auth_headers(create_user('other')), 'tickets')['total'] == 0
+
+
+def test_changed_description_is_found_by_its_new_words(client, headers):
+    transaction, = add_expenses(client, headers, 'Pizza')
+    assert search(client, headers, 'pizza')['total'] == 1
+
+    response = client.put(f"/api/transactions/{transaction['id']}", headers=headers,
+                          json={'amount': 10, 'type': 'expense', 'description': 'Sushi'})
+
+    assert response.status_code == 200
+    assert search(client, headers, 'pizza')['total'] == 0
+    assert search(client, headers, 'sushi')['total'] == 1
@@ -0,0 +1,77 @@
+"""Tests of the production server settings of `gunicorn.conf.py` and the helpers of `app.utils.warmup`."""
+
+import gc
+import runpy
+from pathlib import Path
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.utils.extensions import db
+from app.utils.warmup import import_all_modules, warm_up_pool
+
+GUNICORN_CONF = Path(__file__).parent.parent / 'gunicorn.conf.py'
+"""Path of the Gunicorn settings."""
+
+
+def gunicorn_settings(monkeypatch, tmp_path, **config) -> dict:
+    """Returns the settings of `gunicorn.conf.py` loaded with the given `Config` values."""
+    monkeypatch.setenv('METRICS_DIR', str(tmp_path))
+    for name, value in config.items():
+        monkeypatch.setattr(Config, name, value)
+    return runpy.run_path(str(GUNICORN_CONF))
+
+
+@pytest.mark.parametrize('threads, worker_class', [(4, 'gthread'), (1, 'sync')])
+def test_wsgi_mode_serves_the_flask_application(monkeypatch, tmp_path, threads, worker_class):
+    settings = gunicorn_settings(monkeypatch, tmp_path, SERVER_MODE='wsgi', SERVER_THREADS=threads,
+                                 SERVER_WORKERS=3, SERVER_MAX_REQUESTS=500)
+
+    assert (settings['wsgi_app'], settings['worker_class']) == ('wsgi:app', worker_class)
+    assert (settings['workers'], settings['threads'], settings['max_requests']) == (3, threads, 500)
+    assert settings['preload_app']
+
+
+def test_asgi_mode_serves_the_asgi_application(monkeypatch, tmp_path):
+    settings = gunicorn_settings(monkeypatch, tmp_path, SERVER_MODE='asgi')
+
+    assert (settings['wsgi_app'], settings['worker_class']) == ('asgi:app', 'uvicorn_worker.UvicornWorker')
+
+
+def test_server_start_removes_metrics_of_a_previous_run(monkeypatch, tmp_path):
+    settings = gunicorn_settings(monkeypatch, tmp_path, METRICS_DIR=str(tmp_path))
+    (tmp_path / 'metrics-123.json').write_text('{}')
+    (tmp_path / 'archive.json').write_text('{}')
+
+    settings['on_starting'](None)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['archive.json']
+
+
+def test_pre_fork_freezes_the_loaded_objects(monkeypatch, tmp_path):
+    settings = gunicorn_settings(monkeypatch, tmp_path)
+    try:
+        settings['pre_fork'](None, None)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_all_modules_are_imported():
+    names = import_all_modules()
+
+    assert {'app.api.sync_api', 'app.services.search', 'app.utils.warmup'} <= set(names)
+
+
+def test_warm_up_is_capped_at_the_pool_size(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'warmup.db'}")
+    app = create_app()
+    with app.app_context():
+        pool_size = db.engine.pool.size()
+
+    assert warm_up_pool(app, pool_size + 3) == pool_size
+    assert warm_up_pool(app, 1) == 1
+    with app.app_context():
+        assert db.engine.pool.checkedin() == pool_size
+        db.engine.dispose()
@@ -0,0 +1,80 @@
+"""Tests of the delta synchronization endpoint backed by the change log of `app.services.changelog`."""
+
+from tests.conftest import auth_headers, create, create_user
+
+
+def changes(client, headers, since: int = 0) -> dict:
+    response = client.get('/api/sync/', headers=headers, query_string={'since': since})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+
+def ids(records: list[dict]) -> list[int]:
+    return sorted(record['id'] for record in records)
+
+
+def test_first_sync_returns_all_records(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    category = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+
+    data = changes(client, headers)
+
+    assert data['full']
+    assert data['seq'] > 0
+    assert ids(data['upserts']['budgets']) == [budget['id']]
+    assert ids(data['upserts']['categories']) == [category['id']]
+    assert data['deletes'] == {'transactions': [], 'budgets': [], 'categories': []}
+
+
+def test_delta_returns_changed_records_and_tombstones(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    food = create(client, headers, '/api/categories/', {'name': 'Food', 'type': 'expenses'})
+    unchanged = create(client, headers, '/api/categories/', {'name': 'Cafe', 'type': 'expenses'})
+    removed = create(client, headers, '/api/transactions/', {
+        'amount': 10, 'type': 'expense', 'description': 'Groceries', 'budget_id': budget['id'],
+        'category_id': food['id']
+    })
+    since = changes(client, headers)['seq']
+
+    added = create(client, headers, '/api/transactions/', {
+        'amount': 20, 'type': 'expense', 'description': 'Market', 'budget_id': budget['id'],
+        'category_id': food['id']
+    })
+    assert client.delete(f"/api/transactions/{removed['id']}", headers=headers).status_code == 200
+
+    data = changes(client, headers, since)
+
+    assert not data['full']
+    assert data['seq'] > since
+    assert ids(data['upserts']['transactions']) == [added['id']]
+    assert ids(data['upserts']['budgets']) == [budget['id']]
+    assert unchanged['id'] not in ids(data['upserts']['categories'])
+    assert data['deletes']['transactions'] == [removed['id']]
+    assert changes(client, headers, data['seq'])['upserts'] == {'transactions': [], 'budgets': [], 'categories': []}
+
+
+def test_unknown_sequence_falls_back_to_full_sync(client, headers):
+    budget = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    seq = changes(client, headers)['seq']
+
+    data = changes(client, headers, seq + 100)
+
+    assert data['full']
+    assert ids(data['upserts']['budgets']) == [budget['id']]
+
+
+def test_changes_of_other_users_are_not_synced(client, headers):
+    create(client, headers, '/api/budgets/', {'name': 'Cash', 'initial': 100})
+    since = changes(client, headers)['seq']
+    other_headers = auth_headers(create_user('other'))
+    create(client, other_headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+
+    data = changes(client, headers, since)
+
+    assert not data['full']
+    assert data['upserts']['budgets'] == []
+    assert changes(client, other_headers)['seq'] > 0
+
+
+def test_negative_sequence_is_rejected(client, headers):
+    assert client.get('/api/sync/', headers=headers, query_string={'since': -1}).status_code == 400
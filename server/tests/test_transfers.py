@@ -0,0 +1,34 @@
+"""Tests of the transfers of money between budgets."""
+
+import pytest
+
+from tests.conftest import create
+
+
+@pytest.fixture
+def budgets(client, headers) -> tuple[dict, dict]:
+    return (create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100}),
+            create(client, headers, '/api/budgets/', {'name': 'Savings', 'initial': 0}))
+
+
+@pytest.mark.parametrize('amount', [0, 0.004])
+def test_transfer_of_less_than_a_cent_is_rejected(client, headers, budgets, amount):
+    wallet, savings = budgets
+    response = client.post('/api/budgets/transfer', headers=headers, json={
+        'from_budget_id': wallet['id'], 'to_budget_id': savings['id'], 'amount': amount
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['details'][0]['loc'] == ['amount']
+
+
+def test_transfer_moves_the_amount(client, headers, budgets):
+    wallet, savings = budgets
+    response = client.post('/api/budgets/transfer', headers=headers, json={
+        'from_budget_id': wallet['id'], 'to_budget_id': savings['id'], 'amount': 0.01
+    })
+
+    assert response.status_code in (200, 201)
+    balances = {budget['name']: budget['current'] for budget in client.get('/api/budgets/', headers=headers)
+                .get_json()['data']}
+    assert balances == {'Wallet': 99.99, 'Savings': 0.01}
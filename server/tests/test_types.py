@@ -0,0 +1,24 @@
+"""Tests of the SQLite stand-in of `app.utils.types`."""
+
+from sqlalchemy import BigInteger, Numeric, column, select, update, values
+
+from app.models.budget_model import Budget
+from app.utils.extensions import db
+from tests.conftest import create
+
+
+def test_named_values_join_a_statement(client, headers):
+    wallet = create(client, headers, '/api/budgets/', {'name': 'Wallet', 'initial': 100})
+    cash = create(client, headers, '/api/budgets/', {'name': 'Cash', 'initial': 50})
+    deltas = values(column('budget_id', BigInteger), column('delta', Numeric(12, 2)), name='deltas').data(
+        [(wallet['id'], 5), (cash['id'], -20)]
+    )
+
+    db.session.execute(update(Budget).where(Budget.id == deltas.c.budget_id).values(
+        current=Budget.current + deltas.c.delta
+    ))
+    db.session.commit()
+
+    assert sorted(db.session.execute(select(Budget.name, Budget.current)).all()) == [('Cash', 30), ('Wallet', 105)]
+    joined = select(deltas.c.delta).join_from(deltas, Budget, Budget.id == deltas.c.budget_id)
+    assert sorted(db.session.scalars(joined)) == [-20, 5]
@@ -0,0 +1,13 @@
+"""WSGI entry point of the application for production servers.
+
+Run it with the settings of `gunicorn.conf.py`:
+    gunicorn -c gunicorn.conf.py
+"""
+
+from app import create_app
+from app.utils.warmup import import_all_modules
+
+app = create_app()
+"""variable app is the Flask application instance"""
+
+import_all_modules()